@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Benchmark tool throughput against a fake Prometheus at increasing concurrency.
+
+Usage:
+    python benchmarks/bench_concurrency.py [--latency 0.1] [--calls 64]
+
+With a non-blocking transport the calls per second should grow roughly
+linearly with concurrency until the fake backend saturates.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from fake_prometheus import FakePrometheus
+from prometheus_mcp_server import server
+from prometheus_mcp_server.logging_config import setup_logging
+
+
+async def run_level(concurrency: int, calls: int) -> float:
+    """Run ``calls`` range queries with at most ``concurrency`` in flight."""
+    # Every level must reach the backend, not the results cached by the level before
+    server.result_cache.clear()
+    server.extent_cache.clear()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_call(i: int):
+        async with semaphore:
+            await server.execute_range_query(f"up{{n='{i}'}}", start="0", end="300", step="15")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_call(i) for i in range(calls)))
+    return calls / (time.perf_counter() - started)
+
+
+async def main(args):
+    setup_logging()
+    logging.getLogger().setLevel(logging.WARNING)
+    with FakePrometheus(latency=args.latency) as fake:
+        server.config.url = fake.url
+        print(f"{'concurrency':>12} {'calls/s':>10}")
+        for concurrency in (1, 2, 4, 8, 16, 32):
+            throughput = await run_level(concurrency, args.calls)
+            print(f"{concurrency:>12} {throughput:>10.1f}")
+        await server.get_http_client().aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.1, help="fake backend latency in seconds")
+    parser.add_argument("--calls", type=int, default=64, help="calls per concurrency level")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Benchmark the stdlib and orjson backends on realistic Prometheus payloads.
+
+Usage:
+    python benchmarks/bench_json_codec.py [--vector-series 10000] [--matrix-series 500] [--samples 720]
+
+Decodes a Prometheus API response body and encodes the tool result for an
+instant vector and a range matrix with each available backend.
+"""
+
+import argparse
+import json
+import time
+
+from prometheus_mcp_server import json_codec
+
+
+def vector_body(series: int) -> bytes:
+    return json.dumps({
+        "status": "success",
+        "data": {
+            "resultType": "vector",
+            "result": [
+                {"metric": {"__name__": "http_requests_total", "job": "api", "instance": f"10.0.{i // 256}.{i % 256}:9100",
+                            "code": "200", "method": "GET"},
+                 "value": [1700000000.123, str(i * 1.5)]}
+                for i in range(series)
+            ]
+        }
+    }).encode()
+
+
+def matrix_body(series: int, samples: int) -> bytes:
+    return json.dumps({
+        "status": "success",
+        "data": {
+            "resultType": "matrix",
+            "result": [
+                {"metric": {"__name__": "node_cpu_seconds_total", "cpu": str(i % 64), "mode": "idle",
+                            "instance": f"node-{i // 64}:9100"},
+                 "values": [[1700000000 + n * 15, str(n * 0.25)] for n in range(samples)]}
+                for i in range(series)
+            ]
+        }
+    }).encode()
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(args):
+    payloads = {
+        f"vector {args.vector_series} series": vector_body(args.vector_series),
+        f"matrix {args.matrix_series}x{args.samples}": matrix_body(args.matrix_series, args.samples),
+    }
+    backends = ["json"] + (["orjson"] if json_codec.orjson is not None else [])
+    if len(backends) == 1:
+        print("orjson is not installed; install the fast-json extra to compare backends")
+
+    for label, body in payloads.items():
+        print(f"{label} ({len(body) / 1e6:.1f} MB)")
+        for name in backends:
+            json_codec.use_backend(name)
+            data = json_codec.loads(body)["data"]
+            decode = best_of(lambda: json_codec.loads(body), args.repeat)
+            encode = best_of(lambda: json_codec.dumps(data), args.repeat)
+            print(f"  {name:<7} loads {decode * 1000:8.1f} ms   dumps {encode * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vector-series", type=int, default=10000, help="series in the instant vector")
+    parser.add_argument("--matrix-series", type=int, default=500, help="series in the range matrix")
+    parser.add_argument("--samples", type=int, default=720, help="samples per matrix series")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, the best is reported")
+    main(parser.parse_args())
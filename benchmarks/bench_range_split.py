@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Benchmark a long range query as one request versus parallel time shards.
+
+Usage:
+    python benchmarks/bench_range_split.py [--days 30] [--step 60] [--per-point 0.00005]
+
+The fake backend's latency grows with the number of points evaluated, like a
+real Prometheus, so splitting the range and fetching shards concurrently
+should finish well ahead of the single request.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from fake_prometheus import FakePrometheus
+from prometheus_mcp_server import server
+from prometheus_mcp_server.logging_config import setup_logging
+
+
+class LatencyInjectingPrometheus(FakePrometheus):
+    """Fake Prometheus whose latency is proportional to the points evaluated."""
+
+    def __init__(self, per_point: float, **kwargs):
+        super().__init__(**kwargs)
+        self.per_point = per_point
+
+    def response_delay(self, params) -> float:
+        if "step" not in params:
+            return self.latency
+        points = (float(params["end"][0]) - float(params["start"][0])) / float(params["step"][0]) + 1
+        return self.latency + points * self.series * self.per_point
+
+
+async def timed_range_query(start: float, end: float, step: str) -> float:
+    server.result_cache.clear()
+    started = time.perf_counter()
+    result = await server.execute_range_query("up", start=str(start), end=str(end), step=step)
+    elapsed = time.perf_counter() - started
+    assert len(result["result"][0]["values"]) == int((end - start) // float(step)) + 1
+    return elapsed
+
+
+async def main(args):
+    setup_logging()
+    logging.getLogger().setLevel(logging.WARNING)
+    server.config.range_cache_max_samples = 0
+    end = 1672531200.0
+    start = end - args.days * 86400
+
+    with LatencyInjectingPrometheus(per_point=args.per_point, latency=0.01, series=1) as fake:
+        server.config.url = fake.url
+
+        server.config.range_split_interval = 0
+        single = await timed_range_query(start, end, str(args.step))
+        print(f"single request:          {single:6.2f}s")
+
+        server.config.range_split_interval = 86400
+        for parallel in (1, 4, 8, 16):
+            server.config.range_max_parallel = parallel
+            split = await timed_range_query(start, end, str(args.step))
+            print(f"split per day, {parallel:>2} wide: {split:6.2f}s")
+        await server.close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=30, help="length of the range in days")
+    parser.add_argument("--step", type=float, default=60, help="query step in seconds")
+    parser.add_argument("--per-point", type=float, default=0.00005, help="fake evaluation cost per point in seconds")
+    asyncio.run(main(parser.parse_args()))
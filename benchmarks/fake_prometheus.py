@@ -0,0 +1,100 @@
+"""A minimal fake Prometheus HTTP API for local benchmarks.
+
+Serves canned ``query``, ``query_range`` and ``label/__name__/values``
+responses from a background thread, with a configurable fixed latency.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class FakePrometheus:
+    """Fake Prometheus server running on a random local port.
+
+    Args:
+        latency: Seconds to sleep before answering each request
+        series: Number of series returned by query endpoints
+    """
+
+    def __init__(self, latency: float = 0.05, series: int = 10):
+        self.latency = latency
+        self.series = series
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def response_delay(self, params) -> float:
+        """Return how long to sleep before answering a request."""
+        return self.latency
+
+    def build_data(self, endpoint, params):
+        """Build the ``data`` field for a request."""
+        if endpoint == "label/__name__/values":
+            return [f"metric_{i}" for i in range(self.series)]
+        if endpoint == "query_range":
+            start = float(params["start"][0])
+            end = float(params["end"][0])
+            step = float(params["step"][0])
+            count = int((end - start) // step) + 1
+            return {
+                "resultType": "matrix",
+                "result": [
+                    {
+                        "metric": {"__name__": "up", "instance": f"host-{i}:9100"},
+                        "values": [[start + n * step, str(n)] for n in range(count)],
+                    }
+                    for i in range(self.series)
+                ],
+            }
+        return {
+            "resultType": "vector",
+            "result": [
+                {"metric": {"__name__": "up", "instance": f"host-{i}:9100"}, "value": [time.time(), "1"]}
+                for i in range(self.series)
+            ],
+        }
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                endpoint = parsed.path.split("/api/v1/", 1)[-1]
+                params = parse_qs(parsed.query)
+                with fake._lock:
+                    fake.requests += 1
+                time.sleep(fake.response_delay(params))
+                body = json.dumps({"status": "success", "data": fake.build_data(endpoint, params)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
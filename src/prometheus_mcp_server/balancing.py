@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+import asyncio
+import itertools
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, TypeVar
+
+from prometheus_mcp_server.logging_config import get_logger
+
+T = TypeVar("T")
+
+logger = get_logger()
+
+# Ways of choosing the replica a request goes to
+LOAD_BALANCING_STRATEGIES = ("round_robin", "least_outstanding")
+
+def check_strategy(strategy: str) -> str:
+    """Return a load balancing strategy, checking that it is one of LOAD_BALANCING_STRATEGIES.
+
+    Raises:
+        ValueError: If the strategy is unknown
+    """
+    if strategy not in LOAD_BALANCING_STRATEGIES:
+        raise ValueError(f"Unknown load balancing strategy '{strategy}', "
+                         f"expected one of {', '.join(LOAD_BALANCING_STRATEGIES)}")
+    return strategy
+
+class ReplicaSet:
+    """Spreads requests over the replicas of one logical backend, such as an HA pair.
+
+    Each request goes to one replica, chosen round-robin or as the replica with
+    the fewest requests in flight. With hedging, a request that has not been
+    answered within the hedge quantile (p95 by default) of recent latencies is
+    sent to a second replica too, and the first response wins; the other
+    request is cancelled. Only requests slower than the quantile are hedged,
+    and at most max_hedge_ratio of all requests, so the extra load stays small.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        strategy: str = "round_robin",
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        min_samples: int = 20,
+        max_hedge_ratio: float = 0.1,
+        window: int = 1000,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.urls: List[str] = list(dict.fromkeys(urls))
+        if not self.urls:
+            raise ValueError("A replica set needs at least one URL")
+        self.strategy = check_strategy(strategy)
+        self.hedge = hedge and len(self.urls) > 1
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self._clock = clock
+        self._turn = itertools.count()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._hedge_delay: Optional[float] = None
+        self._recorded = 0
+        self.outstanding: Dict[str, int] = {url: 0 for url in self.urls}
+        self.requests: Dict[str, int] = {url: 0 for url in self.urls}
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def pick(self, exclude: Iterable[str] = ()) -> str:
+        """Choose the replica for the next request, avoiding excluded ones where possible."""
+        excluded = set(exclude)
+        candidates = [url for url in self.urls if url not in excluded] or self.urls
+        if self.strategy == "least_outstanding":
+            # Ties rotate so idle replicas share the load
+            offset = next(self._turn)
+            order = candidates[offset % len(candidates):] + candidates[:offset % len(candidates)]
+            return min(order, key=lambda url: self.outstanding[url])
+        return candidates[next(self._turn) % len(candidates)]
+
+    def record_latency(self, seconds: float):
+        """Add the latency of an answered request to the window the hedge delay is derived from."""
+        self._latencies.append(seconds)
+        self._recorded += 1
+        # Recomputing the quantile on every request would sort the whole window each time
+        if self._hedge_delay is None or self._recorded % 10 == 0:
+            self._hedge_delay = self._quantile()
+
+    def _quantile(self) -> Optional[float]:
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(self.hedge_quantile * len(ordered)) - 1)]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Return how long to wait before hedging, or None if the next request must not be hedged."""
+        if not self.hedge or self._hedge_delay is None:
+            return None
+        if self.hedged >= self.calls * self.max_hedge_ratio:
+            return None
+        return self._hedge_delay
+
+    async def _send(self, url: str, fn: Callable[[str], Awaitable[T]]) -> T:
+        self.outstanding[url] += 1
+        self.requests[url] += 1
+        started = self._clock()
+        try:
+            result = await fn(url)
+        finally:
+            self.outstanding[url] -= 1
+        self.record_latency(self._clock() - started)
+        return result
+
+    async def call(self, fn: Callable[[str], Awaitable[T]]) -> T:
+        """Send a request to one replica, hedging it to a second replica if it is slow.
+
+        Args:
+            fn: Coroutine function sending the request to the given replica URL
+
+        Returns:
+            The first successful response, or the error of the last replica to fail
+        """
+        self.calls += 1
+        first_url = self.pick()
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._send(first_url, fn)
+
+        first = asyncio.ensure_future(self._send(first_url, fn))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+            second_url = self.pick(exclude={first_url})
+            self.hedged += 1
+            logger.debug("Hedging slow Prometheus request", replica=second_url, slow_replica=first_url,
+                         delay=round(delay, 3))
+            tasks.append(asyncio.ensure_future(self._send(second_url, fn)))
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    if winner is not first:
+                        self.hedge_wins += 1
+                    return winner.result()
+                if not pending:
+                    # Both failed; report the error of the one that failed last
+                    return next(iter(done)).result()
+        finally:
+            # The slower request is no longer needed, and neither are both if the caller gave up
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark the losing request's error as handled
+                    task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-replica load and hedging counters."""
+        return {
+            "strategy": self.strategy,
+            "replicas": [
+                {"url": url, "requests": self.requests[url], "outstanding": self.outstanding[url]}
+                for url in self.urls
+            ],
+            "hedging": self.hedge,
+            "hedgeDelay": round(self._hedge_delay, 4) if self.hedge and self._hedge_delay is not None else None,
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedgeWins": self.hedge_wins,
+        }
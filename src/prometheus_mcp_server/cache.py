@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+
+import asyncio
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+from prometheus_mcp_server.matrix import count_samples, merge_matrix_results, slice_matrix_result
+
+T = TypeVar("T")
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+class ResultCache:
+    """In-process LRU cache bounded by total size in bytes, with per-entry TTL.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Look up a key, returning None on a miss or if the entry has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def size_of(self, key: Hashable) -> Optional[int]:
+        """Return the size of an unexpired entry, or None, without counting a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= self._clock():
+                return None
+            return entry.size
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: float):
+        """Store a value, evicting least recently used entries to stay within max_bytes.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            size: Approximate size of the value in bytes
+            ttl: Time to live in seconds
+        """
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(value, size, self._clock() + ttl)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and current usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+
+
+class ResultStore:
+    """Holds tool results under opaque handles so later pages are served without re-querying.
+
+    Entries expire after a fixed TTL and are evicted least recently used
+    first to keep the total size bounded. Stored values are shared between
+    callers and must be treated as read-only.
+
+    A value stored under a key, such as the request it came from, replaces
+    the previous value of that key under the same handle, so repeating a
+    request does not store a duplicate.
+    """
+
+    def __init__(self, max_bytes: int, clock: Callable[[], float] = time.monotonic):
+        self._cache = ResultCache(max_bytes, clock=clock)
+        self._handles: Dict[Hashable, str] = {}
+
+    def put(self, value: Any, size: int, ttl: float, key: Optional[Hashable] = None) -> Optional[str]:
+        """Store a value under a new handle, or under the handle of its key if it is still stored.
+
+        Args:
+            value: Value to store
+            size: Approximate size of the value in bytes
+            ttl: Time to live in seconds
+            key: Key identifying what the value is a result of, if any
+
+        Returns:
+            The handle, or None if the value is too large to store or storing is disabled
+        """
+        if ttl <= 0 or size > self._cache.max_bytes:
+            return None
+        handle = self.handle_for(key) if key is not None else None
+        if handle is None:
+            handle = secrets.token_urlsafe(12)
+        self._cache.set(handle, value, size, ttl)
+        if key is not None:
+            # Forget handles that expired or were evicted, once they outnumber the stored values
+            if len(self._handles) >= 2 * len(self._cache):
+                self._handles = {k: h for k, h in self._handles.items() if self._cache.size_of(h) is not None}
+            self._handles[key] = handle
+        return handle
+
+    def handle_for(self, key: Hashable) -> Optional[str]:
+        """Return the handle a key's value is stored under, or None if it is no longer stored."""
+        handle = self._handles.get(key)
+        if handle is None or self._cache.size_of(handle) is None:
+            return None
+        return handle
+
+    def get(self, handle: str) -> Optional[Any]:
+        """Look up a handle, returning None if it is unknown, expired or evicted."""
+        return self._cache.get(handle)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        self._cache.clear()
+        self._handles.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return store counters and current usage."""
+        return self._cache.stats()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+@dataclass
+class _Extent:
+    start_ms: int
+    end_ms: int
+    result: List[Dict[str, Any]]
+    samples: int
+
+
+@dataclass
+class _ExtentSet:
+    step_ms: int
+    extents: List[_Extent] = field(default_factory=list)
+    samples: int = 0
+
+
+def _to_ms(timestamp: float) -> int:
+    return int(round(timestamp * 1000))
+
+
+class ExtentCache:
+    """Cache of range query samples, stored as time extents on a step grid.
+
+    Each key identifies a query evaluated on one grid (query, step and the
+    start offset within a step). Extents on the same grid never overlap:
+    adjacent or overlapping extents are merged as they are added. Keys are
+    evicted least recently used first to keep the total sample count bounded.
+    """
+
+    def __init__(self, max_samples: int):
+        self.max_samples = max_samples
+        self._sets: "OrderedDict[Hashable, _ExtentSet]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_samples = 0
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def missing_ranges(self, key: Hashable, start: float, end: float, step: float) -> List[Tuple[float, float]]:
+        """Find the grid-aligned sub-ranges of [start, end] not covered by cached extents.
+
+        Args:
+            key: Cache key for the query and grid
+            start: Start of the range in Unix seconds, on the grid
+            end: End of the range in Unix seconds
+            step: Step width in seconds
+
+        Returns:
+            List of (start, end) ranges to fetch, in time order
+        """
+        start_ms, end_ms, step_ms = _to_ms(start), _to_ms(end), _to_ms(step)
+        gaps = []
+        with self._lock:
+            extent_set = self._sets.get(key)
+            cursor = start_ms
+            if extent_set is not None:
+                self._sets.move_to_end(key)
+                for extent in extent_set.extents:
+                    if extent.end_ms < cursor:
+                        continue
+                    if extent.start_ms > end_ms:
+                        break
+                    if extent.start_ms > cursor:
+                        gaps.append((cursor, extent.start_ms - step_ms))
+                    cursor = max(cursor, extent.end_ms + step_ms)
+            if cursor <= end_ms:
+                gaps.append((cursor, end_ms))
+
+            if not gaps:
+                self.hits += 1
+            elif gaps == [(start_ms, end_ms)]:
+                self.misses += 1
+            else:
+                self.partial_hits += 1
+        return [(gap_start / 1000, gap_end / 1000) for gap_start, gap_end in gaps]
+
+    def get(self, key: Hashable, start: float, end: float) -> List[Dict[str, Any]]:
+        """Return the cached samples within [start, end] as a matrix result."""
+        start_ms, end_ms = _to_ms(start), _to_ms(end)
+        with self._lock:
+            extent_set = self._sets.get(key)
+            if extent_set is None:
+                return []
+            overlapping = [
+                extent.result for extent in extent_set.extents
+                if extent.end_ms >= start_ms and extent.start_ms <= end_ms
+            ]
+        return slice_matrix_result(merge_matrix_results(overlapping), start, end)
+
+    def add(self, key: Hashable, start: float, end: float, step: float, result: List[Dict[str, Any]]):
+        """Store the samples of a fetched range, merging with adjacent or overlapping extents.
+
+        Args:
+            key: Cache key for the query and grid
+            start: Start of the fetched range in Unix seconds, on the grid
+            end: End of the fetched range in Unix seconds
+            step: Step width in seconds
+            result: Matrix result for the range
+        """
+        if self.max_samples <= 0 or end < start:
+            return
+        start_ms, end_ms, step_ms = _to_ms(start), _to_ms(end), _to_ms(step)
+        result = slice_matrix_result(result, start, end)
+        new_extent = _Extent(start_ms, end_ms, result, count_samples(result))
+        if new_extent.samples > self.max_samples:
+            return
+
+        with self._lock:
+            extent_set = self._sets.get(key)
+            if extent_set is None:
+                extent_set = self._sets[key] = _ExtentSet(step_ms=step_ms)
+            self._sets.move_to_end(key)
+
+            kept = []
+            merge = [new_extent]
+            for extent in extent_set.extents:
+                if extent.start_ms <= end_ms + step_ms and extent.end_ms >= start_ms - step_ms:
+                    merge.append(extent)
+                else:
+                    kept.append(extent)
+            if len(merge) > 1:
+                merged_result = merge_matrix_results(extent.result for extent in merge)
+                new_extent = _Extent(
+                    min(extent.start_ms for extent in merge),
+                    max(extent.end_ms for extent in merge),
+                    merged_result,
+                    count_samples(merged_result),
+                )
+            kept.append(new_extent)
+            kept.sort(key=lambda extent: extent.start_ms)
+
+            previous_samples = extent_set.samples
+            extent_set.extents = kept
+            extent_set.samples = sum(extent.samples for extent in kept)
+            self.current_samples += extent_set.samples - previous_samples
+
+            while self.current_samples > self.max_samples and self._sets:
+                oldest_key, oldest = self._sets.popitem(last=False)
+                self.current_samples -= oldest.samples
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all extents and reset the counters."""
+        with self._lock:
+            self._sets.clear()
+            self.current_samples = 0
+            self.hits = self.partial_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and current usage."""
+        with self._lock:
+            return {
+                "queries": len(self._sets),
+                "samples": self.current_samples,
+                "maxSamples": self.max_samples,
+                "hits": self.hits,
+                "partialHits": self.partial_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+@dataclass
+class _Flight:
+    task: "asyncio.Future[Any]"
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single execution.
+
+    While a call for a key is in flight, later callers with the same key wait
+    for it and receive the same result (or exception) instead of starting
+    their own. Results are shared and must be treated as read-only.
+
+    A cancelled caller does not cancel the call for the others, but once every
+    caller waiting on a call has been cancelled, the call itself is cancelled
+    so abandoned work stops.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn for key, or join the call already in flight for it.
+
+        Args:
+            key: Identity of the call
+            fn: Coroutine function performing the call
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda done: self._forget(key, done))
+        flight.waiters += 1
+        try:
+            # Shield the shared call so one cancelled caller does not cancel the others
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # The last caller gave up; stop the call and let new callers start afresh
+                self.cancelled += 1
+                self._forget(key, flight.task)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def in_flight(self) -> int:
+        """Return the number of distinct calls currently in flight."""
+        return len(self._in_flight)
+
+    def clear(self):
+        """Reset the counters. Calls already in flight are not affected."""
+        self.calls = self.coalesced = self.cancelled = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "inFlight": len(self._in_flight),
+        }
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]"):
+        flight = self._in_flight.get(key)
+        if flight is not None and flight.task is task:
+            del self._in_flight[key]
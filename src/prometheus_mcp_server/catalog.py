@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+import bisect
+import re
+import time
+from array import array
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from prometheus_mcp_server.logging_config import get_logger
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+logger = get_logger()
+
+def required_literal(pattern: str) -> Optional[str]:
+    """Find the longest literal that every match of a regex must contain.
+
+    Only literal runs at the top level of the pattern are considered, so the
+    result is conservative: None means no literal could be proven.
+
+    Args:
+        pattern: Regular expression
+
+    Returns:
+        Required literal, or None
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return None
+    if parsed.state.flags & (re.IGNORECASE | re.VERBOSE):
+        return None
+
+    best = ""
+    current = []
+    for op, value in parsed:
+        if op is _sre_parse.LITERAL:
+            current.append(chr(value))
+            continue
+        if len(current) > len(best):
+            best = "".join(current)
+        current = []
+    if len(current) > len(best):
+        best = "".join(current)
+    # Names are joined with newlines in the index, so such literals cannot be searched
+    if "\n" in best:
+        return None
+    return best or None
+
+class MetricCatalog:
+    """Sorted, compact index of metric names.
+
+    Names are kept in one sorted tuple. Prefix queries are answered with a
+    binary search, and regex or substring queries scan a single newline-joined
+    copy of the names for the pattern's required literal before verifying the
+    candidates. Recent query results are memoized so paging through the same
+    filter does not repeat the search.
+    """
+
+    _MEMO_SIZE = 32
+
+    def __init__(self, names: Iterable[str], source: Tuple[str, ...] = ()):
+        self.names = tuple(sorted(set(names)))
+        self.source = source
+        self.refreshed_at = time.monotonic()
+        self._blob = "\n".join(self.names)
+        # Offset of each name within the blob, for mapping matches back to names
+        self._offsets = array("q")
+        position = 0
+        for name in self.names:
+            self._offsets.append(position)
+            position += len(name) + 1
+        self._memo: "OrderedDict[Tuple[Optional[str], Optional[str]], List[str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def age(self) -> float:
+        """Seconds since the catalog was built."""
+        return time.monotonic() - self.refreshed_at
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Return the index range of names starting with prefix."""
+        low = bisect.bisect_left(self.names, prefix)
+        high = bisect.bisect_left(self.names, prefix + "\U0010ffff", lo=low)
+        return low, high
+
+    def containing(self, literal: str, low: int = 0, high: Optional[int] = None) -> List[int]:
+        """Return the indexes of names in [low, high) containing a literal substring."""
+        high = len(self.names) if high is None else high
+        if low >= high:
+            return []
+        indexes = []
+        blob_end = self._offsets[high - 1] + len(self.names[high - 1])
+        position = self._blob.find(literal, self._offsets[low], blob_end)
+        while position != -1:
+            index = bisect.bisect_right(self._offsets, position) - 1
+            indexes.append(index)
+            # Continue after the end of this name
+            position = self._blob.find(literal, self._offsets[index] + len(self.names[index]) + 1, blob_end)
+        return indexes
+
+    def search(self, prefix: Optional[str] = None, filter_pattern: Optional[str] = None) -> List[str]:
+        """Find metric names by prefix and/or regex pattern.
+
+        Matches the behavior of filter_metrics: an invalid regex is logged and ignored.
+
+        Args:
+            prefix: Prefix to filter metric names
+            filter_pattern: Regex pattern to match metric names
+
+        Returns:
+            Matching metric names in sorted order
+        """
+        memo_key = (prefix or None, filter_pattern or None)
+        if memo_key in self._memo:
+            self._memo.move_to_end(memo_key)
+            return self._memo[memo_key]
+
+        low, high = self.prefix_range(prefix) if prefix else (0, len(self.names))
+        matches = list(self.names[low:high])
+
+        if filter_pattern:
+            try:
+                pattern = re.compile(filter_pattern)
+            except re.error as e:
+                logger.warning("Invalid regex pattern", pattern=filter_pattern, error=str(e))
+                pattern = None
+            if pattern is not None:
+                literal = required_literal(filter_pattern)
+                if literal is not None:
+                    candidates = (self.names[i] for i in self.containing(literal, low, high))
+                else:
+                    candidates = iter(matches)
+                if literal is not None and re.escape(literal) == filter_pattern:
+                    matches = list(candidates)
+                else:
+                    matches = [name for name in candidates if pattern.search(name)]
+
+        self._memo[memo_key] = matches
+        if len(self._memo) > self._MEMO_SIZE:
+            self._memo.popitem(last=False)
+        return matches
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+import base64
+import binascii
+import bisect
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from prometheus_mcp_server.matrix import series_key
+
+def item_sort_key(item: Any) -> Any:
+    """Build the deterministic sort key of a paginated item.
+
+    Series (vector or matrix items) sort by their label set, scrape targets
+    by their labels and plain values such as metric names by themselves.
+    """
+    if isinstance(item, dict):
+        if "metric" in item:
+            return series_key(item["metric"])
+        if "labels" in item:
+            return series_key(item["labels"])
+        return json.dumps(item, sort_keys=True)
+    return item
+
+def sort_items(items: Sequence[Any]) -> Tuple[List[Any], List[Any]]:
+    """Sort items by their sort key.
+
+    Returns:
+        Tuple of the sorted items and their keys, in the same order
+    """
+    keyed = sorted(((item_sort_key(item), item) for item in items), key=lambda pair: pair[0])
+    return [item for _, item in keyed], [key for key, _ in keyed]
+
+def fingerprint(source: str, params: Dict[str, Any]) -> str:
+    """Identify the tool call a cursor belongs to, so it is not reused for a different query."""
+    text = json.dumps([source, params], sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Encode cursor state as an opaque URL-safe string."""
+    text = json.dumps(state, separators=(",", ":"))
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+def _as_tuples(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_as_tuples(part) for part in value)
+    return value
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict) or "q" not in state:
+        raise ValueError("Invalid cursor")
+    if "k" in state:
+        # JSON turns label set tuples into lists
+        state["k"] = _as_tuples(state["k"])
+    return state
+
+def resume_index(keys: Sequence[Any], state: Dict[str, Any]) -> int:
+    """Find where the page after a cursor starts, by binary search on the sorted keys.
+
+    The cursor records the last key returned and how many items with that
+    key had been returned, so pages neither skip nor repeat items even when
+    the result has changed between pages. Only items still carrying that key
+    are skipped, so nothing is lost when the last key returned has gone.
+    """
+    if "k" not in state:
+        return 0
+    try:
+        start = bisect.bisect_left(keys, state["k"])
+        equal = bisect.bisect_right(keys, state["k"]) - start
+    except TypeError:
+        raise ValueError("Cursor does not match this result")
+    return start + min(state.get("n", 0), equal)
+
+def next_cursor_state(keys: Sequence[Any], end: int, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build the cursor state for the page starting at index end, or None if there is none."""
+    if end >= len(keys):
+        return None
+    last_key = keys[end - 1]
+    return {**state, "k": last_key, "n": end - bisect.bisect_left(keys, last_key)}
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+from functools import reduce
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from prometheus_mcp_server.matrix import SeriesKey, series_key
+
+# Penalty in seconds applied to the other replica before a sample interval is known
+INITIAL_PENALTY = 5.0
+
+# Smallest timestamp step, one millisecond
+_EPSILON = 0.001
+
+class _SampleCursor:
+    """Forward-only cursor over the samples of one series, with Seek semantics."""
+
+    def __init__(self, samples: Iterable[List[Any]]):
+        self._samples = iter(samples)
+        self.current: Optional[List[Any]] = None
+        self._exhausted = False
+        self._advance()
+
+    def _advance(self):
+        self.current = next(self._samples, None)
+        self._exhausted = self.current is None
+
+    def seek(self, timestamp: float) -> bool:
+        """Move to the first sample at or after timestamp; return False once the series is exhausted."""
+        while not self._exhausted and float(self.current[0]) < timestamp:
+            self._advance()
+        return not self._exhausted
+
+def dedup_samples(a: Iterable[List[Any]], b: Iterable[List[Any]]) -> Iterator[List[Any]]:
+    """Merge the samples of one series scraped by two replicas, Thanos style.
+
+    Both inputs are consumed lazily. Samples are taken from one replica while
+    it has data; the other replica is penalized by twice the last sample
+    interval, so switching to it only happens across a real gap in the first
+    one and does not raise the sample rate. When a replica runs out, the other
+    continues.
+
+    Args:
+        a: Samples of the preferred replica, in time order
+        b: Samples of the other replica, in time order
+
+    Yields:
+        Deduplicated samples in time order
+    """
+    cursor_a = _SampleCursor(a)
+    cursor_b = _SampleCursor(b)
+    last: Optional[float] = None
+    penalty_a = penalty_b = 0.0
+    while True:
+        a_ok = cursor_a.seek(float("-inf") if last is None else last + _EPSILON + penalty_a)
+        b_ok = cursor_b.seek(float("-inf") if last is None else last + _EPSILON + penalty_b)
+        if not a_ok and not b_ok:
+            return
+        if not a_ok or not b_ok:
+            cursor = cursor_a if a_ok else cursor_b
+            penalty_a = penalty_b = 0.0
+            last = float(cursor.current[0])
+            yield cursor.current
+            continue
+
+        time_a = float(cursor_a.current[0])
+        time_b = float(cursor_b.current[0])
+        if time_a <= time_b:
+            penalty_b = INITIAL_PENALTY if last is None else 2 * (time_a - last)
+            penalty_a = 0.0
+            last = time_a
+            yield cursor_a.current
+        else:
+            penalty_a = INITIAL_PENALTY if last is None else 2 * (time_b - last)
+            penalty_b = 0.0
+            last = time_b
+            yield cursor_b.current
+
+def _group_replicas(result: List[Dict[str, Any]], replica_label: str) -> Dict[SeriesKey, List[Dict[str, Any]]]:
+    """Group series by their labels without the replica label, each group sorted by replica."""
+    groups: Dict[SeriesKey, List[Dict[str, Any]]] = {}
+    for series in result:
+        metric = {name: value for name, value in series["metric"].items() if name != replica_label}
+        groups.setdefault(series_key(metric), []).append(series)
+    for replicas in groups.values():
+        replicas.sort(key=lambda series: series["metric"].get(replica_label, ""))
+    return groups
+
+def _without_label(metric: Dict[str, str], label: str) -> Dict[str, str]:
+    return {name: value for name, value in metric.items() if name != label}
+
+def dedup_matrix_result(result: List[Dict[str, Any]], replica_label: str) -> List[Dict[str, Any]]:
+    """Deduplicate the series of a matrix result that differ only by the replica label.
+
+    Each group of replicas is merged series by series with dedup_samples,
+    pairwise in order of the replica label value; the replica label is removed.
+
+    Args:
+        result: Matrix result
+        replica_label: Name of the label telling replicas apart
+
+    Returns:
+        Deduplicated matrix result, in order of each series' first appearance
+    """
+    deduplicated = []
+    for replicas in _group_replicas(result, replica_label).values():
+        metric = _without_label(replicas[0]["metric"], replica_label)
+        if len(replicas) == 1:
+            values = replicas[0]["values"]
+        else:
+            values = list(reduce(dedup_samples, (series["values"] for series in replicas)))
+        deduplicated.append({"metric": metric, "values": values})
+    return deduplicated
+
+def dedup_vector_result(result: List[Dict[str, Any]], replica_label: str) -> List[Dict[str, Any]]:
+    """Deduplicate the samples of a vector result that differ only by the replica label.
+
+    Of each group of replicas, the most recent sample is kept (the first replica
+    on a tie) and the replica label is removed.
+    """
+    deduplicated = []
+    for replicas in _group_replicas(result, replica_label).values():
+        chosen = max(replicas, key=lambda series: float(series["value"][0]))
+        deduplicated.append({**chosen, "metric": _without_label(chosen["metric"], replica_label)})
+    return deduplicated
+
+def deduplicate_replicas(data: Any, replica_label: str) -> Any:
+    """Deduplicate HA replicas in the data field of a query response.
+
+    Data without series carrying the replica label is returned unchanged.
+
+    Args:
+        data: Data field of an instant or range query response
+        replica_label: Name of the label telling replicas apart; empty disables deduplication
+
+    Returns:
+        Data with each group of replica series merged into one
+    """
+    if not replica_label or not isinstance(data, dict) or data.get("resultType") not in ("vector", "matrix"):
+        return data
+    if not any(replica_label in series["metric"] for series in data["result"]):
+        return data
+    if data["resultType"] == "matrix":
+        return {**data, "result": dedup_matrix_result(data["result"], replica_label)}
+    return {**data, "result": dedup_vector_result(data["result"], replica_label)}
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+DOWNSAMPLE_METHOD = "minmax"
+
+def minmax_indexes(timestamps: np.ndarray, values: np.ndarray, max_points: int) -> np.ndarray:
+    """Pick the samples to keep when reducing a series with min/max bucketing.
+
+    The time span of the series is cut into max_points // 2 equal buckets and
+    the lowest and highest sample of each bucket are kept, so spikes and dips
+    survive the reduction. NaN samples are only kept for buckets that have
+    nothing else.
+
+    Args:
+        timestamps: Sample timestamps in ascending order
+        values: Sample values
+        max_points: Maximum number of samples to keep, at least 2
+
+    Returns:
+        Sorted indexes of the samples to keep
+    """
+    count = len(timestamps)
+    if count <= max_points:
+        return np.arange(count)
+    buckets = max_points // 2
+    span = timestamps[-1] - timestamps[0]
+    if span > 0:
+        bucket_ids = np.minimum(((timestamps - timestamps[0]) / span * buckets).astype(np.int64), buckets - 1)
+    else:
+        bucket_ids = np.arange(count) * buckets // count
+
+    nan = np.isnan(values)
+    # Sort by bucket, then value; the first entry of each bucket is its minimum
+    by_min = np.lexsort((np.where(nan, np.inf, values), bucket_ids))
+    by_max = np.lexsort((np.where(nan, -np.inf, values), bucket_ids))
+    sorted_ids = bucket_ids[by_min]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    ends = np.r_[starts[1:], count] - 1
+    return np.unique(np.concatenate((by_min[starts], by_max[ends])))
+
+def downsample_matrix_result(result: List[Dict[str, Any]], max_points: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Reduce every series of a matrix result to at most max_points samples.
+
+    Kept samples are returned unchanged, so the result is still a regular
+    matrix on the original step grid.
+
+    Args:
+        result: Matrix result (list of series with "metric" and "values")
+        max_points: Maximum number of samples per series
+
+    Returns:
+        Tuple of the downsampled result and metadata describing the reduction
+
+    Raises:
+        ValueError: If max_points is less than 2
+    """
+    if max_points < 2:
+        raise ValueError("max_points must be at least 2")
+
+    downsampled = []
+    original_points = 0
+    returned_points = 0
+    reduced_series = 0
+    for series in result:
+        samples = series["values"]
+        original_points += len(samples)
+        if len(samples) > max_points:
+            timestamps = np.fromiter((sample[0] for sample in samples), dtype=np.float64, count=len(samples))
+            values = np.array([sample[1] for sample in samples], dtype=np.float64)
+            samples = [samples[i] for i in minmax_indexes(timestamps, values, max_points).tolist()]
+            series = {"metric": series["metric"], "values": samples}
+            reduced_series += 1
+        returned_points += len(samples)
+        downsampled.append(series)
+
+    return downsampled, {
+        "method": DOWNSAMPLE_METHOD,
+        "maxPoints": max_points,
+        "reducedSeries": reduced_series,
+        "originalPoints": original_points,
+        "returnedPoints": returned_points,
+    }
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+import json
+from typing import Any, Dict, List
+
+def tag_series(series: List[Dict[str, Any]], label: str, origin: str, field: str = "metric") -> List[Dict[str, Any]]:
+    """Copy series, setting the origin label in each label set.
+
+    Args:
+        series: Series (or targets) holding their label set under field
+        label: Name of the origin label; an existing label of that name is replaced
+        origin: Backend the series came from
+        field: Key of the label set in each item
+
+    Returns:
+        Tagged copies; the input, which may be cached, is left unchanged
+    """
+    return [{**item, field: {**item.get(field, {}), label: origin}} for item in series]
+
+def _merge_lists(lists: List[List[Any]]) -> List[Any]:
+    """Union of lists, sorted when the items are plain values, otherwise in order of first appearance."""
+    items = [item for items in lists for item in items]
+    if all(isinstance(item, str) for item in items):
+        return sorted(set(items))
+    seen = set()
+    merged = []
+    for item in items:
+        key = json.dumps(item, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            merged.append(item)
+    return merged
+
+def merge_backend_data(data_by_backend: Dict[str, Any], label: str) -> Any:
+    """Merge the data field of one request answered by several backends.
+
+    Vector and matrix series and scrape targets are concatenated, each tagged
+    with the backend it came from. Scalar and string results become a vector
+    with one sample per backend. Lists such as label values are merged into
+    their union, and other objects (e.g. metadata) key by key.
+
+    Args:
+        data_by_backend: Data field of each backend's response, by backend name
+        label: Name of the label identifying the backend
+
+    Returns:
+        Merged data field, in the shape of a single backend's response
+    """
+    values = list(data_by_backend.values())
+    first = values[0]
+    if isinstance(first, list):
+        return _merge_lists(values)
+    if not isinstance(first, dict):
+        return first
+
+    if "resultType" in first:
+        result_type = first["resultType"]
+        merged: List[Dict[str, Any]] = []
+        for origin, data in data_by_backend.items():
+            if data["resultType"] in ("vector", "matrix"):
+                merged.extend(tag_series(data["result"], label, origin))
+            else:
+                merged.append({"metric": {label: origin}, "value": data["result"]})
+                result_type = "vector"
+        return {"resultType": result_type, "result": merged}
+
+    if "activeTargets" in first or "droppedTargets" in first:
+        return {
+            "activeTargets": [target for origin, data in data_by_backend.items()
+                              for target in tag_series(data.get("activeTargets", []), label, origin, "labels")],
+            "droppedTargets": [target for origin, data in data_by_backend.items()
+                               for target in tag_series(data.get("droppedTargets", []), label, origin,
+                                                        "discoveredLabels")],
+        }
+
+    merged_dict: Dict[str, Any] = {}
+    for data in values:
+        for key, value in data.items():
+            if key not in merged_dict:
+                merged_dict[key] = value
+            elif isinstance(value, list) and isinstance(merged_dict[key], list):
+                merged_dict[key] = _merge_lists([merged_dict[key], value])
+    return merged_dict
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Name of the backend in use: "orjson" when installed, otherwise the stdlib "json"
+backend = "orjson" if orjson is not None else "json"
+
+def use_backend(name: str) -> str:
+    """Select the JSON backend.
+
+    Args:
+        name: "auto" (orjson if installed), "orjson" or "json"
+
+    Returns:
+        Name of the backend actually selected, which falls back to "json"
+        when orjson is requested but not installed
+    """
+    global backend
+    if name not in ("auto", "orjson", "json"):
+        raise ValueError(f"Unknown JSON backend '{name}', expected one of: auto, orjson, json")
+    backend = "orjson" if name in ("auto", "orjson") and orjson is not None else "json"
+    return backend
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document.
+
+    Raises:
+        json.JSONDecodeError: If the document is invalid (orjson's error subclasses it)
+    """
+    if backend == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any) -> str:
+    """Encode an object as compact JSON, stringifying values of unsupported types."""
+    if backend == "orjson":
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=str, separators=(",", ":"), ensure_ascii=False)
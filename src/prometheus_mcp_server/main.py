@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 import sys
 import dotenv
-from prometheus_mcp_server.server import mcp, config
+from prometheus_mcp_server.server import mcp, config, backends
 from prometheus_mcp_server.logging_config import setup_logging, get_logger
 
 # Initialize structured logging
@@ -13,7 +13,7 @@ def setup_environment():
     else:
         logger.info("Environment configuration loaded", source="environment variables", note="No .env file found")
 
-    if not config.url:
+    if not config.url and not backends:
         logger.error(
             "Missing required configuration",
             error="PROMETHEUS_URL environment variable is not set",
@@ -33,7 +33,9 @@ def setup_environment():
         "Prometheus configuration validated",
         server_url=config.url,
         authentication=auth_method,
-        org_id=config.org_id if config.org_id else None
+        org_id=config.org_id if config.org_id else None,
+        backends=list(backends) or None,
+        metrics_port=config.metrics_port or None
     )
     
     return True
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SeriesKey = Tuple[Tuple[str, str], ...]
+
+def series_key(metric: Dict[str, str]) -> SeriesKey:
+    """Build a hashable, order-independent key from a series label set."""
+    return tuple(sorted(metric.items()))
+
+def merge_matrix_results(results: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Merge several matrix results into one.
+
+    Samples of the same series are combined in time order. When more than one
+    result has a sample at the same timestamp, the first one wins.
+
+    Args:
+        results: Matrix results (lists of series with "metric" and "values")
+
+    Returns:
+        Merged matrix result, with series in order of first appearance
+    """
+    merged: Dict[SeriesKey, Dict[str, Any]] = {}
+    for result in results:
+        for series in result:
+            key = series_key(series["metric"])
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = {"metric": series["metric"], "values": list(series["values"])}
+            else:
+                existing["values"].extend(series["values"])
+
+    for series in merged.values():
+        values = series["values"]
+        values.sort(key=lambda sample: sample[0])
+        deduplicated = values[:1]
+        for sample in values[1:]:
+            if sample[0] != deduplicated[-1][0]:
+                deduplicated.append(sample)
+        series["values"] = deduplicated
+    return list(merged.values())
+
+def slice_matrix_result(result: List[Dict[str, Any]], start: float, end: float) -> List[Dict[str, Any]]:
+    """Keep only samples with start <= timestamp <= end, dropping series left empty.
+
+    Args:
+        result: Matrix result
+        start: Start of the time range in Unix seconds
+        end: End of the time range in Unix seconds
+
+    Returns:
+        Sliced matrix result
+    """
+    sliced = []
+    for series in result:
+        values = [sample for sample in series["values"] if start <= sample[0] <= end]
+        if values:
+            sliced.append({"metric": series["metric"], "values": values})
+    return sliced
+
+def count_samples(result: List[Dict[str, Any]]) -> int:
+    """Count the samples in a matrix result."""
+    return sum(len(series["values"]) for series in result)
+
+def split_range(start: float, end: float, step: float, interval: float) -> List[Tuple[float, float]]:
+    """Split the evaluation grid of a range query into consecutive shards.
+
+    The grid points start, start + step, ... up to end are partitioned at
+    multiples of interval (for example day boundaries), so every grid point
+    belongs to exactly one shard and no boundary sample is duplicated or lost.
+
+    Args:
+        start: Start of the range in Unix seconds
+        end: End of the range in Unix seconds
+        step: Step width in seconds
+        interval: Shard length in seconds
+
+    Returns:
+        List of (start, end) shards in time order
+    """
+    start_ms = int(round(start * 1000))
+    end_ms = int(round(end * 1000))
+    step_ms = int(round(step * 1000))
+    interval_ms = int(round(interval * 1000))
+    if step_ms <= 0 or interval_ms <= 0 or end_ms < start_ms:
+        return [(start, end)]
+    last_ms = start_ms + (end_ms - start_ms) // step_ms * step_ms
+
+    shards = []
+    shard_start = start_ms
+    while shard_start <= last_ms:
+        boundary = (shard_start // interval_ms + 1) * interval_ms
+        # Last grid point strictly before the next boundary, but at least one step
+        shard_end = shard_start + max(0, (boundary - 1 - shard_start) // step_ms) * step_ms
+        shard_end = min(shard_end, last_ms)
+        shards.append((shard_start / 1000, shard_end / 1000))
+        shard_start = shard_end + step_ms
+    return shards
+
+_NON_FINITE = {"NaN", "+Inf", "-Inf"}
+
+def common_labels(result: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Return the labels that have the same value in every series of a result."""
+    common: Dict[str, str] = dict(result[0]["metric"]) if result else {}
+    for series in result[1:]:
+        metric = series["metric"]
+        common = {name: value for name, value in common.items() if metric.get(name) == value}
+    return common
+
+def _compact_number(value: float):
+    """Return an int for integral values so they encode without a trailing '.0'."""
+    return int(value) if value.is_integer() else value
+
+def compact_matrix_result(result: List[Dict[str, Any]], start: float, step: float) -> Optional[Dict[str, Any]]:
+    """Encode a matrix result in a compact columnar form.
+
+    Labels shared by every series are lifted into "commonLabels". Each series
+    keeps only its remaining labels, the grid index of its first sample
+    ("offset"), the delta-encoded grid indexes of the following samples
+    ("deltas", left out when the series has no gaps) and its values as
+    numbers. Non-finite values stay as the strings "NaN", "+Inf" and "-Inf"
+    since JSON has no numbers for them. Sample i of the grid is at
+    start + i * step, where start is the earliest sample in the result.
+
+    Args:
+        result: Matrix result (list of series with "metric" and "values")
+        start: Start of the query range in Unix seconds, used for empty results
+        step: Step width in seconds
+
+    Returns:
+        Compact result, or None if a sample does not fall on the start/step grid
+    """
+    step_ms = int(round(step * 1000))
+    if step_ms <= 0:
+        return None
+    first_samples = [series["values"][0][0] for series in result if series["values"]]
+    start_ms = int(round(float(min(first_samples, key=float) if first_samples else start) * 1000))
+
+    common = common_labels(result)
+    compact_series = []
+    for series in result:
+        indexes = []
+        values = []
+        for timestamp, value in series["values"]:
+            index, remainder = divmod(int(round(float(timestamp) * 1000)) - start_ms, step_ms)
+            if remainder or index < 0:
+                return None
+            indexes.append(index)
+            values.append(value if value in _NON_FINITE else _compact_number(float(value)))
+
+        item: Dict[str, Any] = {
+            "labels": {name: value for name, value in series["metric"].items() if name not in common},
+            "offset": indexes[0] if indexes else 0,
+        }
+        deltas = [current - previous for previous, current in zip(indexes, indexes[1:])]
+        if any(delta != 1 for delta in deltas):
+            item["deltas"] = deltas
+        item["values"] = values
+        compact_series.append(item)
+
+    return {
+        "resultType": "compact_matrix",
+        "start": _compact_number(start_ms / 1000),
+        "step": _compact_number(step_ms / 1000),
+        "commonLabels": common,
+        "result": compact_series,
+    }
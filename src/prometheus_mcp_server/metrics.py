@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+
+import asyncio
+import math
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from prometheus_mcp_server.logging_config import get_logger
+
+logger = get_logger()
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram buckets for durations in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Histogram buckets for sizes in bytes, from 1 KiB to 64 MiB
+BYTES_BUCKETS = tuple(float(1024 * 4 ** power) for power in range(9))
+
+# Histogram buckets for event loop lag in seconds
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Seconds between event loop lag measurements
+LOOP_LAG_INTERVAL = 1.0
+
+LabelValues = Tuple[str, ...]
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class _Metric:
+    """Base of the metric types: a named family of samples keyed by label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {', '.join(self.labelnames) or '(none)'}, "
+                             f"got {', '.join(sorted(labels)) or '(none)'}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def expose(self) -> List[str]:
+        """Return the lines of this metric in the text exposition format."""
+        with self._lock:
+            samples = self._samples()
+        documentation = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        return [f"# HELP {self.name} {documentation}", f"# TYPE {self.name} {self.kind}", *samples]
+
+    def clear(self):
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """A value that only goes up, such as a number of calls."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Add amount to the counter of the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Return the current value for the given label values."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+class Gauge(Counter):
+    """A value that can go up and down, such as a hit ratio."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        """Set the gauge of the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    """Counts observations, such as latencies, in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count per bucket (the last one is +Inf), sum and count
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels):
+        """Record one observation for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        """Return the number of observations for the given label values."""
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        bucket_labels = (*self.labelnames, "le")
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, (*key, _format_value(bound)))} "
+                             f"{cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+class MetricsRegistry:
+    """The metrics of this server, rendered in the Prometheus text exposition format.
+
+    Metrics updated as things happen are registered once. Values that other
+    components already count, such as cache hits, are read at scrape time by
+    collectors, functions returning freshly filled metrics.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> Any:
+        """Register a metric and return it."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]):
+        """Add a function returning metrics to include in every scrape."""
+        self._collectors.append(collector)
+
+    def expose(self) -> str:
+        """Render all metrics in the text exposition format."""
+        metrics: List[_Metric] = list(self._metrics.values())
+        for collector in self._collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                logger.warning("Metrics collector failed", collector=getattr(collector, "__name__", repr(collector)),
+                               error=str(e))
+        return "".join(line + "\n" for metric in metrics for line in metric.expose())
+
+    def clear(self):
+        """Reset the values of all registered metrics."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+async def _handle_scrape(registry: MetricsRegistry, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        # Skip the headers; the request has no body
+        while (await reader.readline()).strip():
+            pass
+        method, path = (request_line + ["", ""])[:2]
+        if method in ("GET", "HEAD") and path.split("?")[0] in ("/", "/metrics"):
+            status, content_type, body = "200 OK", CONTENT_TYPE, registry.expose().encode()
+        else:
+            status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"Not found, try /metrics\n"
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1"))
+        if method != "HEAD":
+            writer.write(body)
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        logger.debug("Metrics scrape connection failed", error=str(e))
+    finally:
+        writer.close()
+
+async def serve_metrics(registry: MetricsRegistry, host: str, port: int) -> asyncio.AbstractServer:
+    """Serve the registry's metrics over HTTP at /metrics.
+
+    Args:
+        registry: Metrics to serve
+        host: Address to listen on
+        port: Port to listen on (0 picks a free one)
+
+    Returns:
+        The listening server; close it to stop serving
+    """
+    server = await asyncio.start_server(lambda reader, writer: _handle_scrape(registry, reader, writer), host, port)
+    logger.info("Serving metrics", host=host, port=server.sockets[0].getsockname()[1], path="/metrics")
+    return server
+
+async def monitor_event_loop_lag(histogram: Histogram, interval: float = LOOP_LAG_INTERVAL):
+    """Measure how late the event loop wakes up from a sleep, until cancelled.
+
+    The lag is how long callbacks wait behind blocking work, such as decoding a
+    large response, so it shows when the loop itself is the bottleneck.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        histogram.observe(max(0.0, loop.time() - expected))
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+
+import asyncio
+import random
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from prometheus_mcp_server.logging_config import get_logger
+
+T = TypeVar("T")
+
+logger = get_logger()
+
+# Responses that signal an overloaded or briefly unavailable backend
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+# Methods that may be sent again after the server has seen them
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Prometheus errorType values of queries that failed on their own, even when sent with a 503
+QUERY_ERROR_TYPES = ("timeout", "canceled", "execution")
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Parse a Retry-After header, given as seconds or an HTTP date, into seconds from now.
+
+    Returns:
+        Non-negative delay in seconds, or None if the header is missing or invalid
+    """
+    if value is None or not value.strip():
+        return None
+    text = value.strip()
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    current = time.time() if now is None else now
+    return max(0.0, moment.timestamp() - current)
+
+def prometheus_error_type(error: BaseException) -> Optional[str]:
+    """Return the errorType of a Prometheus error response, or None if there is none."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    try:
+        body = error.response.json()
+    except (httpx.ResponseNotRead, ValueError):
+        return None
+    return body.get("errorType") if isinstance(body, dict) else None
+
+def is_retryable(error: BaseException, method: str = "GET") -> bool:
+    """Decide whether a failed request may be sent again.
+
+    Connection failures are always safe to retry since the request never
+    reached the server. Overload responses (429, 502, 503, 504) and broken
+    connections are only retried for idempotent methods. Read timeouts are not
+    retried: the query would most likely time out again, adding more load. For
+    the same reason, neither are the 503 responses Prometheus sends when a
+    query timed out or was canceled.
+    """
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    if method.upper() not in IDEMPOTENT_METHODS:
+        return False
+    if isinstance(error, httpx.HTTPStatusError):
+        return (error.response.status_code in RETRYABLE_STATUS_CODES
+                and prometheus_error_type(error) not in QUERY_ERROR_TYPES)
+    if isinstance(error, httpx.TimeoutException):
+        return False
+    return isinstance(error, httpx.TransportError)
+
+class RetryPolicy:
+    """Retries failed requests with exponential backoff and full jitter.
+
+    The n-th retry waits a random delay between 0 and
+    min(max_delay, base_delay * 2 ** n), so clients that failed together do
+    not retry together. A Retry-After header on the response takes precedence.
+    Each call may make at most max_attempts attempts and spend at most budget
+    seconds waiting between them; once either is used up, the last error is
+    raised.
+
+    Counters are kept across calls, so the ratio of attempts to calls shows how
+    much load retries add.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        budget: float = 10.0,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self._sleep = sleep
+        self._rng = rng
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.retry_after = 0
+        self.exhausted = 0
+
+    def backoff(self, retry: int) -> float:
+        """Return the jittered delay before the given retry, counting from 0."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** retry)
+        return ceiling * self._rng()
+
+    async def call(self, fn: Callable[[], Awaitable[T]], method: str = "GET", description: str = "") -> T:
+        """Run fn, retrying it while it fails with a retryable error and budget remains.
+
+        Args:
+            fn: Coroutine function performing one attempt
+            method: HTTP method of the request, to decide whether retrying is safe
+            description: What is being called, for logging
+
+        Returns:
+            Result of the first successful attempt
+        """
+        self.calls += 1
+        waited = 0.0
+        attempt = 0
+        while True:
+            attempt += 1
+            self.attempts += 1
+            try:
+                return await fn()
+            except Exception as e:
+                if not is_retryable(e, method):
+                    raise
+                retry_after = None
+                if isinstance(e, httpx.HTTPStatusError):
+                    retry_after = parse_retry_after(e.response.headers.get("retry-after"))
+                delay = retry_after if retry_after is not None else self.backoff(attempt - 1)
+                if attempt >= self.max_attempts or waited + delay > self.budget:
+                    self.exhausted += 1
+                    logger.warning("Giving up retrying Prometheus request", target=description, attempts=attempt,
+                                   waited=round(waited, 3), next_delay=round(delay, 3), error=str(e))
+                    raise
+                if retry_after is not None:
+                    self.retry_after += 1
+                self.retries += 1
+                logger.info("Retrying Prometheus request", target=description, attempt=attempt + 1,
+                            delay=round(delay, 3), retry_after=retry_after is not None,
+                            error=str(e), error_type=type(e).__name__)
+                waited += delay
+                await self._sleep(delay)
+
+    def clear(self):
+        """Reset the counters."""
+        self.calls = self.attempts = self.retries = self.retry_after = self.exhausted = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return retry counters, including the average attempts per call."""
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "retryAfter": self.retry_after,
+            "exhausted": self.exhausted,
+            "amplification": round(self.attempts / self.calls, 3) if self.calls else 1.0,
+        }
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Decide whether an error means the backend is unhealthy, rather than the request being bad.
+
+    Connection errors, timeouts, 429 and 5xx responses count; query errors do
+    not, including the 503 Prometheus sends for a query that timed out, was
+    canceled or failed to execute.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return (status == 429 or status >= 500) and prometheus_error_type(error) not in QUERY_ERROR_TYPES
+    return isinstance(error, httpx.TransportError)
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """Fails requests fast while the backend keeps failing.
+
+    The breaker starts closed. After failure_threshold consecutive backend
+    failures it opens, and requests fail immediately with CircuitOpenError
+    instead of waiting for a timeout. Once reset_timeout has passed it is
+    half-open: a single probe request is let through while others keep
+    failing fast. The breaker closes if the probe succeeds and opens again if
+    it fails. A failure_threshold of 0 disables the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.consecutive_failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        """Return the current state, moving from open to half-open once the reset timeout has passed."""
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        log = logger.warning if state == self.OPEN else logger.info
+        log("Prometheus circuit breaker state changed", previous=self._state, state=state,
+            consecutive_failures=self.consecutive_failures, last_error=self.last_error)
+        self._state = state
+        if state == self.OPEN:
+            self._opened_at = self._clock()
+            self.opened += 1
+
+    def retry_in(self) -> float:
+        """Return the seconds until an open breaker lets a probe through."""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def _reject(self):
+        self.rejected += 1
+        raise CircuitOpenError(
+            f"Prometheus is unavailable: circuit breaker open after {self.consecutive_failures} consecutive "
+            f"failures (last error: {self.last_error}); retry in {self.retry_in():.0f}s"
+        )
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn unless the breaker is open, recording whether the backend failed.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a probe already running
+        """
+        if self.failure_threshold <= 0:
+            return await fn()
+        state = self.state
+        probe = state == self.HALF_OPEN
+        if state == self.OPEN or (probe and self._probing):
+            self._reject()
+        if probe:
+            self._probing = True
+        try:
+            result = await fn()
+        except Exception as e:
+            if is_backend_failure(e):
+                self.record_failure(e)
+            elif probe:
+                # The backend answered, so it is healthy even though the request was rejected
+                self.record_success()
+            raise
+        else:
+            self.record_success()
+            return result
+        finally:
+            if probe:
+                self._probing = False
+
+    def record_success(self):
+        """Record a response from the backend, closing the breaker."""
+        self.consecutive_failures = 0
+        self._transition(self.CLOSED)
+
+    def record_failure(self, error: BaseException):
+        """Record a backend failure, opening the breaker at the threshold or after a failed probe.
+
+        Failures of requests that were already in flight when the breaker
+        opened are ignored, so they do not push the reset timeout back.
+        """
+        if self._state == self.OPEN:
+            return
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self._state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+
+    def reset(self):
+        """Close the breaker and reset the counters."""
+        self._state = self.CLOSED
+        self._probing = False
+        self.consecutive_failures = self.opened = self.rejected = 0
+        self.last_error = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the breaker state and counters."""
+        state = self.state
+        return {
+            "state": state,
+            "consecutiveFailures": self.consecutive_failures,
+            "failureThreshold": self.failure_threshold,
+            "retryIn": round(self.retry_in(), 3),
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "lastError": self.last_error,
+        }
@@ -1,33 +1,174 @@
 #!/usr/bin/env python
 
 import os
+import asyncio
+import functools
+import inspect
 import json
+import math
 import re
-from typing import Any, Dict, List, Optional, Union
-from dataclasses import dataclass
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, replace
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
 import dotenv
-import requests
+import httpx
 from mcp.server.fastmcp import FastMCP
+from mcp.types import TextContent
+from prometheus_mcp_server import json_codec
+from prometheus_mcp_server.balancing import ReplicaSet, check_strategy
+from prometheus_mcp_server.cache import ExtentCache, ResultCache, ResultStore, SingleFlight
+from prometheus_mcp_server.catalog import MetricCatalog
+from prometheus_mcp_server.cursor import (
+    decode_cursor,
+    encode_cursor,
+    fingerprint,
+    next_cursor_state,
+    resume_index,
+    sort_items,
+)
+from prometheus_mcp_server.dedup import deduplicate_replicas
+from prometheus_mcp_server.downsample import downsample_matrix_result
+from prometheus_mcp_server.federation import merge_backend_data
 from prometheus_mcp_server.logging_config import get_logger
+from prometheus_mcp_server.matrix import compact_matrix_result, merge_matrix_results, split_range
+from prometheus_mcp_server.metrics import (
+    BYTES_BUCKETS,
+    LAG_BUCKETS,
+    Counter,
+    Gauge,
+    MetricsRegistry,
+    monitor_event_loop_lag,
+    serve_metrics,
+)
+from prometheus_mcp_server.resilience import CircuitBreaker, RetryPolicy
+from prometheus_mcp_server.streaming import ResultWindow, parse_windowed_response
+from prometheus_mcp_server.summary import summarize_matrix_result
+from prometheus_mcp_server.timing import current_timing, start_timing, stop_timing, timed, timed_phase
+from prometheus_mcp_server.timeutils import format_timestamp, is_historical, nice_step, parse_duration, parse_timestamp
 
 dotenv.load_dotenv()
-mcp = FastMCP("Prometheus MCP")
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP):
+    """Run background refreshes and release shared resources such as pooled connections on shutdown."""
+    background = []
+    if config.metric_catalog_refresh_interval > 0:
+        background.append(asyncio.create_task(_refresh_metric_catalog_periodically()))
+    metrics_server = None
+    if config.metrics_port > 0:
+        try:
+            metrics_server = await serve_metrics(metrics_registry, config.metrics_host, config.metrics_port)
+            background.append(asyncio.create_task(monitor_event_loop_lag(event_loop_lag)))
+        except OSError as e:
+            logger.error("Failed to serve metrics", host=config.metrics_host, port=config.metrics_port, error=str(e))
+    try:
+        yield {}
+    finally:
+        for task in background:
+            task.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
+        await close_http_client()
+
+mcp = FastMCP("Prometheus MCP", lifespan=server_lifespan)
 
 # Get logger instance
 logger = get_logger()
 
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to a default."""
+    value = os.environ.get(name, "")
+    return int(value) if value.strip() else default
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float environment variable, falling back to a default."""
+    value = os.environ.get(name, "")
+    return float(value) if value.strip() else default
+
+def _env_duration(name: str, default: float) -> float:
+    """Read a duration environment variable such as '1d' or '3600', falling back to a default."""
+    value = os.environ.get(name, "")
+    return parse_duration(value) if value.strip() else default
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable, falling back to a default."""
+    value = os.environ.get(name, "")
+    if not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 @dataclass
 class PrometheusConfig:
     url: str
+    # Name of the backend, when more than one Prometheus server is configured
+    name: str = "default"
+    # URLs of further replicas serving the same data as url, such as the other half of an HA pair
+    replicas: Tuple[str, ...] = ()
+    # How requests are spread over the replicas: "round_robin" or "least_outstanding"
+    load_balancing: str = "round_robin"
+    # Hedging: resend slow reads to a second replica after the hedge_quantile latency
+    hedge_requests: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_max_ratio: float = 0.1
+    # Label telling HA replicas apart; series differing only by it are deduplicated (empty disables)
+    replica_label: str = ""
     # Optional credentials
     username: Optional[str] = None
     password: Optional[str] = None
     token: Optional[str] = None
     # Optional Org ID for multi-tenant setups
     org_id: Optional[str] = None
+    # Connection pool settings
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    # HTTP timeouts in seconds
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    # Retry settings: attempts per request, backoff bounds and total backoff per request (seconds)
+    retry_max_attempts: int = 3
+    retry_base_delay: float = 0.2
+    retry_max_delay: float = 5.0
+    retry_budget: float = 10.0
+    # Circuit breaker: consecutive failures that open it (0 disables) and seconds before a probe
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30.0
+    # Result cache settings (TTLs in seconds)
+    cache_ttl: float = 10.0
+    cache_historical_ttl: float = 3600.0
+    cache_recent_window: float = 300.0
+    cache_max_bytes: int = 64 * 1024 * 1024
+    # Range query extent cache settings
+    range_cache_max_samples: int = 1_000_000
+    align_range_queries: bool = False
+    # Range query splitting settings
+    range_split_interval: float = 86400.0
+    range_max_parallel: int = 8
+    # Maximum number of queries of one execute_queries batch running at once
+    batch_max_parallel: int = 8
+    # Seconds between metric catalog refreshes (0 fetches on every call)
+    metric_catalog_refresh_interval: float = 60.0
+    # Paginated responses larger than this (or of unknown length) are parsed incrementally
+    stream_threshold_bytes: int = 8 * 1024 * 1024
+    # JSON backend: "auto" (orjson if installed), "orjson" or "json"
+    json_backend: str = "auto"
+    # Result store settings: paginated results with at least min_items items are kept under a handle
+    result_store_ttl: float = 300.0
+    result_store_max_bytes: int = 64 * 1024 * 1024
+    result_store_min_items: int = 100
+    # Backend queried when a tool call names none (empty: "default", or the first of PROMETHEUS_BACKENDS)
+    default_backend: str = ""
+    # Label added to series merged from several backends, naming the backend each came from
+    backend_label: str = "backend"
+    # Local port serving the server's own metrics in the Prometheus text format (0 disables)
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
 
 config = PrometheusConfig(
     url=os.environ.get("PROMETHEUS_URL", ""),
@@ -35,42 +176,718 @@ config = PrometheusConfig(
     password=os.environ.get("PROMETHEUS_PASSWORD", ""),
     token=os.environ.get("PROMETHEUS_TOKEN", ""),
     org_id=os.environ.get("ORG_ID", ""),
+    replicas=tuple(url.strip() for url in os.environ.get("PROMETHEUS_REPLICAS", "").split(",") if url.strip()),
+    load_balancing=os.environ.get("PROMETHEUS_LOAD_BALANCING", "round_robin"),
+    hedge_requests=_env_bool("PROMETHEUS_HEDGE_REQUESTS", False),
+    hedge_quantile=_env_float("PROMETHEUS_HEDGE_QUANTILE", 0.95),
+    hedge_min_samples=_env_int("PROMETHEUS_HEDGE_MIN_SAMPLES", 20),
+    hedge_max_ratio=_env_float("PROMETHEUS_HEDGE_MAX_RATIO", 0.1),
+    replica_label=os.environ.get("PROMETHEUS_REPLICA_LABEL", ""),
+    max_connections=_env_int("PROMETHEUS_MAX_CONNECTIONS", 100),
+    max_keepalive_connections=_env_int("PROMETHEUS_MAX_KEEPALIVE_CONNECTIONS", 20),
+    keepalive_expiry=_env_float("PROMETHEUS_KEEPALIVE_EXPIRY", 30.0),
+    http2=_env_bool("PROMETHEUS_HTTP2", False),
+    connect_timeout=_env_duration("PROMETHEUS_CONNECT_TIMEOUT", 5.0),
+    read_timeout=_env_duration("PROMETHEUS_READ_TIMEOUT", 60.0),
+    retry_max_attempts=_env_int("PROMETHEUS_RETRY_MAX_ATTEMPTS", 3),
+    retry_base_delay=_env_duration("PROMETHEUS_RETRY_BASE_DELAY", 0.2),
+    retry_max_delay=_env_duration("PROMETHEUS_RETRY_MAX_DELAY", 5.0),
+    retry_budget=_env_duration("PROMETHEUS_RETRY_BUDGET", 10.0),
+    circuit_failure_threshold=_env_int("PROMETHEUS_CIRCUIT_FAILURE_THRESHOLD", 5),
+    circuit_reset_timeout=_env_duration("PROMETHEUS_CIRCUIT_RESET_TIMEOUT", 30.0),
+    cache_ttl=_env_float("PROMETHEUS_CACHE_TTL", 10.0),
+    cache_historical_ttl=_env_float("PROMETHEUS_CACHE_HISTORICAL_TTL", 3600.0),
+    cache_recent_window=_env_float("PROMETHEUS_CACHE_RECENT_WINDOW", 300.0),
+    cache_max_bytes=_env_int("PROMETHEUS_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+    range_cache_max_samples=_env_int("PROMETHEUS_RANGE_CACHE_MAX_SAMPLES", 1_000_000),
+    align_range_queries=_env_bool("PROMETHEUS_RANGE_ALIGN", False),
+    range_split_interval=_env_duration("PROMETHEUS_RANGE_SPLIT_INTERVAL", 86400.0),
+    range_max_parallel=_env_int("PROMETHEUS_RANGE_MAX_PARALLEL", 8),
+    batch_max_parallel=_env_int("PROMETHEUS_BATCH_MAX_PARALLEL", 8),
+    metric_catalog_refresh_interval=_env_duration("PROMETHEUS_METRIC_CATALOG_REFRESH", 60.0),
+    stream_threshold_bytes=_env_int("PROMETHEUS_STREAM_THRESHOLD_BYTES", 8 * 1024 * 1024),
+    json_backend=os.environ.get("PROMETHEUS_JSON_BACKEND", "auto"),
+    result_store_ttl=_env_duration("PROMETHEUS_RESULT_STORE_TTL", 300.0),
+    result_store_max_bytes=_env_int("PROMETHEUS_RESULT_STORE_MAX_BYTES", 64 * 1024 * 1024),
+    result_store_min_items=_env_int("PROMETHEUS_RESULT_STORE_MIN_ITEMS", 100),
+    default_backend=os.environ.get("PROMETHEUS_DEFAULT_BACKEND", ""),
+    backend_label=os.environ.get("PROMETHEUS_BACKEND_LABEL", "backend"),
+    metrics_port=_env_int("PROMETHEUS_MCP_METRICS_PORT", 0),
+    metrics_host=os.environ.get("PROMETHEUS_MCP_METRICS_HOST", "127.0.0.1"),
+)
+
+# Name of the backend configured by PROMETHEUS_URL and friends
+DEFAULT_BACKEND = "default"
+
+# Backend selector that fans a tool call out to every configured backend
+ALL_BACKENDS = "all"
+
+# Settings a backend never inherits from the default backend
+_BACKEND_OWN_FIELDS = ("url", "replicas", "username", "password", "token", "org_id")
+
+# Settings applied per backend; the others, such as retries and caches, are shared by all backends
+_BACKEND_FIELDS = _BACKEND_OWN_FIELDS + (
+    "max_connections",
+    "max_keepalive_connections",
+    "keepalive_expiry",
+    "http2",
+    "connect_timeout",
+    "read_timeout",
+    "load_balancing",
+    "hedge_requests",
+    "hedge_quantile",
+    "hedge_min_samples",
+    "hedge_max_ratio",
+    "circuit_failure_threshold",
+    "circuit_reset_timeout",
+)
+
+def load_backends(text: str, base: PrometheusConfig) -> Dict[str, PrometheusConfig]:
+    """Parse additional Prometheus backends from JSON.
+
+    The JSON is an object mapping backend names to settings, or a list of
+    settings objects with a "name". Settings are the PrometheusConfig fields
+    applied per backend: url, replicas, credentials, org_id, connection pool,
+    timeout, load balancing, hedging and circuit breaker settings. Unset
+    fields other than replicas, credentials and org ID are taken from base.
+
+    Args:
+        text: JSON text, empty for no additional backends
+        base: Configuration of the default backend
+
+    Returns:
+        Backend configurations by name, in the order given
+
+    Raises:
+        ValueError: If the JSON is invalid, a backend has no URL, or a name, setting or load balancing
+            strategy is not allowed
+    """
+    if not text.strip():
+        return {}
+    entries = json.loads(text)
+    if isinstance(entries, list):
+        entries = {entry.get("name", ""): {k: v for k, v in entry.items() if k != "name"} for entry in entries}
+    allowed = set(_BACKEND_FIELDS)
+    loaded = {}
+    for name, settings in entries.items():
+        if not name or name in (DEFAULT_BACKEND, ALL_BACKENDS) or "," in name:
+            raise ValueError(f"Invalid Prometheus backend name '{name}'")
+        unknown = set(settings) - allowed
+        if unknown:
+            raise ValueError(f"Unknown settings for Prometheus backend '{name}': {', '.join(sorted(unknown))}")
+        if not settings.get("url"):
+            raise ValueError(f"Prometheus backend '{name}' has no url")
+        own = {field: settings.get(field) for field in _BACKEND_OWN_FIELDS}
+        own["replicas"] = tuple(settings.get("replicas") or ())
+        loaded[name] = replace(base, **{**settings, **own, "name": name})
+        try:
+            check_strategy(loaded[name].load_balancing)
+        except ValueError as e:
+            raise ValueError(f"Prometheus backend '{name}': {e}") from None
+    return loaded
+
+# An unknown strategy fails at startup rather than on the first request
+check_strategy(config.load_balancing)
+
+# Additional Prometheus backends, selectable by name in every tool
+backends = load_backends(os.environ.get("PROMETHEUS_BACKENDS", ""), config)
+
+json_codec.use_backend(config.json_backend)
+
+# Endpoints whose results are cached by make_prometheus_request
+CACHEABLE_ENDPOINTS = ("query", "query_range")
+
+# Request parameters that only control how a request runs, not what it returns
+REQUEST_OPTION_PARAMS = ("timeout",)
+
+# Seconds the client waits beyond a per-call timeout, for Prometheus to report its own timeout error
+TIMEOUT_GRACE = 1.0
+
+# Shared cache of query results, bounded by total response size
+result_cache = ResultCache(max_bytes=config.cache_max_bytes)
+
+# Coalesces identical concurrent requests into one upstream call
+request_coalescer = SingleFlight()
+
+# Retries requests that fail because Prometheus is overloaded or unreachable
+retry_policy = RetryPolicy(
+    max_attempts=config.retry_max_attempts,
+    base_delay=config.retry_base_delay,
+    max_delay=config.retry_max_delay,
+    budget=config.retry_budget,
 )
 
+# Fails requests fast while Prometheus keeps failing
+circuit_breaker = CircuitBreaker(
+    failure_threshold=config.circuit_failure_threshold,
+    reset_timeout=config.circuit_reset_timeout,
+)
+
+# HTTP clients and circuit breakers of the additional backends, created on first use
+_backend_clients: Dict[str, httpx.AsyncClient] = {}
+_backend_breakers: Dict[str, CircuitBreaker] = {}
+
+# Replica sets spreading each backend's requests over its replicas, created on first use
+_replica_sets: Dict[str, ReplicaSet] = {}
+
+# Backends the current tool call queries; None selects the default backend
+_backend_selection: ContextVar[Optional[Tuple[str, ...]]] = ContextVar("backend_selection", default=None)
+
+# Errors of backends that failed during a fan-out, reported alongside the other backends' results
+_backend_errors: ContextVar[Optional[Dict[str, str]]] = ContextVar("backend_errors", default=None)
+
+# Data and response size in bytes of the last Prometheus response of the current tool call
+_last_response: ContextVar[Optional[Tuple[Any, int]]] = ContextVar("last_response", default=None)
+
+# Shared cache of range query samples, so sliding windows only fetch new sub-ranges
+extent_cache = ExtentCache(max_samples=config.range_cache_max_samples)
+
+# Large paginated results, kept under handles so get_result_page can serve further pages
+result_store = ResultStore(max_bytes=config.result_store_max_bytes)
+
+# Indexed snapshots of metric names used by list_metrics, per backend selection, built on first use
+metric_catalogs: Dict[Tuple[str, ...], MetricCatalog] = {}
+
+# The server's own metrics, served on PROMETHEUS_MCP_METRICS_PORT
+metrics_registry = MetricsRegistry()
+tool_calls = metrics_registry.counter(
+    "prometheus_mcp_tool_calls_total", "Tool calls by tool and outcome", ("tool", "status"))
+tool_duration = metrics_registry.histogram(
+    "prometheus_mcp_tool_duration_seconds", "Time to answer a tool call, including encoding", ("tool",))
+tool_encode_duration = metrics_registry.histogram(
+    "prometheus_mcp_tool_encode_duration_seconds", "Time to encode tool results as JSON", ("tool",))
+tool_response_bytes = metrics_registry.histogram(
+    "prometheus_mcp_tool_response_bytes", "Size of encoded tool results", ("tool",), buckets=BYTES_BUCKETS)
+upstream_duration = metrics_registry.histogram(
+    "prometheus_mcp_upstream_request_duration_seconds",
+    "Time waiting for Prometheus requests, until the response is read", ("backend", "endpoint", "code"))
+upstream_decode_duration = metrics_registry.histogram(
+    "prometheus_mcp_upstream_decode_duration_seconds", "Time to decode Prometheus responses",
+    ("backend", "endpoint"))
+upstream_response_bytes = metrics_registry.histogram(
+    "prometheus_mcp_upstream_response_bytes", "Size of Prometheus responses", ("backend", "endpoint"),
+    buckets=BYTES_BUCKETS)
+event_loop_lag = metrics_registry.histogram(
+    "prometheus_mcp_event_loop_lag_seconds", "How late the event loop runs a timer", buckets=LAG_BUCKETS)
+
+def collect_component_metrics() -> List[Counter]:
+    """Read the counters of the caches, coalescer and retry policy for a scrape."""
+    hits = Counter("prometheus_mcp_cache_hits_total", "Cache lookups answered from the cache", ("cache",))
+    misses = Counter("prometheus_mcp_cache_misses_total", "Cache lookups not answered from the cache", ("cache",))
+    hit_ratio = Gauge("prometheus_mcp_cache_hit_ratio", "Share of cache lookups answered from the cache", ("cache",))
+    cache_bytes = Gauge("prometheus_mcp_cache_size_bytes", "Bytes held by the cache", ("cache",))
+    for name, cache in (("result", result_cache), ("result_store", result_store)):
+        stats = cache.stats()
+        hits.inc(stats["hits"], cache=name)
+        misses.inc(stats["misses"], cache=name)
+        hit_ratio.set(stats["hitRatio"], cache=name)
+        cache_bytes.set(stats["bytes"], cache=name)
+    stats = extent_cache.stats()
+    # A partial hit only fetches the missing sub-ranges, so it counts as a hit
+    extent_hits = stats["hits"] + stats["partialHits"]
+    hits.inc(extent_hits, cache="extent")
+    misses.inc(stats["misses"], cache="extent")
+    lookups = extent_hits + stats["misses"]
+    hit_ratio.set(extent_hits / lookups if lookups else 0.0, cache="extent")
+
+    coalescer = request_coalescer.stats()
+    requests = Counter("prometheus_mcp_coalescer_calls_total", "Upstream requests asked for, before coalescing")
+    requests.inc(coalescer["calls"])
+    coalesced = Counter("prometheus_mcp_coalesced_requests_total",
+                        "Requests answered by an identical request already in flight")
+    coalesced.inc(coalescer["coalesced"])
+    in_flight = Gauge("prometheus_mcp_requests_in_flight", "Distinct upstream requests in flight")
+    in_flight.set(coalescer["inFlight"])
+
+    retries = retry_policy.stats()
+    attempts = Counter("prometheus_mcp_upstream_attempts_total", "Upstream request attempts, including retries")
+    attempts.inc(retries["attempts"])
+    retried = Counter("prometheus_mcp_upstream_retries_total", "Upstream requests retried")
+    retried.inc(retries["retries"])
+    exhausted = Counter("prometheus_mcp_upstream_retries_exhausted_total",
+                        "Upstream requests that failed after all retries")
+    exhausted.inc(retries["exhausted"])
+    return [hits, misses, hit_ratio, cache_bytes, requests, coalesced, in_flight, attempts, retried, exhausted]
+
+metrics_registry.add_collector(collect_component_metrics)
+
+# Range queries using these modifiers depend on the requested range and cannot reuse extents
+_RANGE_DEPENDENT_PATTERN = re.compile(r"@\s*(start|end)\s*\(\s*\)")
+
+# Shared async HTTP client used by all tools, created lazily on first request
+_http_client: Optional[httpx.AsyncClient] = None
+
+def create_http_client(prometheus_config: PrometheusConfig) -> httpx.AsyncClient:
+    """Create a pooled async HTTP client from the connection pool settings.
+
+    Connections are kept alive between requests, so repeated tool calls reuse
+    the same TCP connections and TLS sessions instead of handshaking each time.
+
+    Args:
+        prometheus_config: Configuration holding the pool settings
+
+    Returns:
+        New async HTTP client
+    """
+    limits = httpx.Limits(
+        max_connections=prometheus_config.max_connections,
+        max_keepalive_connections=prometheus_config.max_keepalive_connections,
+        keepalive_expiry=prometheus_config.keepalive_expiry,
+    )
+    http2 = prometheus_config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1",
+                           suggestion="pip install 'prometheus_mcp_server[http2]'")
+            http2 = False
+    timeout = httpx.Timeout(prometheus_config.read_timeout, connect=prometheus_config.connect_timeout)
+    logger.debug("Creating HTTP client",
+                 max_connections=limits.max_connections,
+                 max_keepalive_connections=limits.max_keepalive_connections,
+                 keepalive_expiry=limits.keepalive_expiry,
+                 http2=http2,
+                 connect_timeout=timeout.connect,
+                 read_timeout=timeout.read)
+    return httpx.AsyncClient(limits=limits, http2=http2, timeout=timeout)
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client of the current backend, creating it on first use."""
+    global _http_client
+    name = selected_backends()[0]
+    if name != DEFAULT_BACKEND:
+        client = _backend_clients.get(name)
+        if client is None or client.is_closed:
+            client = _backend_clients[name] = create_http_client(backends[name])
+        return client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client(config)
+    return _http_client
+
+async def close_http_client():
+    """Close the shared HTTP clients of all backends and their pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        client, _http_client = _http_client, None
+        await client.aclose()
+        logger.info("HTTP client closed")
+    while _backend_clients:
+        name, client = _backend_clients.popitem()
+        await client.aclose()
+        logger.info("HTTP client closed", backend=name)
+
+def get_backend(name: str) -> PrometheusConfig:
+    """Get the configuration of a backend by name."""
+    return config if name == DEFAULT_BACKEND else backends[name]
+
+def backend_names() -> List[str]:
+    """List the configured backends, the default backend first if PROMETHEUS_URL is set."""
+    return ([DEFAULT_BACKEND] if config.url else []) + list(backends)
+
+def default_backend_name() -> str:
+    """Name of the backend queried when a tool call selects none."""
+    if config.default_backend:
+        return config.default_backend
+    return DEFAULT_BACKEND if config.url or not backends else next(iter(backends))
+
+def resolve_backends(selector: Optional[str]) -> Tuple[str, ...]:
+    """Resolve a backend selector: a backend name, a comma-separated list of names, or "all".
+
+    Raises:
+        ValueError: If a backend is unknown
+    """
+    if selector is None or not selector.strip():
+        return (default_backend_name(),)
+    if selector.strip() == ALL_BACKENDS:
+        names = backend_names()
+        return tuple(names) if names else (default_backend_name(),)
+    names = tuple(dict.fromkeys(name.strip() for name in selector.split(",") if name.strip()))
+    unknown = [name for name in names if name != DEFAULT_BACKEND and name not in backends]
+    if unknown:
+        raise ValueError(f"Unknown Prometheus backend: {', '.join(unknown)}. "
+                         f"Available backends: {', '.join(backend_names()) or 'none'}")
+    return names
+
+def selected_backends() -> Tuple[str, ...]:
+    """Backends the current tool call queries."""
+    return _backend_selection.get() or (default_backend_name(),)
+
+def backend_config() -> PrometheusConfig:
+    """Configuration of the backend the current request goes to."""
+    return get_backend(selected_backends()[0])
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get the circuit breaker of the current backend."""
+    name = selected_backends()[0]
+    if name == DEFAULT_BACKEND:
+        return circuit_breaker
+    breaker = _backend_breakers.get(name)
+    if breaker is None:
+        settings = backends[name]
+        breaker = _backend_breakers[name] = CircuitBreaker(
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_timeout=settings.circuit_reset_timeout,
+        )
+    return breaker
+
+def get_replica_set() -> ReplicaSet:
+    """Get the replica set of the current backend, rebuilding it if its URLs have changed."""
+    name = selected_backends()[0]
+    backend = get_backend(name)
+    urls = list(dict.fromkeys(url.rstrip('/') for url in (backend.url, *backend.replicas)))
+    replica_set = _replica_sets.get(name)
+    if replica_set is None or replica_set.urls != urls:
+        replica_set = _replica_sets[name] = ReplicaSet(
+            urls,
+            strategy=backend.load_balancing,
+            hedge=backend.hedge_requests,
+            hedge_quantile=backend.hedge_quantile,
+            min_samples=backend.hedge_min_samples,
+            max_hedge_ratio=backend.hedge_max_ratio,
+        )
+    return replica_set
+
+async def fan_out(fn: Callable[..., Awaitable[Any]], *args) -> Any:
+    """Run fn once per selected backend, concurrently, and merge the results.
+
+    Each run sees only its own backend as selected. Series are tagged with the
+    backend they came from. Backends that fail are recorded for the tool
+    result while the others still answer; if all fail, the first error is
+    raised.
+    """
+    names = selected_backends()
+
+    async def run_on(name: str) -> Any:
+        _backend_selection.set((name,))
+        return await fn(*args)
+
+    outcomes = await asyncio.gather(*(run_on(name) for name in names), return_exceptions=True)
+    succeeded = {name: outcome for name, outcome in zip(names, outcomes) if not isinstance(outcome, BaseException)}
+    failed = {name: outcome for name, outcome in zip(names, outcomes) if isinstance(outcome, BaseException)}
+    if not succeeded:
+        raise next(iter(failed.values()))
+    if failed:
+        logger.warning("Some Prometheus backends failed", failed=sorted(failed), succeeded=sorted(succeeded))
+        errors = _backend_errors.get()
+        if errors is not None:
+            errors.update({name: str(error) or type(error).__name__ for name, error in failed.items()})
+    # With the backend label as replica label, backends holding HA replicas merge into one series
+    return deduplicate_replicas(merge_backend_data(succeeded, config.backend_label), config.replica_label)
+
+def backend_selectable(fn):
+    """Add a `backend` parameter selecting the Prometheus backend(s) a tool queries.
+
+    The parameter takes a backend name, a comma-separated list of names or
+    "all". With several backends each request is sent to all of them
+    concurrently and the results are merged, tagging every series with the
+    backend label. Backends that failed are listed under "backendErrors" in the
+    result. Without the parameter, the backends selected by the calling tool
+    (or else the default backend) are used.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def selectable_tool(*args, backend: Optional[str] = None, **kwargs):
+        selection_token = _backend_selection.set(resolve_backends(backend)) if backend is not None else None
+        own_errors = backend is not None or _backend_errors.get() is None
+        errors_token = _backend_errors.set({}) if own_errors else None
+        try:
+            result = await fn(*args, **kwargs)
+            errors = _backend_errors.get()
+            if own_errors and errors and isinstance(result, dict):
+                result = {**result, "backendErrors": dict(errors)}
+            return result
+        finally:
+            if errors_token is not None:
+                _backend_errors.reset(errors_token)
+            if selection_token is not None:
+                _backend_selection.reset(selection_token)
+
+    backend_parameter = inspect.Parameter("backend", inspect.Parameter.KEYWORD_ONLY, default=None,
+                                          annotation=Optional[str])
+    selectable_tool.__signature__ = signature.replace(parameters=[*signature.parameters.values(), backend_parameter])
+    return selectable_tool
+
+def bounded_by_timeout(fn):
+    """Give a tool call with a `timeout` parameter one deadline for the whole call.
+
+    The timeout is sent to Prometheus with every request, but one call may
+    make several: range shards waiting for their turn, extent cache gaps, a
+    pushdown's second query and retries. The call as a whole must finish
+    within the timeout plus TIMEOUT_GRACE, or it is cancelled along with the
+    requests it is waiting for and raises TimeoutError.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def bounded_tool(*args, **kwargs):
+        timeout = signature.bind_partial(*args, **kwargs).arguments.get("timeout")
+        if not timeout:
+            return await fn(*args, **kwargs)
+        try:
+            return await asyncio.wait_for(fn(*args, **kwargs), parse_duration(timeout) + TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            logger.error("Tool call timed out", tool=fn.__name__, timeout=timeout)
+            raise TimeoutError(f"Query timed out after {timeout}")
+
+    return bounded_tool
+
+def mcp_tool(description: str):
+    """Register a function as an MCP tool whose result is encoded with the fast JSON codec.
+
+    The function itself is returned unchanged, so it can still be called
+    directly and returns plain Python objects. Calls through MCP are counted
+    and timed in the server's metrics.
+
+    The tool also gets a `debug_timing` parameter. When set, the result
+    includes "debugTiming": how long the call spent in each phase (network,
+    decode, pagination, compaction, downsampling, summary, encode), request
+    and byte counts, and Prometheus' own query statistics. Results that are
+    not objects are then returned under "result".
+    """
+    def decorator(fn):
+        tool = fn.__name__
+
+        @functools.wraps(fn)
+        async def encoded_tool(debug_timing: bool = False, **kwargs):
+            started = time.perf_counter()
+            status = "error"
+            timing_token = start_timing() if debug_timing else None
+            try:
+                result = await fn(**kwargs)
+                encode_started = time.perf_counter()
+                text = json_codec.dumps(result)
+                encode_seconds = time.perf_counter() - encode_started
+                tool_encode_duration.observe(encode_seconds, tool=tool)
+                tool_response_bytes.observe(len(text), tool=tool)
+                if timing_token is not None:
+                    timing = current_timing()
+                    timing.add("encode", encode_seconds)
+                    timing.count("resultBytes", len(text))
+                    # Encoded again to carry the report; resultBytes is the size without it
+                    result = result if isinstance(result, dict) else {"result": result}
+                    text = json_codec.dumps({**result, "debugTiming": timing.report()})
+                status = "success"
+                return TextContent(type="text", text=text)
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            finally:
+                if timing_token is not None:
+                    stop_timing(timing_token)
+                tool_calls.inc(tool=tool, status=status)
+                tool_duration.observe(time.perf_counter() - started, tool=tool)
+
+        # Expose the original parameters and debug_timing but no return type, so MCP sends the text as is
+        signature = inspect.signature(fn)
+        debug_parameter = inspect.Parameter("debug_timing", inspect.Parameter.KEYWORD_ONLY, default=False,
+                                            annotation=bool)
+        encoded_tool.__signature__ = signature.replace(parameters=[*signature.parameters.values(), debug_parameter],
+                                                       return_annotation=inspect.Signature.empty)
+        mcp.add_tool(encoded_tool, name=fn.__name__, description=description)
+        return fn
+    return decorator
+
 def get_prometheus_auth():
-    """Get authentication for Prometheus based on provided credentials."""
-    if config.token:
-        return {"Authorization": f"Bearer {config.token}"}
-    elif config.username and config.password:
-        return requests.auth.HTTPBasicAuth(config.username, config.password)
+    """Get authentication for the current backend based on its credentials."""
+    backend = backend_config()
+    if backend.token:
+        return {"Authorization": f"Bearer {backend.token}"}
+    elif backend.username and backend.password:
+        return httpx.BasicAuth(backend.username, backend.password)
     return None
 
-def make_prometheus_request(endpoint, params=None):
-    """Make a request to the Prometheus API with proper authentication and headers."""
-    if not config.url:
+def make_cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> tuple:
+    """Build a request key from the endpoint, normalized params and org ID, ignoring request options."""
+    normalized = tuple(sorted(
+        (key, str(value).strip()) for key, value in (params or {}).items() if key not in REQUEST_OPTION_PARAMS
+    ))
+    backend = backend_config()
+    return (backend.url.rstrip('/'), endpoint, normalized, backend.org_id or "")
+
+def get_result_cache_ttl(endpoint: str, params: Optional[Dict[str, Any]] = None) -> float:
+    """Get how long a result may be cached.
+
+    Results evaluated entirely in the past (a range query whose end, or an instant
+    query whose time, is older than the recent window) no longer change and are
+    kept for the historical TTL. Everything else is relative to "now" and uses the
+    short TTL.
+    """
+    params = params or {}
+    timestamp = params.get("end") if endpoint == "query_range" else params.get("time")
+    if is_historical(timestamp, config.cache_recent_window):
+        return config.cache_historical_ttl
+    return config.cache_ttl
+
+async def make_prometheus_request(endpoint, params=None, window: Optional[ResultWindow] = None):
+    """Make a request to the Prometheus API with proper authentication and headers.
+
+    The request is sent through the shared async HTTP client, so concurrent tool
+    calls overlap instead of blocking the event loop. Query results are served
+    from the result cache when an identical request was made recently, and
+    identical concurrent requests are coalesced into one upstream call.
+
+    When a window is given and the response is large, only the items inside the
+    window are kept while the body is parsed. The returned data then carries a
+    "window" field with the offset, limit and total item count; callers must
+    check for it, since a cached full result may be returned instead.
+
+    Requests failing with 429, 502, 503, 504 or a connection error are retried
+    with jittered exponential backoff, honouring Retry-After, within the retry
+    budget. Retries happen inside the coalesced call, so callers sharing a
+    request do not multiply them. After repeated failures the circuit breaker
+    opens and requests fail immediately with CircuitOpenError until a probe
+    request succeeds.
+
+    When the tool call selected several backends, the request is sent to all
+    of them concurrently and the results are merged (see fan_out); window is
+    then ignored.
+
+    With a replica label configured, query results are deduplicated across HA
+    replicas before they are cached, and window is ignored since a page could
+    otherwise split a group of replicas.
+
+    A "timeout" param is forwarded to Prometheus and also bounds how long this
+    call waits. If the caller is cancelled or times out and no other caller is
+    waiting for the same request, the HTTP request is cancelled.
+
+    Raises:
+        TimeoutError: If the response does not arrive within the timeout param
+        CircuitOpenError: If the circuit breaker is open
+    """
+    if len(selected_backends()) > 1:
+        return await fan_out(make_prometheus_request, endpoint, params)
+    if not backend_config().url:
         logger.error("Prometheus configuration missing", error="PROMETHEUS_URL not set")
         raise ValueError("Prometheus configuration is missing. Please set PROMETHEUS_URL environment variable.")
 
-    url = f"{config.url.rstrip('/')}/api/v1/{endpoint}"
+    if config.replica_label:
+        window = None
+    request_key = make_cache_key(endpoint, params)
+    cacheable = endpoint in CACHEABLE_ENDPOINTS
+    if cacheable:
+        cached = result_cache.get(request_key)
+        if cached is not None:
+            logger.debug("Prometheus result served from cache", endpoint=endpoint)
+            timing = current_timing()
+            if timing is not None:
+                timing.count("cacheHits")
+            _last_response.set((cached, result_cache.size_of(request_key) or 0))
+            return cached
+
+    async def fetch():
+        data, size = await retry_policy.call(
+            lambda: get_circuit_breaker().call(lambda: get_replica_set().call(
+                lambda url: _send_prometheus_request(endpoint, params, window, url)
+            )),
+            description=endpoint
+        )
+        if cacheable:
+            data = deduplicate_replicas(data, config.replica_label)
+        # A windowed result is incomplete and must not be cached
+        if cacheable and not (isinstance(data, dict) and "window" in data):
+            result_cache.set(request_key, data, size, get_result_cache_ttl(endpoint, params))
+        return data, size
+
+    # Identical requests already in flight share a single upstream call
+    timeout = (params or {}).get("timeout")
+    if timeout is None:
+        data, size = await request_coalescer.do((request_key, window), fetch)
+    else:
+        deadline = parse_duration(timeout) + TIMEOUT_GRACE
+        try:
+            data, size = await asyncio.wait_for(request_coalescer.do((request_key, window), fetch), deadline)
+        except asyncio.TimeoutError:
+            logger.error("Prometheus request timed out", endpoint=endpoint, timeout=timeout)
+            raise TimeoutError(f"Prometheus request timed out after {timeout}")
+    _last_response.set((data, size))
+    return data
+
+def response_size(value: Any) -> Optional[int]:
+    """Return the size in bytes of the Prometheus response a value came from.
+
+    Only the last response of the current tool call is known, and the value
+    must be its data or a field of it, such as the result of a query.
+
+    Returns:
+        The response size, or None if the value is not from that response
+    """
+    last = _last_response.get()
+    if last is None:
+        return None
+    data, size = last
+    if value is data or (isinstance(data, dict) and any(value is part for part in data.values())):
+        return size
+    return None
+
+async def _send_prometheus_request(endpoint, params=None, window: Optional[ResultWindow] = None,
+                                   base_url: Optional[str] = None):
+    """Send a request to Prometheus and return the data field and the response size in bytes.
+
+    The request goes to base_url, one of the backend's replicas, or else to the backend's url.
+    """
+    backend = backend_config()
+    url = f"{(base_url or backend.url).rstrip('/')}/api/v1/{endpoint}"
     auth = get_prometheus_auth()
     headers = {}
 
     if isinstance(auth, dict):  # Token auth is passed via headers
         headers.update(auth)
-        auth = None  # Clear auth for requests.get if it's already in headers
+        auth = None  # Clear auth for the client if it's already in headers
     
     # Add OrgID header if specified
-    if config.org_id:
-        headers["X-Scope-OrgID"] = config.org_id
+    if backend.org_id:
+        headers["X-Scope-OrgID"] = backend.org_id
 
+    # A timed call asks Prometheus for its query statistics too; the cache key is unaffected
+    timing = current_timing()
+    if timing is not None and endpoint in CACHEABLE_ENDPOINTS and window is None:
+        params = {**(params or {}), "stats": "all"}
+
+    metric_labels = {"backend": backend.name, "endpoint": endpoint}
+    started = time.perf_counter()
+    decode_seconds = 0.0
+    code = "error"
     try:
         logger.debug("Making Prometheus API request", endpoint=endpoint, url=url, params=params)
         
-        # Make the request with appropriate headers and auth
-        response = requests.get(url, params=params, auth=auth, headers=headers)
+        # A per-call timeout replaces the client's read timeout, leaving Prometheus time to report its own
+        request_options = {}
+        if params and params.get("timeout") is not None:
+            request_options["timeout"] = httpx.Timeout(parse_duration(params["timeout"]) + TIMEOUT_GRACE,
+                                                       connect=backend.connect_timeout)
         
-        response.raise_for_status()
-        result = response.json()
+        # Make the request with appropriate headers and auth
+        async with get_http_client().stream("GET", url, params=params, auth=auth, headers=headers,
+                                            **request_options) as response:
+            code = str(response.status_code)
+            if response.is_error:
+                # Read the error body, so retries can tell query timeouts from an overloaded server
+                await response.aread()
+            response.raise_for_status()
+            content_length = response.headers.get("content-length")
+            if window is not None and (content_length is None or int(content_length) > config.stream_threshold_bytes):
+                logger.debug("Parsing Prometheus response incrementally", endpoint=endpoint,
+                             offset=window.offset, limit=window.limit)
+                # Decoding is interleaved with reading here, so it is part of the request duration
+                result = await parse_windowed_response(response.aiter_bytes(), window)
+                size = response.num_bytes_downloaded
+            else:
+                body = await response.aread()
+                decode_started = time.perf_counter()
+                result = json_codec.loads(body)
+                decode_seconds = time.perf_counter() - decode_started
+                upstream_decode_duration.observe(decode_seconds, **metric_labels)
+                size = len(body)
+        upstream_response_bytes.observe(size, **metric_labels)
+        if timing is not None:
+            timing.count("upstreamRequests")
+            timing.count("upstreamBytes", size)
+            timing.add("decode", decode_seconds)
+            query_stats = result["data"].pop("stats", None) if isinstance(result.get("data"), dict) else None
+            if query_stats:
+                timing.add_query_stats(query_stats)
         
         if result["status"] != "success":
             error_msg = result.get('error', 'Unknown error')
@@ -83,9 +900,9 @@ def make_prometheus_request(endpoint, params=None):
         else:
             result_type = "list"
         logger.debug("Prometheus API request successful", endpoint=endpoint, result_type=result_type)
-        return result["data"]
+        return result["data"], size
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error("HTTP request to Prometheus failed", endpoint=endpoint, url=url, error=str(e), error_type=type(e).__name__)
         raise
     except json.JSONDecodeError as e:
@@ -94,7 +911,223 @@ def make_prometheus_request(endpoint, params=None):
     except Exception as e:
         logger.error("Unexpected error during Prometheus request", endpoint=endpoint, url=url, error=str(e), error_type=type(e).__name__)
         raise
+    finally:
+        network_seconds = time.perf_counter() - started - decode_seconds
+        upstream_duration.observe(network_seconds, code=code, **metric_labels)
+        if timing is not None:
+            timing.add("network", network_seconds)
+
+async def fetch_range_query(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute a range query, fetching only the sub-ranges missing from the extent cache.
+
+    Samples are cached per (query, step, grid offset). A repeated or slid window
+    is answered from cached extents plus requests for the uncovered sub-ranges,
+    which are then merged. Samples inside the recent window may still change and
+    are never cached. With align_range_queries, start and end are snapped to
+    multiples of step so that windows slid by arbitrary amounts share one grid.
+
+    Args:
+        params: query_range parameters (query, start, end, step)
+
+    Returns:
+        Data field of the range query response
+    """
+    if len(selected_backends()) > 1:
+        # Each backend keeps its own extents
+        return await fan_out(fetch_range_query, params)
+    try:
+        start = parse_timestamp(params["start"])
+        end = parse_timestamp(params["end"])
+        step = parse_duration(params["step"])
+    except ValueError:
+        return await make_prometheus_request("query_range", params=params)
+    if step <= 0 or end < start or _RANGE_DEPENDENT_PATTERN.search(params["query"]):
+        return await make_prometheus_request("query_range", params=params)
+    if config.range_cache_max_samples <= 0:
+        return await fetch_range_shards(params, start, end, step)
+
+    if config.align_range_queries:
+        start = math.floor(start / step) * step
+        end = math.floor(end / step) * step
+    else:
+        end = start + math.floor((end - start) / step) * step
+
+    backend = backend_config()
+    key = (backend.url.rstrip('/'), backend.org_id or "", params["query"].strip(), step, round(start % step, 3))
+    gaps = extent_cache.missing_ranges(key, start, end, step)
+    full_miss = len(gaps) == 1 and abs(gaps[0][0] - start) < 0.001 and abs(gaps[0][1] - end) < 0.001
+    cached = [] if full_miss else extent_cache.get(key, start, end)
+
+    if full_miss and not config.align_range_queries:
+        gap_params = [params]
+    else:
+        gap_params = [
+            {**params, "start": format_timestamp(gap_start), "end": format_timestamp(gap_end)}
+            for gap_start, gap_end in gaps
+        ]
+    logger.debug("Range query extent cache lookup", query=params["query"], missing_ranges=len(gaps), full_miss=full_miss)
+    fetched = await asyncio.gather(*(
+        fetch_range_shards(p, gap_start, gap_end, step)
+        for p, (gap_start, gap_end) in zip(gap_params, gaps)
+    ))
+
+    # Only cache samples old enough that they will not change any more
+    cacheable_until = time.time() - config.cache_recent_window
+    for (gap_start, gap_end), data in zip(gaps, fetched):
+        if data["resultType"] != "matrix":
+            return data
+        cache_end = min(gap_end, start + math.floor((cacheable_until - start) / step) * step)
+        extent_cache.add(key, gap_start, cache_end, step, data["result"])
+
+    if full_miss:
+        return fetched[0]
+    return {
+        "resultType": "matrix",
+        "result": merge_matrix_results([cached, *(data["result"] for data in fetched)])
+    }
+
+async def fetch_range_shards(params: Dict[str, Any], start: float, end: float, step: float) -> Dict[str, Any]:
+    """Execute a range query, splitting long ranges into shards fetched concurrently.
+
+    Ranges longer than range_split_interval are split at interval boundaries on
+    the step grid, at most range_max_parallel shards are in flight at once, and
+    the resulting matrices are stitched back together.
+
+    Args:
+        params: query_range parameters, sent unchanged if no split is needed
+        start: Start of the range in Unix seconds
+        end: End of the range in Unix seconds
+        step: Step width in seconds
+
+    Returns:
+        Data field of the range query response
+    """
+    interval = config.range_split_interval
+    if interval <= step or end - start <= interval:
+        return await make_prometheus_request("query_range", params=params)
+
+    shards = split_range(start, end, step, interval)
+    semaphore = asyncio.Semaphore(max(1, config.range_max_parallel))
+    logger.debug("Splitting range query", query=params["query"], shards=len(shards),
+                 max_parallel=config.range_max_parallel)
+
+    async def fetch_shard(shard_start: float, shard_end: float) -> Dict[str, Any]:
+        async with semaphore:
+            return await make_prometheus_request("query_range", params={
+                **params, "start": format_timestamp(shard_start), "end": format_timestamp(shard_end)
+            })
+
+    results = await asyncio.gather(*(fetch_shard(shard_start, shard_end) for shard_start, shard_end in shards))
+    for data in results:
+        if data["resultType"] != "matrix":
+            return data
+    return {
+        "resultType": "matrix",
+        "result": merge_matrix_results(data["result"] for data in results)
+    }
 
+def _metric_catalog_source() -> Tuple[Tuple[str, str], ...]:
+    """Identify the servers the selected backends point at, so a changed configuration rebuilds the catalog."""
+    return tuple(
+        (get_backend(name).url.rstrip('/'), get_backend(name).org_id or "") for name in selected_backends()
+    )
+
+async def refresh_metric_catalog() -> MetricCatalog:
+    """Fetch all metric names from the selected backends and rebuild their metric catalog."""
+    source = _metric_catalog_source()
+    names = await make_prometheus_request("label/__name__/values")
+    catalog = metric_catalogs[selected_backends()] = MetricCatalog(names, source=source)
+    logger.debug("Metric catalog refreshed", metrics=len(catalog), backends=selected_backends())
+    return catalog
+
+async def get_metric_catalog() -> MetricCatalog:
+    """Get the metric catalog of the selected backends, refreshing it if it is missing, stale or for another server."""
+    catalog = metric_catalogs.get(selected_backends())
+    source = _metric_catalog_source()
+    if (catalog is None or catalog.source != source
+            or catalog.age() >= config.metric_catalog_refresh_interval):
+        catalog = await refresh_metric_catalog()
+    return catalog
+
+async def _refresh_metric_catalog_periodically():
+    """Keep the metric catalogs fresh in the background once they have been used."""
+    while True:
+        await asyncio.sleep(config.metric_catalog_refresh_interval)
+        for selection in list(metric_catalogs):
+            token = _backend_selection.set(selection)
+            try:
+                await refresh_metric_catalog()
+            except Exception as e:
+                logger.warning("Background metric catalog refresh failed", backends=selection, error=str(e),
+                               error_type=type(e).__name__)
+            finally:
+                _backend_selection.reset(token)
+
+# Query rewrites used to push a result limit down to Prometheus
+PUSHDOWN_MODES = ("limitk", "topk", "native")
+
+async def execute_query_pushdown(params: Dict[str, Any], limit: int, offset: int, mode: str,
+                                 exact_total: bool = False):
+    """Execute an instant query with the page size pushed down to Prometheus.
+
+    Only the first offset + limit + 1 series are requested (the extra one tells
+    whether more results exist), either by wrapping the query in limitk/topk or
+    through Prometheus's native limit parameter. The total is only known when
+    fewer series come back. With exact_total, a count() of the original query
+    runs concurrently to report it; that evaluates the whole query a second
+    time. If Prometheus rejects the rewritten query, the full result is
+    fetched instead.
+
+    Args:
+        params: Instant query parameters
+        limit: Page size
+        offset: Number of series to skip
+        mode: One of PUSHDOWN_MODES
+        exact_total: Also count the series of the original query
+
+    Returns:
+        Tuple of the query data and a dict describing the pushdown
+        ("pushdown" mode actually used, "total" or None if unknown)
+    """
+    if mode not in PUSHDOWN_MODES:
+        raise ValueError(f"Unknown pushdown mode '{mode}', expected one of: {', '.join(PUSHDOWN_MODES)}")
+
+    fetch_count = offset + limit + 1
+    pushed_params = dict(params)
+    if mode == "native":
+        pushed_params["limit"] = str(fetch_count)
+    else:
+        pushed_params["query"] = f"{mode}({fetch_count}, ({params['query']}))"
+    requests = [make_prometheus_request("query", params=pushed_params)]
+    if exact_total:
+        requests.append(make_prometheus_request("query", params={**params, "query": f"count(({params['query']}))"}))
+
+    data, *counted = await asyncio.gather(*requests, return_exceptions=True)
+    # Prometheus rejects an unsupported rewrite with 400 (bad_data) or 422
+    rejected = isinstance(data, ValueError) or (
+        isinstance(data, httpx.HTTPStatusError) and data.response.status_code in (400, 422))
+    if rejected:
+        logger.warning("Limit pushdown rejected by Prometheus, falling back to client-side pagination",
+                       query=params["query"], mode=mode, error=str(data))
+        data = await make_prometheus_request("query", params=params)
+        return data, {"pushdown": None, "total": None}
+    if isinstance(data, BaseException):
+        raise data
+
+    if mode == "native" and isinstance(data["result"], list) and len(data["result"]) > fetch_count:
+        # The server ignored the limit parameter and returned everything
+        return data, {"pushdown": None, "total": None}
+
+    total = None
+    if isinstance(data["result"], list) and len(data["result"]) < fetch_count:
+        # Fewer series than requested came back, so this is all of them
+        total = len(data["result"])
+    elif counted and not isinstance(counted[0], BaseException) and counted[0]["resultType"] == "vector":
+        count_result = counted[0]["result"]
+        total = int(float(count_result[0]["value"][1])) if count_result else 0
+    return data, {"pushdown": mode, "total": total}
+
+@timed_phase("pagination")
 def apply_pagination(data: List[Any], limit: Optional[int] = None, offset: Optional[int] = None) -> Dict[str, Any]:
     """Apply pagination to a list of data.
     
@@ -128,6 +1161,218 @@ def apply_pagination(data: List[Any], limit: Optional[int] = None, offset: Optio
         }
     }
 
+@timed_phase("pagination")
+def paginate_result(data: Dict[str, Any], limit: Optional[int] = None, offset: Optional[int] = None) -> Dict[str, Any]:
+    """Paginate a query result, which may already have been windowed while streaming.
+    
+    Args:
+        data: Data field of a query response
+        limit: Maximum number of items to return
+        offset: Number of items to skip
+        
+    Returns:
+        Dictionary with paginated data and metadata, as returned by apply_pagination
+    """
+    window = data.get("window")
+    if window is None:
+        return apply_pagination(data["result"], limit=limit, offset=offset)
+    
+    items = data["result"]
+    return {
+        "data": items,
+        "metadata": {
+            "total": window["total"],
+            "offset": window["offset"],
+            "limit": window["limit"],
+            "returned": len(items),
+            "hasMore": window["limit"] is not None and window["offset"] + window["limit"] < window["total"]
+        }
+    }
+
+# Number of items encoded to estimate the size of a result without a known response size
+SIZE_SAMPLE_ITEMS = 16
+
+def _stored_result_key(source: str, params: Dict[str, Any], cursor_order: bool) -> Tuple[Any, ...]:
+    """Identify the request a stored result came from, including the backends it was sent to."""
+    request = {key: value for key, value in params.items() if key not in REQUEST_OPTION_PARAMS}
+    return source, fingerprint(source, request), selected_backends(), cursor_order
+
+def find_stored_result(
+    source: str,
+    params: Dict[str, Any],
+    origin: List[Any],
+    cursor_order: bool = False
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Find the handle and entry of a request's stored result, if it was stored from the same origin list.
+    
+    The origin is the list as the request returned it, so a result served
+    again from the result cache or the metric catalog is found, while a new
+    result of the request is not.
+    """
+    handle = result_store.handle_for(_stored_result_key(source, params, cursor_order))
+    entry = result_store.get(handle) if handle is not None else None
+    if entry is None or entry["origin"] is not origin:
+        return None
+    return handle, entry
+
+def store_result(
+    source: str,
+    params: Dict[str, Any],
+    items: List[Any],
+    result_type: Optional[str] = None,
+    keys: Optional[List[Any]] = None,
+    origin: Optional[List[Any]] = None
+) -> Optional[str]:
+    """Keep a complete paginated result under a handle so further pages need no new request.
+    
+    A request's result is stored once: the same result returned again keeps
+    its handle, and a new result of the request replaces the previous one
+    under the same handle. The size counted against the store is the size of
+    the Prometheus response when known, otherwise an estimate from a sample
+    of the items.
+    
+    Args:
+        source: Name of the tool that produced the result
+        params: Parameters identifying the request
+        items: Complete list of result items
+        result_type: Prometheus result type, for query results
+        keys: Cursor sort keys of the items, when they are sorted for cursor pagination
+        origin: List the items were taken from as the request returned it, if not items itself
+        
+    Returns:
+        Handle for get_result_page, or None if the result is too small or too large to store
+    """
+    if len(items) < config.result_store_min_items:
+        return None
+    origin = items if origin is None else origin
+    stored = find_stored_result(source, params, origin, keys is not None)
+    if stored is not None:
+        return stored[0]
+    size = response_size(origin)
+    if size is None:
+        sample = items[:SIZE_SAMPLE_ITEMS]
+        size = len(json_codec.dumps(sample)) * len(items) // len(sample)
+    entry = {"source": source, "resultType": result_type, "items": items, "keys": keys, "orders": {},
+             "origin": origin}
+    handle = result_store.put(entry, size, config.result_store_ttl,
+                              key=_stored_result_key(source, params, keys is not None))
+    if handle is not None:
+        logger.debug("Stored result", source=source, handle=handle, items=len(items), bytes=size)
+    return handle
+
+def _lookup_path(item: Any, path: str) -> Any:
+    """Follow a dotted path such as 'metric.instance' or 'value.1' into a result item."""
+    if not isinstance(item, (dict, list)):
+        # Plain items such as metric names are their own value
+        return item
+    value = item
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, list) and part.lstrip("-").isdigit() and -len(value) <= int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+    return value
+
+def _sort_value(value: Any) -> tuple:
+    """Sort key that orders numbers (including numeric strings) before other strings."""
+    if isinstance(value, list) and len(value) == 2:
+        # A [timestamp, value] sample sorts by its value
+        value = value[1]
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return (1, 0.0, str(value))
+    if math.isnan(number):
+        return (2, 0.0, "")
+    return (0, number, "")
+
+def sorted_stored_items(entry: Dict[str, Any], sort_by: str, descending: bool) -> List[Any]:
+    """Return the items of a stored result in sorted order, memoizing the order per sort.
+    
+    Items missing the sort field come last in either direction.
+    """
+    order_key = (sort_by, descending)
+    ordered = entry["orders"].get(order_key)
+    if ordered is None:
+        keyed = [(_lookup_path(item, sort_by), item) for item in entry["items"]]
+        present = [(_sort_value(value), item) for value, item in keyed if value is not None]
+        present.sort(key=lambda pair: pair[0], reverse=descending)
+        ordered = [item for _, item in present] + [item for value, item in keyed if value is None]
+        entry["orders"][order_key] = ordered
+    return ordered
+
+async def cursor_paginate(
+    source: str,
+    params: Dict[str, Any],
+    fetch: Callable[[], Awaitable[Tuple[Optional[str], Any]]],
+    limit: Optional[int],
+    cursor: Optional[str]
+) -> Dict[str, Any]:
+    """Paginate a result in deterministic label set order, resuming from an opaque cursor.
+    
+    The sorted result is kept in the result store, and the cursor carries its
+    handle, so later pages are served without a new request and start with a
+    binary search for the cursor key. If the handle has expired, the result is
+    fetched and sorted again and the page still resumes after the last key
+    returned, so no item is skipped or repeated.
+    
+    Args:
+        source: Name of the tool being paginated
+        params: Parameters identifying the call, checked against the cursor
+        fetch: Coroutine function returning the result type and the complete result
+        limit: Maximum number of items per page; defaults to the limit of the cursor
+        cursor: Cursor returned as nextCursor by the previous page, or empty for the first page
+        
+    Returns:
+        Dictionary with resultType and result, plus pagination metadata with nextCursor and
+        the handle when the result is a list
+        
+    Raises:
+        ValueError: If the cursor is invalid or belongs to a different query
+    """
+    call_id = fingerprint(source, {key: value for key, value in params.items() if key not in REQUEST_OPTION_PARAMS})
+    state = decode_cursor(cursor) if cursor else {"q": call_id}
+    if state["q"] != call_id:
+        raise ValueError("Cursor belongs to a different query")
+    limit = limit if limit is not None else state.get("l")
+    if limit is None or limit < 1:
+        raise ValueError("Cursor pagination needs a limit of at least 1")
+    
+    entry = result_store.get(state["h"]) if state.get("h") else None
+    if entry is not None and entry["keys"] is not None:
+        result_type, items, keys, handle = entry["resultType"], entry["items"], entry["keys"], state["h"]
+    else:
+        result_type, result = await fetch()
+        if not isinstance(result, list):
+            return {"resultType": result_type, "result": result}
+        stored = find_stored_result(source, params, result, cursor_order=True)
+        if stored is not None:
+            handle, entry = stored
+            items, keys = entry["items"], entry["keys"]
+        else:
+            with timed("pagination"):
+                items, keys = sort_items(result)
+                handle = store_result(source, params, items, result_type, keys=keys, origin=result)
+    
+    with timed("pagination"):
+        start = min(resume_index(keys, state), len(items))
+        end = min(start + limit, len(items))
+        next_state = next_cursor_state(keys, end, {"q": call_id, "l": limit, "h": handle})
+    pagination = {
+        "total": len(items),
+        "offset": start,
+        "limit": limit,
+        "returned": end - start,
+        "hasMore": next_state is not None,
+        "nextCursor": encode_cursor(next_state) if next_state is not None else None
+    }
+    result = {"resultType": result_type, "result": items[start:end], "pagination": pagination}
+    if handle is not None:
+        result["handle"] = handle
+    return result
+
 def filter_metrics(metrics: List[str], filter_pattern: Optional[str] = None, prefix: Optional[str] = None) -> List[str]:
     """Filter metric names by pattern or prefix.
     
@@ -154,6 +1399,7 @@ def filter_metrics(metrics: List[str], filter_pattern: Optional[str] = None, pre
     
     return filtered
 
+@timed_phase("compaction")
 def create_compact_query_result(result_data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a compact version of query results to reduce token usage.
     
@@ -184,22 +1430,60 @@ def create_compact_query_result(result_data: Dict[str, Any]) -> Dict[str, Any]:
         "result": compact_results
     }
 
-@mcp.tool(description="Execute a PromQL instant query against Prometheus with optional pagination and compact mode")
+@timed_phase("compaction")
+def create_compact_range_result(result_data: Dict[str, Any], start: str, step: str) -> Dict[str, Any]:
+    """Create a compact columnar version of range query results to reduce token usage.
+    
+    Args:
+        result_data: Original Prometheus range query result
+        start: Start time of the query
+        step: Step width of the query
+        
+    Returns:
+        Compacted result on a shared start/step grid, or the original result if it cannot be compacted
+    """
+    if result_data["resultType"] != "matrix":
+        return result_data
+    
+    compact = compact_matrix_result(result_data["result"], parse_timestamp(start), parse_duration(step))
+    if compact is None:
+        logger.warning("Range result is not on a regular step grid, returning it uncompacted")
+        return result_data
+    return compact
+
+@mcp_tool(description="Execute a PromQL instant query against Prometheus with optional pagination and compact mode")
+@backend_selectable
+@bounded_by_timeout
 async def execute_query(
     query: str, 
     time: Optional[str] = None, 
     limit: Optional[int] = None, 
     offset: Optional[int] = None, 
-    compact: bool = False
+    compact: bool = False,
+    pushdown: Optional[str] = None,
+    exact_total: bool = False,
+    cursor: Optional[str] = None,
+    timeout: Optional[str] = None
 ) -> Dict[str, Any]:
     """Execute an instant query against Prometheus.
     
     Args:
         query: PromQL query string
         time: Optional RFC3339 or Unix timestamp (default: current time)
-        limit: Maximum number of results to return (pagination)
-        offset: Number of results to skip (pagination)
+        limit: Maximum number of results to return (pagination, in the order Prometheus returned
+            them; with cursor, in label set order)
+        offset: Number of results to skip (pagination, in the order Prometheus returned them)
         compact: Return results in compact format to reduce token usage
+        pushdown: With limit, have Prometheus return only the needed series: 'limitk' (arbitrary
+            series, needs experimental PromQL functions), 'topk' (highest values first) or
+            'native' (Prometheus 'limit' parameter, on versions that support it). The total is
+            then a lower bound unless exact_total is set
+        exact_total: With pushdown, also count the series of the query for an exact total; this
+            makes Prometheus evaluate the query a second time
+        cursor: nextCursor from the previous page, to fetch the next one; an empty cursor starts
+            cursor pagination in label set order at the first page
+        timeout: Evaluation timeout (e.g., '30s'), sent to Prometheus and enforced as a deadline
+            for the whole call
         
     Returns:
         Query result with type (vector, matrix, scalar, string), values, and optional pagination metadata
@@ -207,28 +1491,52 @@ async def execute_query(
     params = {"query": query}
     if time:
         params["time"] = time
+    if timeout:
+        params["timeout"] = timeout
     
-    logger.info("Executing instant query", query=query, time=time, limit=limit, offset=offset, compact=compact)
-    data = make_prometheus_request("query", params=params)
-    
-    # Create the base result
-    result_data = {
-        "resultType": data["resultType"],
-        "result": data["result"]
-    }
+    logger.info("Executing instant query", query=query, time=time, limit=limit, offset=offset, compact=compact,
+                pushdown=pushdown, exact_total=exact_total, cursor=cursor)
+    if cursor is not None:
+        async def fetch():
+            data = await make_prometheus_request("query", params=params)
+            return data["resultType"], data["result"]
+        
+        result = await cursor_paginate("execute_query", params, fetch, limit, cursor)
+        if compact:
+            compacted = create_compact_query_result({"resultType": result["resultType"], "result": result["result"]})
+            result["resultType"] = compacted["resultType"]
+            result["result"] = compacted["result"]
+        logger.info("Instant query completed",
+                    query=query,
+                    result_type=result["resultType"],
+                    total_results=result["pagination"]["total"] if "pagination" in result else 1,
+                    returned_results=len(result["result"]) if isinstance(result["result"], list) else 1,
+                    compact=compact)
+        return result
     
-    # Apply compact mode if requested
-    if compact:
-        result_data = create_compact_query_result(result_data)
+    paginate = limit is not None or offset is not None
+    pushdown_info = None
+    if pushdown and limit is not None:
+        data, pushdown_info = await execute_query_pushdown(params, limit, offset or 0, pushdown, exact_total)
+    elif paginate:
+        # Large responses are parsed incrementally, keeping only the requested page
+        data = await make_prometheus_request("query", params=params, window=ResultWindow(offset or 0, limit))
+    else:
+        data = await make_prometheus_request("query", params=params)
     
     # Apply pagination if requested and result is a list
-    if (limit is not None or offset is not None) and isinstance(data["result"], list):
-        paginated = apply_pagination(data["result"], limit=limit, offset=offset)
+    if paginate and isinstance(data["result"], list):
+        paginated = paginate_result(data, limit=limit, offset=offset)
         result = {
-            "resultType": result_data["resultType"],
+            "resultType": data["resultType"],
             "result": paginated["data"],
             "pagination": paginated["metadata"]
         }
+        # Keep complete results so further pages are served from the same snapshot
+        if pushdown_info is None and "window" not in data:
+            handle = store_result("execute_query", params, data["result"], data["resultType"])
+            if handle is not None:
+                result["handle"] = handle
         # Apply compact mode to paginated results if requested
         if compact:
             compact_paginated = create_compact_query_result({
@@ -237,10 +1545,31 @@ async def execute_query(
             })
             result["resultType"] = compact_paginated["resultType"]
             result["result"] = compact_paginated["result"]
+        if pushdown_info is not None:
+            # Report whether the total is exact or only a lower bound
+            pagination = result["pagination"]
+            pagination["pushdown"] = pushdown_info["pushdown"]
+            if pushdown_info["pushdown"] is None:
+                pagination["totalExact"] = True
+            elif pushdown_info["total"] is not None:
+                pagination["total"] = pushdown_info["total"]
+                pagination["hasMore"] = pagination["offset"] + pagination["returned"] < pushdown_info["total"]
+                pagination["totalExact"] = True
+            else:
+                pagination["totalExact"] = False
     else:
-        result = result_data
+        result = {
+            "resultType": data["resultType"],
+            "result": data["result"]
+        }
+        # Apply compact mode if requested
+        if compact:
+            result = create_compact_query_result(result)
     
-    result_count = len(data["result"]) if isinstance(data["result"], list) else 1
+    if "window" in data:
+        result_count = data["window"]["total"]
+    else:
+        result_count = len(data["result"]) if isinstance(data["result"], list) else 1
     returned_count = len(result["result"]) if isinstance(result["result"], list) else 1
     
     logger.info("Instant query completed", 
@@ -252,72 +1581,241 @@ async def execute_query(
     
     return result
 
-@mcp.tool(description="Execute a PromQL range query with start time, end time, and step interval")
-async def execute_range_query(query: str, start: str, end: str, step: str) -> Dict[str, Any]:
+@mcp_tool(description="Execute a PromQL range query with start time, end time, and step interval or point budget")
+@backend_selectable
+@bounded_by_timeout
+async def execute_range_query(
+    query: str, 
+    start: str, 
+    end: str, 
+    step: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    compact: bool = False,
+    max_points: Optional[int] = None,
+    summary: bool = False,
+    cursor: Optional[str] = None,
+    timeout: Optional[str] = None
+) -> Dict[str, Any]:
     """Execute a range query against Prometheus.
     
     Args:
         query: PromQL query string
         start: Start time as RFC3339 or Unix timestamp
         end: End time as RFC3339 or Unix timestamp
-        step: Query resolution step width (e.g., '15s', '1m', '1h')
+        step: Query resolution step width (e.g., '15s', '1m', '1h'); when omitted, the smallest
+            nice step (15s, 1m, 5m, ...) that fits max_points is used
+        limit: Maximum number of series to return (pagination, in the order Prometheus returned
+            them; with cursor, in label set order)
+        offset: Number of series to skip (pagination, in the order Prometheus returned them)
+        compact: Return series as numeric value arrays on a shared start/step grid, with
+            labels common to all series listed once, to reduce token usage
+        max_points: Maximum number of samples per series; longer series are reduced by keeping
+            the minimum and maximum of equal time buckets, so peaks and dips are preserved
+        summary: Return one row of statistics per series (count, min, max, avg, p50, p95, last,
+            and slope per second) instead of the samples
+        cursor: nextCursor from the previous page, to fetch the next one; an empty cursor starts
+            cursor pagination in label set order at the first page
+        timeout: Evaluation timeout (e.g., '30s'), sent to Prometheus and enforced as a deadline
+            for the whole call, including all shards of a split range
         
     Returns:
-        Range query result with type (usually matrix) and values over time
+        Range query result with type (usually matrix) and values over time, or per-series
+        statistics in summary mode, and optional pagination and downsampling metadata
     """
+    if max_points is not None and max_points < 2:
+        raise ValueError("max_points must be at least 2")
+    auto_step = None
+    if step is None:
+        if max_points is None:
+            raise ValueError("Either step or max_points is required")
+        # Cap the points Prometheus evaluates before the query is sent
+        auto_step = nice_step(parse_timestamp(start), parse_timestamp(end), max_points)
+        step = format_timestamp(auto_step)
+
     params = {
         "query": query,
         "start": start,
         "end": end,
         "step": step
     }
+    if timeout:
+        params["timeout"] = timeout
     
-    logger.info("Executing range query", query=query, start=start, end=end, step=step)
-    data = make_prometheus_request("query_range", params=params)
+    logger.info("Executing range query", query=query, start=start, end=end, step=step, limit=limit, offset=offset,
+                compact=compact, max_points=max_points, summary=summary, cursor=cursor)
+    if cursor is not None:
+        async def fetch():
+            data = await fetch_range_query(params)
+            return data["resultType"], data["result"]
+        
+        result = await cursor_paginate("execute_range_query", params, fetch, limit, cursor)
+        data = {"resultType": result["resultType"]}
+    elif limit is not None or offset is not None:
+        # Paginated matrices are parsed incrementally, keeping only the requested series.
+        # A windowed result cannot be merged, so this bypasses the extent cache and splitting.
+        data = await make_prometheus_request("query_range", params=params, window=ResultWindow(offset or 0, limit))
+        paginated = paginate_result(data, limit=limit, offset=offset)
+        result = {
+            "resultType": data["resultType"],
+            "result": paginated["data"],
+            "pagination": paginated["metadata"]
+        }
+    else:
+        data = await fetch_range_query(params)
+        result = {
+            "resultType": data["resultType"],
+            "result": data["result"]
+        }
     
-    result = {
-        "resultType": data["resultType"],
-        "result": data["result"]
-    }
+    if auto_step is not None:
+        result["autoStep"] = step
+    
+    if summary and result["resultType"] == "matrix":
+        # Statistics are computed over all samples, so summaries are neither downsampled nor compacted
+        with timed("summary"):
+            summary_result = summarize_matrix_result(result["result"])
+        for key in ("pagination", "handle", "autoStep"):
+            if key in result:
+                summary_result[key] = result[key]
+        result = summary_result
+    else:
+        # Downsample long series if requested
+        if max_points is not None and result["resultType"] == "matrix":
+            with timed("downsampling"):
+                result["result"], result["downsampling"] = downsample_matrix_result(result["result"], max_points)
+        
+        # Apply compact mode if requested
+        if compact:
+            compact_result = create_compact_range_result(result, start, step)
+            for key in ("pagination", "handle", "autoStep", "downsampling"):
+                if key in result:
+                    compact_result[key] = result[key]
+            result = compact_result
     
     logger.info("Range query completed", 
                 query=query, 
                 result_type=data["resultType"], 
-                result_count=len(data["result"]) if isinstance(data["result"], list) else 1)
+                result_count=len(result["result"]) if isinstance(result["result"], list) else 1,
+                compact=compact,
+                summary=summary,
+                downsampling=result.get("downsampling"))
     
     return result
 
-@mcp.tool(description="List available metrics in Prometheus with optional filtering and pagination")
+async def run_batch_query(index: int, spec: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """Run one query of a batch, capturing its result or error and its duration.
+    
+    Args:
+        index: Position of the query in the batch
+        spec: Arguments of execute_query, or of execute_range_query when it has a start or end
+        semaphore: Bounds the number of batch queries running at once
+        
+    Returns:
+        Dictionary with the index, query type, status, duration and result or error
+    """
+    spec = dict(spec)
+    query_type = spec.pop("type", None) or ("range" if "start" in spec or "end" in spec else "instant")
+    tool = execute_range_query if query_type == "range" else execute_query
+    outcome: Dict[str, Any] = {"index": index, "type": query_type, "query": spec.get("query")}
+    started = time.perf_counter()
+    try:
+        if query_type not in ("instant", "range"):
+            raise ValueError(f"Unknown query type '{query_type}', expected 'instant' or 'range'")
+        unknown = set(spec) - set(inspect.signature(tool).parameters)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {query_type} query: {', '.join(sorted(unknown))}")
+        async with semaphore:
+            started = time.perf_counter()
+            outcome["result"] = await tool(**spec)
+        outcome["status"] = "success"
+    except Exception as e:
+        outcome["status"] = "error"
+        outcome["error"] = str(e)
+    outcome["durationMs"] = round((time.perf_counter() - started) * 1000, 3)
+    return outcome
+
+@mcp_tool(description="Execute many PromQL instant or range queries concurrently and return every result in one response")
+@backend_selectable
+async def execute_queries(queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Execute a batch of queries concurrently.
+    
+    Args:
+        queries: Queries to run. Each one takes the parameters of execute_query, or of
+            execute_range_query when it has a start or end; 'type' ('instant' or 'range')
+            can also be set explicitly
+        
+    Returns:
+        Dictionary with one entry per query, in order, holding its status, result or error,
+        and duration, plus the number of failures and the total duration
+    """
+    logger.info("Executing query batch", queries=len(queries), max_parallel=config.batch_max_parallel)
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, config.batch_max_parallel))
+    results = await asyncio.gather(*(run_batch_query(i, spec, semaphore) for i, spec in enumerate(queries)))
+    errors = sum(1 for outcome in results if outcome["status"] == "error")
+    duration_ms = round((time.perf_counter() - started) * 1000, 3)
+    
+    logger.info("Query batch completed", queries=len(results), errors=errors, duration_ms=duration_ms)
+    return {
+        "results": results,
+        "errors": errors,
+        "durationMs": duration_ms
+    }
+
+@mcp_tool(description="List available metrics in Prometheus with optional filtering and pagination")
+@backend_selectable
 async def list_metrics(
     limit: Optional[int] = None, 
     offset: Optional[int] = None, 
     filter_pattern: Optional[str] = None, 
-    prefix: Optional[str] = None
+    prefix: Optional[str] = None,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
     """Retrieve a list of metric names available in Prometheus.
     
     Args:
-        limit: Maximum number of metrics to return (pagination)
+        limit: Maximum number of metrics to return (pagination, in name order; with cursor, pages
+            are returned with cursors)
         offset: Number of metrics to skip (pagination)
         filter_pattern: Regex pattern to filter metric names
         prefix: Prefix to filter metric names (e.g., 'storage_' for storage metrics)
+        cursor: nextCursor from the previous page, to fetch the next one; an empty cursor starts
+            cursor pagination in label set order at the first page
         
     Returns:
         Dictionary with metric names and optional pagination metadata
     """
-    logger.info("Listing available metrics", limit=limit, offset=offset, filter_pattern=filter_pattern, prefix=prefix)
-    data = make_prometheus_request("label/__name__/values")
+    logger.info("Listing available metrics", limit=limit, offset=offset, filter_pattern=filter_pattern, prefix=prefix,
+                cursor=cursor)
+    catalog = await get_metric_catalog()
     
-    # Apply filtering if requested
-    filtered_metrics = filter_metrics(data, filter_pattern=filter_pattern, prefix=prefix)
+    # Apply filtering if requested, using the catalog's index
+    filtered_metrics = catalog.search(prefix=prefix, filter_pattern=filter_pattern)
     
     # Apply pagination if requested
-    if limit is not None or offset is not None:
+    if cursor is not None:
+        async def fetch():
+            return None, filtered_metrics
+        
+        page = await cursor_paginate("list_metrics", {"prefix": prefix, "filter_pattern": filter_pattern},
+                                     fetch, limit, cursor)
+        result = {
+            "metrics": page["result"],
+            "pagination": page["pagination"]
+        }
+        if "handle" in page:
+            result["handle"] = page["handle"]
+    elif limit is not None or offset is not None:
         paginated = apply_pagination(filtered_metrics, limit=limit, offset=offset)
         result = {
             "metrics": paginated["data"],
             "pagination": paginated["metadata"]
         }
+        handle = store_result("list_metrics", {"prefix": prefix, "filter_pattern": filter_pattern},
+                              filtered_metrics)
+        if handle is not None:
+            result["handle"] = handle
     else:
         result = {
             "metrics": filtered_metrics,
@@ -325,13 +1823,14 @@ async def list_metrics(
         }
     
     logger.info("Metrics list retrieved", 
-                total_metrics=len(data), 
+                total_metrics=len(catalog), 
                 filtered_metrics=len(filtered_metrics),
                 returned_metrics=len(result["metrics"]))
     
     return result
 
-@mcp.tool(description="Get metadata for a specific metric")
+@mcp_tool(description="Get metadata for a specific metric")
+@backend_selectable
 async def get_metric_metadata(metric: str) -> List[Dict[str, Any]]:
     """Get metadata about a specific metric.
     
@@ -343,28 +1842,58 @@ async def get_metric_metadata(metric: str) -> List[Dict[str, Any]]:
     """
     logger.info("Retrieving metric metadata", metric=metric)
     params = {"metric": metric}
-    data = make_prometheus_request("metadata", params=params)
+    data = await make_prometheus_request("metadata", params=params)
     logger.info("Metric metadata retrieved", metric=metric, metadata_count=len(data["metadata"]))
     return data["metadata"]
 
-@mcp.tool(description="Get information about scrape targets with optional pagination")
+@mcp_tool(description="Get information about scrape targets with optional pagination")
+@backend_selectable
 async def get_targets(
     limit: Optional[int] = None, 
     offset: Optional[int] = None, 
-    active_only: bool = False
+    active_only: bool = False,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
     """Get information about all Prometheus scrape targets.
     
     Args:
-        limit: Maximum number of targets to return (applies to active targets)
-        offset: Number of targets to skip (applies to active targets)
+        limit: Maximum number of targets to return (applies to active targets, in the order
+            Prometheus returned them; with cursor, in label set order)
+        offset: Number of targets to skip (applies to active targets, in the order Prometheus
+            returned them)
         active_only: Return only active targets (ignore dropped targets)
+        cursor: nextCursor from the previous page, to fetch the next one; an empty cursor starts
+            cursor pagination in label set order at the first page
         
     Returns:
         Dictionary with targets information and optional pagination metadata
     """
-    logger.info("Retrieving scrape targets information", limit=limit, offset=offset, active_only=active_only)
-    data = make_prometheus_request("targets")
+    logger.info("Retrieving scrape targets information", limit=limit, offset=offset, active_only=active_only,
+                cursor=cursor)
+    if cursor is not None:
+        fetched = {}
+        
+        async def fetch():
+            fetched.update(await make_prometheus_request("targets"))
+            return None, fetched["activeTargets"]
+        
+        page = await cursor_paginate("get_targets", {}, fetch, limit, cursor)
+        result = {
+            "activeTargets": page["result"],
+            "activePagination": page["pagination"]
+        }
+        if "handle" in page:
+            result["handle"] = page["handle"]
+        # Dropped targets are not paginated; they come with pages that were fetched from Prometheus
+        if not active_only and fetched:
+            result["droppedTargets"] = fetched["droppedTargets"]
+        logger.info("Scrape targets retrieved",
+                    total_active_targets=page["pagination"]["total"],
+                    returned_active_targets=len(result["activeTargets"]),
+                    dropped_targets=len(result.get("droppedTargets", [])))
+        return result
+    
+    data = await make_prometheus_request("targets")
     
     active_targets = data["activeTargets"]
     dropped_targets = data["droppedTargets"]
@@ -376,6 +1905,9 @@ async def get_targets(
             "activeTargets": paginated_active["data"],
             "activePagination": paginated_active["metadata"]
         }
+        handle = store_result("get_targets", {}, active_targets)
+        if handle is not None:
+            result["handle"] = handle
         if not active_only:
             result["droppedTargets"] = dropped_targets
     else:
@@ -392,6 +1924,130 @@ async def get_targets(
     
     return result
 
+@mcp_tool(description="Get a page, sort or projection of a large result previously returned with a handle, without querying Prometheus again")
+async def get_result_page(
+    handle: str,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    fields: Optional[List[str]] = None,
+    compact: bool = False
+) -> Dict[str, Any]:
+    """Serve further pages of a stored result from the same snapshot.
+    
+    Paginated results of execute_query, list_metrics and get_targets, and
+    cursor-paginated results of execute_range_query, with many items include
+    a handle that stays valid for a limited time.
+    
+    Args:
+        handle: Handle returned by the original paginated tool call
+        limit: Maximum number of items to return (pagination)
+        offset: Number of items to skip (pagination)
+        sort_by: Dotted path of the field to sort by, e.g. 'value' (sample value), 'metric.instance',
+            'labels.job' or 'health'; numbers sort numerically and items without the field come last
+        descending: Sort in descending order
+        fields: Dotted paths to return for each item instead of the whole item
+        compact: Return vector results in compact format to reduce token usage
+        
+    Returns:
+        Dictionary with the handle, source tool, items and pagination metadata
+    """
+    logger.info("Retrieving stored result page", handle=handle, limit=limit, offset=offset, sort_by=sort_by,
+                descending=descending, fields=fields)
+    entry = result_store.get(handle)
+    if entry is None:
+        raise ValueError(f"Unknown or expired result handle '{handle}', run the original query again")
+    
+    items = sorted_stored_items(entry, sort_by, descending) if sort_by else entry["items"]
+    paginated = apply_pagination(items, limit=limit, offset=offset)
+    page = paginated["data"]
+    if fields:
+        page = [
+            {field: _lookup_path(item, field) for field in fields} if isinstance(item, dict) else item
+            for item in page
+        ]
+    
+    result = {
+        "handle": handle,
+        "source": entry["source"],
+        "result": page,
+        "pagination": paginated["metadata"]
+    }
+    if entry["resultType"] is not None:
+        result["resultType"] = entry["resultType"]
+        if compact and not fields:
+            compacted = create_compact_query_result({"resultType": entry["resultType"], "result": page})
+            result["resultType"] = compacted["resultType"]
+            result["result"] = compacted["result"]
+    
+    logger.info("Stored result page retrieved", handle=handle, source=entry["source"],
+                total=paginated["metadata"]["total"], returned=paginated["metadata"]["returned"])
+    return result
+
+# Health statuses from best to worst
+HEALTH_STATUSES = ("healthy", "recovering", "unhealthy")
+
+async def check_backend_health(name: str, probe: bool) -> Dict[str, Any]:
+    """Check one backend: probe it if asked and report its circuit breaker state."""
+    _backend_selection.set((name,))
+    prometheus: Dict[str, Any] = {"url": get_backend(name).url}
+    probe_ok = True
+    if probe:
+        started = time.perf_counter()
+        try:
+            build_info = await make_prometheus_request("status/buildinfo")
+            prometheus["reachable"] = True
+            if isinstance(build_info, dict) and "version" in build_info:
+                prometheus["version"] = build_info["version"]
+        except Exception as e:
+            probe_ok = False
+            prometheus["reachable"] = False
+            prometheus["error"] = str(e)
+        prometheus["latencyMs"] = round((time.perf_counter() - started) * 1000, 1)
+
+    breaker = get_circuit_breaker().stats()
+    if breaker["state"] == CircuitBreaker.OPEN or not probe_ok:
+        status = "unhealthy"
+    elif breaker["state"] == CircuitBreaker.HALF_OPEN:
+        status = "recovering"
+    else:
+        status = "healthy"
+    report = {"status": status, "prometheus": prometheus, "circuitBreaker": breaker}
+    replica_set = get_replica_set() if get_backend(name).url else None
+    if replica_set is not None and len(replica_set.urls) > 1:
+        report["replicas"] = replica_set.stats()
+    return report
+
+@mcp_tool(description="Check whether Prometheus is reachable and report the circuit breaker, retry and cache state")
+async def get_health(probe: bool = True, backend: Optional[str] = None) -> Dict[str, Any]:
+    """Report the health of the connection to Prometheus.
+
+    Args:
+        probe: Send a build info request to check that Prometheus responds (default: true).
+            While the circuit breaker is open the probe fails fast.
+        backend: Backend name, comma-separated names or "all" (default: the default backend)
+
+    Returns:
+        Overall status ("healthy", "recovering" or "unhealthy"), the probe result,
+        circuit breaker state and retry, coalescing and cache counters. With several
+        backends, the probe result and breaker state are reported per backend under
+        "backends" and the status is the worst of them.
+    """
+    names = resolve_backends(backend)
+    reports = await asyncio.gather(*(check_backend_health(name, probe) for name in names))
+    counters = {
+        "retries": retry_policy.stats(),
+        "coalescer": request_coalescer.stats(),
+        "resultCache": result_cache.stats(),
+        "extentCache": extent_cache.stats(),
+    }
+    status = max((report["status"] for report in reports), key=HEALTH_STATUSES.index)
+    logger.info("Health checked", status=status, backends=names, probe=probe)
+    if len(reports) == 1:
+        return {**reports[0], **counters}
+    return {"status": status, "backends": dict(zip(names, reports)), **counters}
+
 if __name__ == "__main__":
     logger.info("Starting Prometheus MCP Server", mode="direct")
     mcp.run()
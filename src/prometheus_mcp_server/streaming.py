@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional
+
+# Start of the result array in a Prometheus query response
+_RESULT_START = re.compile(r'"result"\s*:\s*\[')
+_RESULT_TYPE = re.compile(r'"resultType"\s*:\s*"(\w+)"')
+_STATUS = re.compile(r'"status"\s*:\s*"(\w+)"')
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Result types whose result is a list of series that can be windowed
+_LIST_RESULT_TYPES = ("vector", "matrix")
+
+# Drop consumed text from the buffer once this many characters have been parsed
+_COMPACT_THRESHOLD = 1 << 20
+
+
+class ResultWindow(NamedTuple):
+    """The slice of a result a tool will actually return."""
+    offset: int = 0
+    limit: Optional[int] = None
+
+    def contains(self, index: int) -> bool:
+        return index >= self.offset and (self.limit is None or index < self.offset + self.limit)
+
+
+async def parse_windowed_response(chunks: AsyncIterator[bytes], window: ResultWindow) -> Dict[str, Any]:
+    """Parse a Prometheus query response incrementally, keeping only a window of the result.
+
+    Result items are decoded one at a time as the body arrives. Items outside
+    the window are counted and discarded, so peak memory is bounded by the
+    window and the largest single series rather than the whole response.
+    Fields after the result array (such as warnings) are not parsed.
+
+    Responses without a list of series (errors, scalars, strings) are parsed
+    in full and returned unchanged.
+
+    Args:
+        chunks: Response body as an async iterator of byte chunks
+        window: Offset and limit of the items to keep
+
+    Returns:
+        Response envelope whose data.result holds the windowed items and
+        data.window holds the offset, limit and total item count
+
+    Raises:
+        json.JSONDecodeError: If the body is not valid JSON
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    exhausted = False
+    iterator = chunks.__aiter__()
+
+    async def read_more() -> bool:
+        nonlocal buffer, exhausted
+        if exhausted:
+            return False
+        try:
+            chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+            buffer += text_decoder.decode(b"", final=True)
+            return False
+        buffer += text_decoder.decode(chunk)
+        return True
+
+    # Read the header up to the start of the result array
+    match = None
+    while match is None:
+        match = _RESULT_START.search(buffer)
+        if match is None and not await read_more():
+            return json.loads(buffer)
+    header = buffer[:match.start()]
+    status = _STATUS.search(header)
+    result_type = _RESULT_TYPE.search(header)
+    if status is None or result_type is None or result_type.group(1) not in _LIST_RESULT_TYPES:
+        # Not a list of series (or not the layout we expect), fall back to a full parse
+        while await read_more():
+            pass
+        return json.loads(buffer)
+    position = match.end()
+
+    items = []
+    index = 0
+    while True:
+        position = _WHITESPACE.match(buffer, position).end()
+        if position >= len(buffer):
+            if not await read_more():
+                raise json.JSONDecodeError("Unterminated result array", buffer, position)
+            continue
+        char = buffer[position]
+        if char == "]":
+            break
+        if char == "," and index > 0:
+            position += 1
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # The item may be incomplete. Read until its text has doubled before trying again,
+            # so an item arriving in many chunks is parsed a logarithmic number of times
+            pending = len(buffer) - position
+            if not await read_more():
+                raise
+            while len(buffer) - position < 2 * pending and await read_more():
+                pass
+            continue
+        if window.contains(index):
+            items.append(item)
+        index += 1
+        position = end
+        if position > _COMPACT_THRESHOLD:
+            buffer = buffer[position:]
+            position = 0
+
+    # Drain the rest of the body so the connection can be reused
+    while await read_more():
+        buffer = ""
+
+    return {
+        "status": status.group(1),
+        "data": {
+            "resultType": result_type.group(1),
+            "result": items,
+            "window": {"offset": window.offset, "limit": window.limit, "total": index},
+        },
+    }
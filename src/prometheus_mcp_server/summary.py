@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+import math
+import warnings
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+from prometheus_mcp_server.matrix import common_labels
+
+SUMMARY_STATS = ("count", "min", "max", "avg", "p50", "p95", "last", "slope")
+
+def _json_number(value: float) -> Union[int, float, str]:
+    """Convert a statistic to a JSON-safe number, keeping non-finite values as Prometheus strings."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return int(value) if value.is_integer() else value
+
+def nan_percentiles(values: np.ndarray, percentiles: List[float]) -> List[np.ndarray]:
+    """Row-wise percentiles ignoring NaN, with linear interpolation like numpy.nanpercentile.
+
+    numpy.nanpercentile falls back to a Python loop over rows; sorting once
+    and interpolating on each row's non-NaN prefix keeps this vectorized.
+    """
+    ordered = np.sort(values, axis=1)  # NaN sorts last
+    valid = (~np.isnan(values)).sum(axis=1)
+    rows = np.arange(len(values))
+    results = []
+    for percentile in percentiles:
+        position = percentile / 100 * np.maximum(valid - 1, 0)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, np.maximum(valid - 1, 0))
+        fraction = position - low
+        low_values = ordered[rows, low] if ordered.shape[1] else np.full(len(values), np.nan)
+        high_values = ordered[rows, high] if ordered.shape[1] else np.full(len(values), np.nan)
+        with np.errstate(invalid="ignore"):
+            interpolated = low_values + (high_values - low_values) * fraction
+        results.append(np.where(valid > 0, np.where(fraction > 0, interpolated, low_values), np.nan))
+    return results
+
+def summary_stats(timestamps: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Compute per-series statistics over padded sample arrays.
+
+    Rows are series and columns are samples; rows shorter than the widest
+    series are padded with NaN timestamps. NaN sample values are ignored by
+    every statistic except "last".
+
+    Args:
+        timestamps: Sample timestamps, shape (series, samples)
+        values: Sample values, shape (series, samples)
+
+    Returns:
+        Mapping of statistic name to an array with one entry per series.
+        "slope" is the least-squares rate of change per second.
+    """
+    present = ~np.isnan(timestamps)
+    counts = present.sum(axis=1)
+    last = values[np.arange(len(values)), np.maximum(counts - 1, 0)]
+    with warnings.catch_warnings():
+        # All-NaN series yield NaN statistics
+        warnings.simplefilter("ignore", RuntimeWarning)
+        p50, p95 = nan_percentiles(values, [50, 95])
+        stats = {
+            "count": counts,
+            "min": np.nanmin(values, axis=1),
+            "max": np.nanmax(values, axis=1),
+            "avg": np.nanmean(values, axis=1),
+            "p50": p50,
+            "p95": p95,
+            "last": last,
+        }
+
+        # Least-squares slope over the finite samples, relative to each series' first timestamp
+        usable = present & np.isfinite(values)
+        t = np.where(usable, timestamps - timestamps[:, :1], 0.0)
+        v = np.where(usable, values, 0.0)
+        n = usable.sum(axis=1)
+        t_mean = t.sum(axis=1) / n
+        v_mean = v.sum(axis=1) / n
+        dt = np.where(usable, t - t_mean[:, None], 0.0)
+        covariance = (dt * (v - v_mean[:, None])).sum(axis=1)
+        variance = (dt * dt).sum(axis=1)
+        stats["slope"] = np.where(variance > 0, covariance / np.where(variance > 0, variance, 1.0), np.nan)
+    return stats
+
+def summarize_matrix_result(result: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Replace the samples of every series in a matrix result with summary statistics.
+
+    All series are loaded into one padded array so the statistics are
+    computed in a single vectorized pass. Labels shared by every series are
+    listed once in "commonLabels".
+
+    Args:
+        result: Matrix result (list of series with "metric" and "values")
+
+    Returns:
+        Summary result with one row of statistics per series
+    """
+    if not result:
+        return {"resultType": "summary", "commonLabels": {}, "result": []}
+    common = common_labels(result)
+    lengths = np.array([len(series["values"]) for series in result], dtype=np.int64)
+    width = int(lengths.max())
+    timestamps = np.full((len(result), width), np.nan)
+    values = np.full((len(result), width), np.nan)
+    if width:
+        samples = [sample for series in result for sample in series["values"]]
+        rows = np.repeat(np.arange(len(result)), lengths)
+        columns = np.arange(len(samples)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        timestamps[rows, columns] = np.fromiter((sample[0] for sample in samples), dtype=np.float64, count=len(samples))
+        values[rows, columns] = np.array([sample[1] for sample in samples], dtype=np.float64)
+
+    columns_by_stat = {name: column.tolist() for name, column in summary_stats(timestamps, values).items()}
+    rows_out = []
+    for i, series in enumerate(result):
+        row: Dict[str, Any] = {"labels": {name: value for name, value in series["metric"].items() if name not in common}}
+        row["count"] = columns_by_stat["count"][i]
+        for name in SUMMARY_STATS[1:]:
+            row[name] = _json_number(columns_by_stat[name][i])
+        rows_out.append(row)
+
+    return {
+        "resultType": "summary",
+        "commonLabels": common,
+        "result": rows_out,
+    }
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)")
+_DURATION_UNITS = {
+    "ms": 0.001,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 604800,
+    "y": 31536000,
+}
+
+# Step widths chosen by nice_step, in seconds
+NICE_STEPS = (
+    1, 2, 5, 10, 15, 30,
+    60, 120, 300, 600, 900, 1800,
+    3600, 7200, 10800, 21600, 43200,
+    86400, 172800, 604800,
+)
+
+def parse_timestamp(value: Union[str, float, int]) -> float:
+    """Parse a Prometheus API timestamp into Unix seconds.
+
+    Args:
+        value: RFC3339 string or Unix timestamp (number or numeric string)
+
+    Returns:
+        Unix timestamp in seconds
+
+    Raises:
+        ValueError: If the value is not a valid timestamp
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = value.strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    # Python < 3.11 only accepts up to microsecond precision
+    text = re.sub(r"(\.\d{6})\d+", r"\1", text)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def parse_duration(value: Union[str, float, int]) -> float:
+    """Parse a Prometheus duration such as '15s', '1h30m' or '30' into seconds.
+
+    Args:
+        value: Duration string or number of seconds
+
+    Returns:
+        Duration in seconds
+
+    Raises:
+        ValueError: If the value is not a valid duration
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = value.strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    position = 0
+    total = 0.0
+    for match in _DURATION_PATTERN.finditer(text):
+        if match.start() != position:
+            break
+        total += float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+        position = match.end()
+    if position != len(text) or not text:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return total
+
+def is_historical(timestamp: Optional[Union[str, float]], recent_window: float) -> bool:
+    """Check whether a timestamp is old enough that its data no longer changes.
+
+    Args:
+        timestamp: Evaluation timestamp, or None for "now"
+        recent_window: Seconds before now during which data may still change
+
+    Returns:
+        True if the timestamp is older than the recent window
+    """
+    if timestamp is None:
+        return False
+    try:
+        return parse_timestamp(timestamp) < time.time() - recent_window
+    except ValueError:
+        return False
+
+def format_timestamp(timestamp: float) -> str:
+    """Format Unix seconds as a Prometheus API timestamp with millisecond precision."""
+    return f"{timestamp:.3f}".rstrip("0").rstrip(".")
+
+def nice_step(start: float, end: float, max_points: int) -> float:
+    """Pick the smallest nice step that evaluates a range in at most max_points points.
+
+    Args:
+        start: Start of the range in Unix seconds
+        end: End of the range in Unix seconds
+        max_points: Maximum number of grid points, at least 2
+
+    Returns:
+        Step width in seconds, one of NICE_STEPS or a whole number of weeks beyond them
+    """
+    needed = max(end - start, 0) / max(max_points - 1, 1)
+    for step in NICE_STEPS:
+        if step >= needed:
+            return float(step)
+    week = NICE_STEPS[-1]
+    return float(-(-needed // week) * week)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+# Prometheus query timings (seconds) summed over the queries of a call
+QUERY_TIMINGS = ("evalTotalTime", "queryPreparationTime", "innerEvalTime", "execQueueTime", "execTotalTime")
+
+class CallTiming:
+    """Where the time of one tool call went, for the debug_timing option.
+
+    Phases are summed over everything the call did, so with concurrent
+    requests (range splitting, several backends) the phases may add up to
+    more than the call's total time.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.phases: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.query_stats: Dict[str, float] = {}
+        self._active: Set[str] = set()
+
+    def add(self, phase: str, seconds: float):
+        """Add time spent in a phase."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter such as a number of requests or bytes."""
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block as a phase; a phase nested in itself is only counted once."""
+        if name in self._active:
+            yield
+            return
+        self._active.add(name)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self._active.discard(name)
+            self.add(name, self._clock() - started)
+
+    def add_query_stats(self, stats: Dict[str, Any]):
+        """Add the statistics Prometheus returns for a query with stats=all."""
+        self.query_stats["queries"] = self.query_stats.get("queries", 0) + 1
+        timings = stats.get("timings") or {}
+        for key in QUERY_TIMINGS:
+            if key in timings:
+                self.query_stats[key] = self.query_stats.get(key, 0.0) + timings[key]
+        samples = stats.get("samples") or {}
+        if "totalQueryableSamples" in samples:
+            self.query_stats["totalQueryableSamples"] = (self.query_stats.get("totalQueryableSamples", 0)
+                                                         + samples["totalQueryableSamples"])
+        if "peakSamples" in samples:
+            self.query_stats["peakSamples"] = max(self.query_stats.get("peakSamples", 0), samples["peakSamples"])
+
+    def report(self) -> Dict[str, Any]:
+        """Return the timings in milliseconds and the counters, as reported to the caller."""
+        report: Dict[str, Any] = {
+            "totalMs": _ms(self._clock() - self.started),
+            "phasesMs": {phase: _ms(seconds) for phase, seconds in self.phases.items()},
+            **self.counts,
+        }
+        if self.query_stats:
+            report["prometheus"] = {
+                (f"{key}Ms" if key in QUERY_TIMINGS else key): (_ms(value) if key in QUERY_TIMINGS else value)
+                for key, value in self.query_stats.items()
+            }
+        return report
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+# Timing of the current tool call; None unless debug_timing was requested
+_current: ContextVar[Optional[CallTiming]] = ContextVar("call_timing", default=None)
+
+def current_timing() -> Optional[CallTiming]:
+    """Return the timing of the current tool call, or None if it is not being timed."""
+    return _current.get()
+
+def start_timing() -> Token:
+    """Start timing the current tool call; pass the token to stop_timing."""
+    return _current.set(CallTiming())
+
+def stop_timing(token: Token):
+    _current.reset(token)
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Time a block as a phase of the current tool call, if it is being timed."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    with timing.phase(phase):
+        yield
+
+def timed_phase(phase: str):
+    """Decorate a function so its calls are timed as a phase of the current tool call."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(phase):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,27 @@
+"""Shared fixtures for the Prometheus MCP server tests."""
+
+import pytest
+from prometheus_mcp_server import server
+
+@pytest.fixture(autouse=True)
+def reset_server_state():
+    """Clear caches shared across tool calls so tests stay independent."""
+    server.result_cache.clear()
+    server.extent_cache.clear()
+    server.request_coalescer.clear()
+    server.result_store.clear()
+    server.retry_policy.clear()
+    server.circuit_breaker.reset()
+    server._replica_sets.clear()
+    server.metric_catalogs.clear()
+    server.metrics_registry.clear()
+    yield
+    server.result_cache.clear()
+    server.extent_cache.clear()
+    server.request_coalescer.clear()
+    server.result_store.clear()
+    server.retry_policy.clear()
+    server.circuit_breaker.reset()
+    server._replica_sets.clear()
+    server.metric_catalogs.clear()
+    server.metrics_registry.clear()
@@ -0,0 +1,141 @@
+"""Tests for replica load balancing and hedged requests."""
+
+import asyncio
+
+import pytest
+
+from prometheus_mcp_server.balancing import ReplicaSet
+
+def primed(replica_set, latency=0.05, count=20):
+    """Fill the latency window so the hedge delay is known."""
+    for _ in range(count):
+        replica_set.record_latency(latency)
+    return replica_set
+
+def test_round_robin_alternates_replicas():
+    """Test that round-robin cycles through the replicas."""
+    replica_set = ReplicaSet(["http://a", "http://b", "http://c"])
+
+    assert [replica_set.pick() for _ in range(4)] == ["http://a", "http://b", "http://c", "http://a"]
+    assert replica_set.pick(exclude={"http://b"}) in ("http://a", "http://c")
+
+def test_least_outstanding_prefers_idle_replica():
+    """Test that the replica with the fewest requests in flight is chosen."""
+    replica_set = ReplicaSet(["http://a", "http://b"], strategy="least_outstanding")
+    replica_set.outstanding["http://a"] = 3
+    replica_set.outstanding["http://b"] = 1
+
+    assert {replica_set.pick() for _ in range(4)} == {"http://b"}
+
+def test_least_outstanding_rotates_ties():
+    """Test that idle replicas share the load."""
+    replica_set = ReplicaSet(["http://a", "http://b"], strategy="least_outstanding")
+
+    assert {replica_set.pick() for _ in range(4)} == {"http://a", "http://b"}
+
+def test_invalid_settings_rejected():
+    """Test that an unknown strategy or an empty replica list is rejected."""
+    with pytest.raises(ValueError, match="Unknown load balancing strategy"):
+        ReplicaSet(["http://a"], strategy="random")
+    with pytest.raises(ValueError):
+        ReplicaSet([])
+
+def test_hedge_delay_is_latency_quantile():
+    """Test that the hedge delay is the p95 of recent latencies, once enough are known."""
+    replica_set = ReplicaSet(["http://a", "http://b"], hedge=True, min_samples=20)
+    for latency in range(1, 20):
+        replica_set.record_latency(latency / 100)
+    assert replica_set.stats()["hedgeDelay"] is None
+
+    replica_set.record_latency(0.2)
+
+    assert replica_set.stats()["hedgeDelay"] == 0.19
+
+def test_single_replica_never_hedges():
+    """Test that hedging needs a second replica."""
+    replica_set = primed(ReplicaSet(["http://a"], hedge=True))
+
+    assert replica_set.hedge_delay() is None
+
+@pytest.mark.asyncio
+async def test_requests_spread_over_replicas():
+    """Test that calls are sent to the replicas in turn and counted."""
+    replica_set = ReplicaSet(["http://a", "http://b"])
+
+    async def send(url):
+        return url
+
+    results = [await replica_set.call(send) for _ in range(4)]
+
+    assert results == ["http://a", "http://b", "http://a", "http://b"]
+    assert replica_set.stats()["replicas"] == [
+        {"url": "http://a", "requests": 2, "outstanding": 0},
+        {"url": "http://b", "requests": 2, "outstanding": 0},
+    ]
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_to_other_replica():
+    """Test that a request slower than the hedge delay is resent and the faster answer wins."""
+    # Setup
+    replica_set = primed(ReplicaSet(["http://slow", "http://fast"], hedge=True, max_hedge_ratio=1.0))
+    cancelled = []
+
+    async def send(url):
+        try:
+            await asyncio.sleep(1 if url == "http://slow" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return url
+
+    # Execute
+    result = await replica_set.call(send)
+    await asyncio.sleep(0)
+
+    # Verify
+    assert result == "http://fast"
+    assert cancelled == ["http://slow"]
+    assert replica_set.stats()["hedged"] == 1
+    assert replica_set.stats()["hedgeWins"] == 1
+    assert replica_set.outstanding == {"http://slow": 0, "http://fast": 0}
+
+@pytest.mark.asyncio
+async def test_fast_request_is_not_hedged():
+    """Test that answers within the hedge delay are not resent."""
+    replica_set = primed(ReplicaSet(["http://a", "http://b"], hedge=True, max_hedge_ratio=1.0), latency=0.5)
+    sent = []
+
+    async def send(url):
+        sent.append(url)
+        return url
+
+    assert await replica_set.call(send) == "http://a"
+    assert sent == ["http://a"]
+
+@pytest.mark.asyncio
+async def test_hedge_survives_failed_replica():
+    """Test that a failing hedge does not hide the first replica's answer."""
+    replica_set = primed(ReplicaSet(["http://a", "http://b"], hedge=True, max_hedge_ratio=1.0), latency=0.01)
+
+    async def send(url):
+        if url == "http://b":
+            raise ConnectionError("refused")
+        await asyncio.sleep(0.05)
+        return url
+
+    assert await replica_set.call(send) == "http://a"
+    assert replica_set.stats()["hedgeWins"] == 0
+
+@pytest.mark.asyncio
+async def test_hedging_is_capped():
+    """Test that at most max_hedge_ratio of calls are hedged."""
+    replica_set = primed(ReplicaSet(["http://a", "http://b"], hedge=True, max_hedge_ratio=0.25), latency=0.001)
+
+    async def send(url):
+        await asyncio.sleep(0.01)
+        return url
+
+    for _ in range(8):
+        await replica_set.call(send)
+
+    assert replica_set.stats()["hedged"] == 2
@@ -0,0 +1,216 @@
+"""Tests for the in-process result cache."""
+
+import asyncio
+
+import pytest
+from prometheus_mcp_server.cache import ExtentCache, ResultCache, ResultStore, SingleFlight
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestResultCache:
+    """Test the byte-bounded TTL LRU cache."""
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted as hits or misses."""
+        cache = ResultCache(max_bytes=1000)
+        cache.set("a", {"result": []}, size=10, ttl=60)
+
+        assert cache.get("a") == {"result": []}
+        assert cache.get("b") is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hitRatio"] == 0.5
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries are dropped once their TTL has passed."""
+        clock = FakeClock()
+        cache = ResultCache(max_bytes=1000, clock=clock)
+        cache.set("a", 1, size=10, ttl=5)
+
+        clock.now += 4
+        assert cache.get("a") == 1
+        clock.now += 2
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert cache.current_bytes == 0
+
+    def test_evicts_least_recently_used_by_size(self):
+        """Test that the least recently used entries are evicted to stay within max_bytes."""
+        cache = ResultCache(max_bytes=100)
+        cache.set("a", 1, size=40, ttl=60)
+        cache.set("b", 2, size=40, ttl=60)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3, size=40, ttl=60)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.current_bytes == 80
+        assert cache.stats()["evictions"] == 1
+
+    def test_oversized_and_zero_ttl_values_not_cached(self):
+        """Test that values larger than the cache or with no TTL are skipped."""
+        cache = ResultCache(max_bytes=100)
+        cache.set("big", 1, size=101, ttl=60)
+        cache.set("no_ttl", 2, size=10, ttl=0)
+
+        assert len(cache) == 0
+
+    def test_replacing_key_updates_size(self):
+        """Test that overwriting a key does not double count its size."""
+        cache = ResultCache(max_bytes=100)
+        cache.set("a", 1, size=30, ttl=60)
+        cache.set("a", 2, size=50, ttl=60)
+
+        assert cache.get("a") == 2
+        assert cache.current_bytes == 50
+
+class TestResultStore:
+    """Test the handle-based result store."""
+
+    def test_handles_are_unique_and_expire(self):
+        """Test that each stored value gets its own handle until the TTL passes."""
+        clock = FakeClock()
+        store = ResultStore(max_bytes=1000, clock=clock)
+        first = store.put([1, 2], size=10, ttl=5)
+        second = store.put([1, 2], size=10, ttl=5)
+
+        assert first != second
+        assert store.get(first) == [1, 2]
+        clock.now += 6
+        assert store.get(first) is None
+        assert store.get("unknown") is None
+
+    def test_keyed_values_replace_each_other_under_one_handle(self):
+        """Test that storing a key again keeps its handle, until the stored value has expired."""
+        clock = FakeClock()
+        store = ResultStore(max_bytes=1000, clock=clock)
+        first = store.put([1], size=10, ttl=5, key="up")
+        second = store.put([2], size=10, ttl=5, key="up")
+
+        assert second == first
+        assert store.get(first) == [2]
+        assert len(store) == 1
+        clock.now += 6
+        assert store.handle_for("up") is None
+        assert store.put([3], size=10, ttl=5, key="up") != first
+
+    def test_oversized_values_and_zero_ttl_get_no_handle(self):
+        """Test that values that would not be kept are not given a handle."""
+        store = ResultStore(max_bytes=100)
+
+        assert store.put([1], size=101, ttl=60) is None
+        assert store.put([1], size=10, ttl=0) is None
+        assert len(store) == 0
+
+def make_matrix(start, end, step, series=("a", "b")):
+    """Build a matrix result with one sample per step for each series."""
+    count = int((end - start) // step) + 1
+    return [
+        {"metric": {"job": name}, "values": [[start + i * step, str(start + i * step)] for i in range(count)]}
+        for name in series
+    ]
+
+class TestExtentCache:
+    """Test the step-aligned range query extent cache."""
+
+    def test_missing_ranges_for_empty_cache(self):
+        """Test that the whole range is missing when nothing is cached."""
+        cache = ExtentCache(max_samples=1000)
+
+        assert cache.missing_ranges("q", 0, 600, 60) == [(0, 600)]
+        assert cache.stats()["misses"] == 1
+
+    def test_slid_window_only_misses_new_range(self):
+        """Test that sliding the window forward only misses the new samples."""
+        cache = ExtentCache(max_samples=1000)
+        cache.add("q", 0, 600, 60, make_matrix(0, 600, 60))
+
+        assert cache.missing_ranges("q", 120, 720, 60) == [(660, 720)]
+        assert cache.missing_ranges("q", 0, 600, 60) == []
+        assert cache.stats()["partialHits"] == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_missing_ranges_between_extents(self):
+        """Test that gaps between cached extents are reported."""
+        cache = ExtentCache(max_samples=1000)
+        cache.add("q", 0, 120, 60, make_matrix(0, 120, 60))
+        cache.add("q", 480, 600, 60, make_matrix(480, 600, 60))
+
+        assert cache.missing_ranges("q", 0, 600, 60) == [(180, 420)]
+
+    def test_adjacent_extents_are_merged(self):
+        """Test that adjacent extents merge and return contiguous samples."""
+        cache = ExtentCache(max_samples=1000)
+        cache.add("q", 0, 120, 60, make_matrix(0, 120, 60))
+        cache.add("q", 180, 300, 60, make_matrix(180, 300, 60))
+
+        result = cache.get("q", 60, 240)
+
+        assert cache.missing_ranges("q", 0, 300, 60) == []
+        assert [sample[0] for sample in result[0]["values"]] == [60, 120, 180, 240]
+        assert len(result) == 2
+
+    def test_evicts_least_recently_used_queries(self):
+        """Test that the total sample count stays bounded."""
+        cache = ExtentCache(max_samples=30)
+        cache.add("q1", 0, 600, 60, make_matrix(0, 600, 60))  # 22 samples
+        cache.add("q2", 0, 240, 60, make_matrix(0, 240, 60))  # 10 samples
+
+        assert cache.current_samples == 10
+        assert cache.missing_ranges("q1", 0, 600, 60) == [(0, 600)]
+        assert cache.stats()["evictions"] == 1
+
+class TestSingleFlight:
+    """Test coalescing of concurrent calls."""
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """Test that cancelling one caller leaves the shared call running for the rest."""
+        flight = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", slow))
+        second = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
+        assert len(calls) == 1
+        assert flight.stats() == {"calls": 1, "coalesced": 1, "cancelled": 0, "inFlight": 0}
+
+    @pytest.mark.asyncio
+    async def test_call_cancelled_when_every_waiter_is_cancelled(self):
+        """Test that the shared call stops once nobody is waiting for it."""
+        flight = SingleFlight()
+        stopped = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            finally:
+                stopped.set()
+
+        waiters = [asyncio.ensure_future(flight.do("k", slow)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+        await asyncio.wait_for(stopped.wait(), 1)
+        assert flight.stats()["cancelled"] == 1
+        assert flight.in_flight() == 0
@@ -0,0 +1,70 @@
+"""Tests for the indexed metric name catalog."""
+
+import pytest
+from prometheus_mcp_server.catalog import MetricCatalog, required_literal
+from prometheus_mcp_server.server import filter_metrics
+
+METRICS = [
+    "storage_total", "storage_used", "storage_free", "cpu_usage",
+    "memory_total", "network_bytes", "node_cpu_seconds_total", "up"
+]
+
+class TestRequiredLiteral:
+    """Test extraction of required literals from regex patterns."""
+
+    @pytest.mark.parametrize("pattern,expected", [
+        ("storage_", "storage_"),
+        (r".*_total$", "_total"),
+        (r"http_(a|b)_total", "_total"),
+        (r"node\.cpu", "node.cpu"),
+        ("a|b", None),
+        ("(?i)total", None),
+        ("[invalid", None),
+    ])
+    def test_required_literal(self, pattern, expected):
+        """Test that only literals every match must contain are returned."""
+        assert required_literal(pattern) == expected
+
+class TestMetricCatalog:
+    """Test prefix and pattern search over the catalog."""
+
+    def test_names_sorted_and_deduplicated(self):
+        """Test that the catalog keeps a sorted set of names."""
+        catalog = MetricCatalog(["up", "cpu_usage", "up"])
+
+        assert catalog.names == ("cpu_usage", "up")
+        assert len(catalog) == 2
+
+    def test_prefix_search(self):
+        """Test prefix search with binary search."""
+        catalog = MetricCatalog(METRICS)
+
+        assert catalog.search(prefix="storage_") == ["storage_free", "storage_total", "storage_used"]
+        assert catalog.search(prefix="zzz") == []
+
+    def test_substring_search(self):
+        """Test a plain substring pattern."""
+        catalog = MetricCatalog(METRICS)
+
+        assert catalog.search(filter_pattern="cpu") == ["cpu_usage", "node_cpu_seconds_total"]
+
+    @pytest.mark.parametrize("prefix,pattern", [
+        (None, r".*_total$"),
+        ("storage_", r".*_(total|free)$"),
+        (None, r"^(up|cpu_usage)$"),
+        ("node_", "total"),
+        (None, "[invalid"),
+        (None, "(?i)STORAGE"),
+    ])
+    def test_search_matches_filter_metrics(self, prefix, pattern):
+        """Test that indexed search returns the same names as a linear scan."""
+        catalog = MetricCatalog(METRICS)
+
+        expected = sorted(filter_metrics(METRICS, filter_pattern=pattern, prefix=prefix))
+        assert catalog.search(prefix=prefix, filter_pattern=pattern) == expected
+
+    def test_search_results_memoized(self):
+        """Test that repeating a query returns the memoized result."""
+        catalog = MetricCatalog(METRICS)
+
+        assert catalog.search(filter_pattern="total") is catalog.search(filter_pattern="total")
@@ -0,0 +1,76 @@
+"""Tests for cursor-based pagination helpers."""
+
+import pytest
+from prometheus_mcp_server.cursor import (
+    decode_cursor,
+    encode_cursor,
+    item_sort_key,
+    next_cursor_state,
+    resume_index,
+    sort_items,
+)
+
+class TestSortItems:
+    """Test deterministic ordering of paginated items."""
+
+    def test_series_sort_by_label_set_regardless_of_label_order(self):
+        """Test that series order depends only on their labels."""
+        a = {"metric": {"job": "b", "instance": "1"}, "value": [1, "1"]}
+        b = {"metric": {"instance": "1", "job": "a"}, "value": [1, "2"]}
+        c = {"metric": {"instance": "0", "job": "z"}, "value": [1, "3"]}
+
+        items, keys = sort_items([a, b, c])
+
+        assert items == [c, b, a]
+        assert keys == [item_sort_key(c), item_sort_key(b), item_sort_key(a)]
+
+    def test_targets_and_names(self):
+        """Test that targets sort by labels and plain values by themselves."""
+        assert sort_items(["b", "a"])[0] == ["a", "b"]
+        targets = [{"labels": {"job": "y"}}, {"labels": {"job": "x"}}]
+        assert sort_items(targets)[0] == targets[::-1]
+
+class TestCursorState:
+    """Test cursor encoding and resuming."""
+
+    def test_round_trip_restores_tuple_keys(self):
+        """Test that label set keys survive encoding."""
+        state = {"q": "abc", "l": 2, "h": None, "k": (("job", "a"),), "n": 1}
+
+        assert decode_cursor(encode_cursor(state)) == state
+
+    @pytest.mark.parametrize("cursor", ["not base64!", "e30", "bnVsbA"])
+    def test_invalid_cursors(self, cursor):
+        """Test that malformed cursors are rejected."""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(cursor)
+
+    def test_pages_neither_skip_nor_repeat_duplicate_keys(self):
+        """Test that paging through equal keys resumes inside the run of duplicates."""
+        keys = ["a", "b", "b", "b", "c"]
+        state = {"q": "x"}
+        seen = []
+        start = resume_index(keys, state)
+        while True:
+            end = min(start + 2, len(keys))
+            seen.extend(range(start, end))
+            state = next_cursor_state(keys, end, {"q": "x"})
+            if state is None:
+                break
+            start = resume_index(keys, state)
+
+        assert seen == [0, 1, 2, 3, 4]
+
+    def test_resume_after_items_change(self):
+        """Test that a page resumes after the last key even if earlier items disappeared."""
+        state = next_cursor_state(["a", "b", "c", "d"], 2, {"q": "x"})
+
+        assert resume_index(["b", "c", "d"], state) == 1
+        assert resume_index(["a", "a2", "b", "c", "d"], state) == 3
+
+    def test_resume_after_last_key_disappeared(self):
+        """Test that no item is skipped when the last key returned is gone from the new result."""
+        state = next_cursor_state(["a", "b", "c", "d"], 2, {"q": "x"})
+
+        assert resume_index(["a", "c", "d"], state) == 1
+        assert resume_index(["a", "b", "b", "c"], {"q": "x", "k": "b", "n": 3}) == 3
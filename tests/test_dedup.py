@@ -0,0 +1,97 @@
+"""Tests for HA replica deduplication."""
+
+from prometheus_mcp_server.dedup import (
+    dedup_matrix_result,
+    dedup_samples,
+    dedup_vector_result,
+    deduplicate_replicas,
+)
+
+def samples(timestamps, value):
+    """Build samples at the given timestamps, all with one value."""
+    return [[t, value] for t in timestamps]
+
+def test_identical_replicas_keep_first():
+    """Test that replicas with the same samples yield the first replica's samples once."""
+    a = samples(range(0, 60, 15), "a")
+    b = samples(range(0, 60, 15), "b")
+
+    assert list(dedup_samples(a, b)) == a
+
+def test_gap_filled_from_other_replica():
+    """Test that a gap in one replica is filled from the other after the penalty."""
+    a = samples([t for t in range(0, 200, 15) if not 75 <= t <= 120], "a")
+    b = samples(range(0, 200, 15), "b")
+
+    merged = list(dedup_samples(a, b))
+
+    assert merged[:5] == samples([0, 15, 30, 45, 60], "a")
+    assert merged[5:] == samples(range(105, 200, 15), "b")
+
+def test_offset_scrapes_do_not_raise_sample_rate():
+    """Test that replicas scraping at different offsets are not interleaved."""
+    a = samples(range(0, 100, 15), "a")
+    b = samples(range(7, 107, 15), "b")
+
+    merged = list(dedup_samples(a, b))
+
+    timestamps = [sample[0] for sample in merged]
+    assert all(later - earlier >= 7 for earlier, later in zip(timestamps, timestamps[1:]))
+    assert len(merged) <= len(a) + 1
+
+def test_exhausted_replica_continued_by_other():
+    """Test that the other replica continues, after the penalty, once one runs out."""
+    a = samples([0, 15, 30], "a")
+    b = samples(range(0, 150, 15), "b")
+
+    assert list(dedup_samples(a, b)) == a + samples(range(75, 150, 15), "b")
+    assert list(dedup_samples([], b)) == b
+
+def test_inputs_consumed_lazily():
+    """Test that samples are pulled from the inputs only as the output is consumed."""
+    pulled = []
+
+    def replica(value):
+        for t in range(0, 10_000, 15):
+            pulled.append(value)
+            yield [t, value]
+
+    merged = dedup_samples(replica("a"), replica("b"))
+    first = [next(merged) for _ in range(3)]
+
+    assert first == samples([0, 15, 30], "a")
+    assert len(pulled) < 10
+
+def test_dedup_matrix_result_groups_by_labels_without_replica():
+    """Test that series differing only by the replica label are merged and the label removed."""
+    result = [
+        {"metric": {"job": "node", "replica": "b"}, "values": samples(range(0, 100, 15), "b")},
+        {"metric": {"job": "node", "replica": "a"}, "values": samples([0, 15], "a")},
+        {"metric": {"job": "api", "replica": "a"}, "values": samples([0], "1")},
+    ]
+
+    deduplicated = dedup_matrix_result(result, "replica")
+
+    assert deduplicated == [
+        {"metric": {"job": "node"}, "values": samples([0, 15], "a") + samples([60, 75, 90], "b")},
+        {"metric": {"job": "api"}, "values": samples([0], "1")},
+    ]
+
+def test_dedup_vector_result_keeps_latest_sample():
+    """Test that the most recent sample of a group of replicas is kept."""
+    result = [
+        {"metric": {"job": "node", "replica": "a"}, "value": [100, "1"]},
+        {"metric": {"job": "node", "replica": "b"}, "value": [110, "2"]},
+    ]
+
+    assert dedup_vector_result(result, "replica") == [{"metric": {"job": "node"}, "value": [110, "2"]}]
+
+def test_deduplicate_replicas_leaves_other_data_unchanged():
+    """Test that data without the replica label, or other result types, pass through as is."""
+    vector = {"resultType": "vector", "result": [{"metric": {"job": "node"}, "value": [1, "1"]}]}
+    scalar = {"resultType": "scalar", "result": [1, "1"]}
+
+    assert deduplicate_replicas(vector, "replica") is vector
+    assert deduplicate_replicas(scalar, "replica") is scalar
+    assert deduplicate_replicas(vector, "") is vector
+    assert deduplicate_replicas(["up"], "replica") == ["up"]
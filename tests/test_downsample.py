@@ -0,0 +1,73 @@
+"""Tests for downsampling of range query results."""
+
+import math
+
+import numpy as np
+import pytest
+from prometheus_mcp_server.downsample import downsample_matrix_result, minmax_indexes
+
+def series(values, start=0, step=15, metric=None):
+    return {"metric": metric or {"job": "a"},
+            "values": [[start + i * step, value] for i, value in enumerate(values)]}
+
+class TestMinmaxIndexes:
+    """Test min/max bucket selection."""
+
+    def test_keeps_extremes_of_each_bucket(self):
+        """Test that the lowest and highest sample of every bucket survive."""
+        values = np.array([5, 1, 9, 4, 3, 8, 2, 7], dtype=float)
+
+        indexes = minmax_indexes(np.arange(8, dtype=float), values, 4)
+
+        assert indexes.tolist() == [1, 2, 5, 6]
+
+    def test_short_series_untouched(self):
+        """Test that a series within the budget keeps all samples."""
+        assert minmax_indexes(np.arange(3, dtype=float), np.ones(3), 10).tolist() == [0, 1, 2]
+
+    def test_nan_only_kept_when_bucket_has_nothing_else(self):
+        """Test that NaN samples do not displace real extremes."""
+        values = np.array([np.nan, 1, 2, np.nan, np.nan, np.nan], dtype=float)
+
+        indexes = minmax_indexes(np.arange(6, dtype=float), values, 4)
+
+        assert 1 in indexes and 2 in indexes
+        assert len(indexes) <= 4
+
+class TestDownsampleMatrixResult:
+    """Test downsampling of whole matrix results."""
+
+    def test_reduces_long_series_and_reports(self):
+        """Test that only series over the budget are reduced and metadata adds up."""
+        long = series([str(math.sin(i / 50)) for i in range(10000)])
+        short = series(["1", "2", "3"], metric={"job": "b"})
+
+        result, metadata = downsample_matrix_result([long, short], 200)
+
+        assert len(result[0]["values"]) <= 200
+        assert result[1] is short
+        assert metadata == {
+            "method": "minmax",
+            "maxPoints": 200,
+            "reducedSeries": 1,
+            "originalPoints": 10003,
+            "returnedPoints": len(result[0]["values"]) + 3,
+        }
+
+    def test_preserves_spikes_and_original_samples(self):
+        """Test that a single spike survives and kept samples are unchanged."""
+        values = ["0"] * 5000
+        values[3217] = "100"
+        values[4001] = "-Inf"
+
+        result, _ = downsample_matrix_result([series(values)], 50)
+
+        kept = result[0]["values"]
+        assert [3217 * 15, "100"] in kept
+        assert [4001 * 15, "-Inf"] in kept
+        assert [sample[0] for sample in kept] == sorted(sample[0] for sample in kept)
+
+    def test_rejects_tiny_budget(self):
+        """Test that fewer than two points per series is rejected."""
+        with pytest.raises(ValueError, match="max_points"):
+            downsample_matrix_result([], 1)
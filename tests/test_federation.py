@@ -0,0 +1,75 @@
+"""Tests for merging results from several Prometheus backends."""
+
+from prometheus_mcp_server.federation import merge_backend_data, tag_series
+
+def test_tag_series_copies_label_sets():
+    """Test that tagging leaves the (possibly cached) input unchanged."""
+    series = [{"metric": {"__name__": "up", "backend": "old"}, "value": [1, "1"]}]
+
+    tagged = tag_series(series, "backend", "eu")
+
+    assert tagged == [{"metric": {"__name__": "up", "backend": "eu"}, "value": [1, "1"]}]
+    assert series[0]["metric"]["backend"] == "old"
+
+def test_merge_vectors_tags_origin():
+    """Test that vector series are concatenated with their backend label."""
+    merged = merge_backend_data({
+        "eu": {"resultType": "vector", "result": [{"metric": {"job": "a"}, "value": [1, "1"]}]},
+        "us": {"resultType": "vector", "result": [{"metric": {"job": "a"}, "value": [1, "0"]}]},
+    }, "region")
+
+    assert merged == {"resultType": "vector", "result": [
+        {"metric": {"job": "a", "region": "eu"}, "value": [1, "1"]},
+        {"metric": {"job": "a", "region": "us"}, "value": [1, "0"]},
+    ]}
+
+def test_merge_matrices():
+    """Test that matrix series keep their samples."""
+    merged = merge_backend_data({
+        "eu": {"resultType": "matrix", "result": [{"metric": {}, "values": [[1, "1"], [2, "2"]]}]},
+        "us": {"resultType": "matrix", "result": []},
+    }, "backend")
+
+    assert merged == {"resultType": "matrix", "result": [{"metric": {"backend": "eu"}, "values": [[1, "1"], [2, "2"]]}]}
+
+def test_merge_scalars_into_vector():
+    """Test that scalars become one labelled sample per backend."""
+    merged = merge_backend_data({
+        "eu": {"resultType": "scalar", "result": [1, "3"]},
+        "us": {"resultType": "scalar", "result": [1, "4"]},
+    }, "backend")
+
+    assert merged == {"resultType": "vector", "result": [
+        {"metric": {"backend": "eu"}, "value": [1, "3"]},
+        {"metric": {"backend": "us"}, "value": [1, "4"]},
+    ]}
+
+def test_merge_label_values_as_sorted_union():
+    """Test that metric name lists are merged without duplicates."""
+    merged = merge_backend_data({"eu": ["up", "b_total"], "us": ["up", "a_total"]}, "backend")
+
+    assert merged == ["a_total", "b_total", "up"]
+
+def test_merge_targets_tags_labels():
+    """Test that active and dropped targets are tagged with their backend."""
+    merged = merge_backend_data({
+        "eu": {"activeTargets": [{"labels": {"job": "node"}, "health": "up"}],
+               "droppedTargets": [{"discoveredLabels": {"__address__": "x"}}]},
+        "us": {"activeTargets": [{"labels": {"job": "node"}, "health": "down"}], "droppedTargets": []},
+    }, "backend")
+
+    assert merged["activeTargets"] == [
+        {"labels": {"job": "node", "backend": "eu"}, "health": "up"},
+        {"labels": {"job": "node", "backend": "us"}, "health": "down"},
+    ]
+    assert merged["droppedTargets"] == [{"discoveredLabels": {"__address__": "x", "backend": "eu"}}]
+
+def test_merge_metadata_by_key():
+    """Test that metadata entries are merged per metric without duplicates."""
+    entry = {"type": "gauge", "help": "Up", "unit": ""}
+    merged = merge_backend_data({
+        "eu": {"up": [entry]},
+        "us": {"up": [entry], "down": [entry]},
+    }, "backend")
+
+    assert merged == {"up": [entry], "down": [entry]}
@@ -0,0 +1,67 @@
+"""Tests for the pluggable JSON codec and tool result encoding."""
+
+import json
+
+import pytest
+from prometheus_mcp_server import json_codec, server
+
+@pytest.fixture
+def restore_backend():
+    previous = json_codec.backend
+    yield
+    json_codec.backend = previous
+
+class TestJsonCodec:
+    """Test backend selection and round-tripping."""
+
+    @pytest.mark.parametrize("name", ["json", "auto", "orjson"])
+    def test_round_trip(self, restore_backend, name):
+        json_codec.use_backend(name)
+        data = {"resultType": "vector", "result": [{"metric": {"job": "nöde"}, "value": [1.5, "1"]}]}
+
+        encoded = json_codec.dumps(data)
+
+        assert json_codec.loads(encoded) == data
+        assert json_codec.loads(encoded.encode()) == data
+        assert " " not in encoded
+
+    def test_auto_prefers_orjson_when_installed(self, restore_backend):
+        expected = "json" if json_codec.orjson is None else "orjson"
+        assert json_codec.use_backend("auto") == expected
+
+    def test_unknown_backend(self, restore_backend):
+        with pytest.raises(ValueError, match="Unknown JSON backend"):
+            json_codec.use_backend("simdjson")
+
+    @pytest.mark.parametrize("name", ["json", "auto"])
+    def test_invalid_document_raises_json_error(self, restore_backend, name):
+        json_codec.use_backend(name)
+        with pytest.raises(json.JSONDecodeError):
+            json_codec.loads(b'{"status": ')
+
+    @pytest.mark.parametrize("name", ["json", "auto"])
+    def test_unsupported_values_are_stringified(self, restore_backend, name):
+        class Opaque:
+            def __str__(self):
+                return "opaque"
+
+        json_codec.use_backend(name)
+        assert json_codec.dumps({"value": Opaque()}) == '{"value":"opaque"}'
+
+@pytest.mark.asyncio
+async def test_registered_tool_returns_compact_json(monkeypatch):
+    """Test that a tool called through MCP is encoded with the codec."""
+    async def fake_request(endpoint, params=None, window=None):
+        return {"resultType": "vector", "result": [{"metric": {"job": "a"}, "value": [1, "1"]}]}
+
+    monkeypatch.setattr(server, "make_prometheus_request", fake_request)
+
+    contents = await server.mcp.call_tool("execute_query", {"query": "up"})
+
+    assert len(contents) == 1
+    assert contents[0].text == '{"resultType":"vector","result":[{"metric":{"job":"a"},"value":[1,"1"]}]}'
+
+def test_decorated_tool_stays_callable():
+    """Test that the decorator returns the original coroutine function."""
+    assert server.execute_query.__name__ == "execute_query"
+    assert "execute_query" in {tool.name for tool in server.mcp._tool_manager.list_tools()}
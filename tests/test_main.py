@@ -21,6 +21,18 @@ def test_setup_environment_success(mock_config):
     # Verify
     assert result is True
 
+@patch("prometheus_mcp_server.main.backends", {"eu": MagicMock()})
+@patch("prometheus_mcp_server.main.config")
+def test_setup_environment_backends_without_url(mock_config):
+    """Test that configured backends are enough without PROMETHEUS_URL."""
+    mock_config.url = ""
+    mock_config.username = None
+    mock_config.password = None
+    mock_config.token = None
+    mock_config.org_id = None
+
+    assert setup_environment() is True
+
 @patch("prometheus_mcp_server.main.config")
 def test_setup_environment_missing_url(mock_config):
     """Test environment setup with missing URL."""
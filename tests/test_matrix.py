@@ -0,0 +1,127 @@
+"""Tests for matrix result helpers."""
+
+import pytest
+from prometheus_mcp_server.matrix import compact_matrix_result, merge_matrix_results, slice_matrix_result, split_range
+
+class TestMergeMatrixResults:
+    """Test merging of matrix results."""
+
+    def test_merges_series_in_time_order(self):
+        """Test that samples of the same series are combined and sorted."""
+        first = [{"metric": {"job": "a"}, "values": [[120, "3"], [180, "4"]]}]
+        second = [
+            {"metric": {"job": "a"}, "values": [[0, "1"], [60, "2"]]},
+            {"metric": {"job": "b"}, "values": [[0, "9"]]}
+        ]
+
+        merged = merge_matrix_results([first, second])
+
+        assert merged[0]["values"] == [[0, "1"], [60, "2"], [120, "3"], [180, "4"]]
+        assert merged[1] == {"metric": {"job": "b"}, "values": [[0, "9"]]}
+
+    def test_drops_duplicate_timestamps(self):
+        """Test that a timestamp present in several results is kept once."""
+        first = [{"metric": {"job": "a"}, "values": [[0, "1"], [60, "2"]]}]
+        second = [{"metric": {"job": "a"}, "values": [[60, "X"], [120, "3"]]}]
+
+        merged = merge_matrix_results([first, second])
+
+        assert merged[0]["values"] == [[0, "1"], [60, "2"], [120, "3"]]
+
+def test_slice_matrix_result():
+    """Test slicing samples to a time range."""
+    result = [
+        {"metric": {"job": "a"}, "values": [[0, "1"], [60, "2"], [120, "3"]]},
+        {"metric": {"job": "b"}, "values": [[0, "1"]]}
+    ]
+
+    assert slice_matrix_result(result, 60, 120) == [{"metric": {"job": "a"}, "values": [[60, "2"], [120, "3"]]}]
+
+class TestSplitRange:
+    """Test splitting range queries into shards."""
+
+    def test_split_at_interval_boundaries(self):
+        """Test that shards end before each interval boundary."""
+        shards = split_range(0, 2 * 86400 + 60, 60, 86400)
+
+        assert shards == [(0, 86340), (86400, 172740), (172800, 172860)]
+
+    @pytest.mark.parametrize("start,end,step,interval", [
+        (30, 600, 60, 200),
+        (1672531207.5, 1672531207.5 + 30 * 86400, 60, 86400),
+        (0, 1000, 7, 100),
+    ])
+    def test_shards_cover_grid_exactly_once(self, start, end, step, interval):
+        """Test that every grid point lands in exactly one shard."""
+        shards = split_range(start, end, step, interval)
+
+        grid = [round(start + i * step, 3) for i in range(int((end - start) // step) + 1)]
+        covered = []
+        for shard_start, shard_end in shards:
+            covered.extend(t for t in grid if shard_start <= t <= shard_end)
+        assert covered == grid
+        for shard_start, _ in shards:
+            assert round((shard_start - start) / step, 6).is_integer()
+
+    def test_short_range_not_split(self):
+        """Test that a range within one interval stays whole."""
+        assert split_range(0, 3000, 60, 86400) == [(0, 3000)]
+
+class TestCompactMatrixResult:
+    """Test the compact columnar matrix encoding."""
+
+    def test_lifts_common_labels_and_encodes_grid(self):
+        """Test that shared labels are listed once and samples become grid offsets."""
+        result = [
+            {"metric": {"__name__": "up", "job": "node", "instance": "a"}, "values": [[100, "1"], [115, "0.5"]]},
+            {"metric": {"__name__": "up", "job": "node", "instance": "b"}, "values": [[115, "2"], [145, "NaN"]]},
+        ]
+
+        compact = compact_matrix_result(result, start=100, step=15)
+
+        assert compact == {
+            "resultType": "compact_matrix",
+            "start": 100,
+            "step": 15,
+            "commonLabels": {"__name__": "up", "job": "node"},
+            "result": [
+                {"labels": {"instance": "a"}, "offset": 0, "values": [1, 0.5]},
+                {"labels": {"instance": "b"}, "offset": 1, "deltas": [2], "values": [2, "NaN"]},
+            ],
+        }
+
+    def test_round_trips_to_original_samples(self):
+        """Test that timestamps and values can be rebuilt from the compact form."""
+        result = [{"metric": {"job": "a"}, "values": [[1672531207.5 + i * 0.5, str(i * 0.1)] for i in range(0, 40, 3)]}]
+
+        compact = compact_matrix_result(result, start=1672531207.5, step=0.5)
+
+        series = compact["result"][0]
+        indexes = [series["offset"]]
+        for delta in series["deltas"]:
+            indexes.append(indexes[-1] + delta)
+        rebuilt = [[compact["start"] + i * compact["step"], float(v)] for i, v in zip(indexes, series["values"])]
+        assert rebuilt == [[t, float(v)] for t, v in result[0]["values"]]
+
+    def test_grid_starts_at_earliest_sample(self):
+        """Test that an aligned result whose samples precede the requested start still encodes."""
+        result = [{"metric": {"job": "a"}, "values": [[60, "1"], [120, "1"]]}]
+
+        compact = compact_matrix_result(result, start=90, step=60)
+
+        assert compact["start"] == 60
+        assert compact["result"][0]["offset"] == 0
+
+    def test_off_grid_samples_not_compacted(self):
+        """Test that samples off the step grid are rejected."""
+        result = [{"metric": {"job": "a"}, "values": [[0, "1"], [15, "1"], [20, "1"]]}]
+
+        assert compact_matrix_result(result, start=0, step=15) is None
+
+    def test_empty_result(self):
+        """Test that an empty matrix keeps the requested start."""
+        compact = compact_matrix_result([], start=1700000000, step=60)
+
+        assert compact["start"] == 1700000000
+        assert compact["result"] == []
+        assert compact["commonLabels"] == {}
@@ -0,0 +1,112 @@
+"""Tests for the server's own metrics."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from prometheus_mcp_server.metrics import (
+    CONTENT_TYPE,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    monitor_event_loop_lag,
+    serve_metrics,
+)
+
+def test_counter_exposition():
+    """Test that counters are rendered per label values, with help and type."""
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls made", ("tool",))
+    calls.inc(tool="a")
+    calls.inc(2, tool='b"c')
+
+    assert registry.expose() == (
+        "# HELP calls_total Calls made\n"
+        "# TYPE calls_total counter\n"
+        'calls_total{tool="a"} 1\n'
+        'calls_total{tool="b\\"c"} 2\n'
+    )
+
+def test_wrong_labels_rejected():
+    """Test that observations must name exactly the declared labels."""
+    counter = Counter("calls_total", "Calls made", ("tool",))
+
+    with pytest.raises(ValueError, match="expects labels tool"):
+        counter.inc(status="ok")
+
+def test_histogram_buckets_are_cumulative():
+    """Test that histogram buckets count observations up to and including their bound."""
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.expose()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 2.65",
+        "latency_seconds_count 4",
+    ]
+
+def test_collectors_read_at_scrape_time():
+    """Test that collector metrics are rebuilt on every scrape and a failing collector is skipped."""
+    registry = MetricsRegistry()
+    source = {"hits": 1}
+
+    def collect():
+        hits = Counter("hits_total", "Hits")
+        hits.inc(source["hits"])
+        return [hits]
+
+    def broken():
+        raise RuntimeError("boom")
+
+    registry.add_collector(collect)
+    registry.add_collector(broken)
+    source["hits"] = 5
+
+    assert "hits_total 5\n" in registry.expose()
+
+def test_duplicate_names_rejected():
+    """Test that a metric name can be registered once."""
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls made")
+
+    with pytest.raises(ValueError, match="already registered"):
+        registry.gauge("calls_total", "Calls made")
+
+@pytest.mark.asyncio
+async def test_metrics_served_over_http():
+    """Test that /metrics serves the exposition format and other paths are not found."""
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls made").inc()
+    server = await serve_metrics(registry, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"http://127.0.0.1:{port}/metrics")
+            missing = await client.get(f"http://127.0.0.1:{port}/other")
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    assert "calls_total 1\n" in response.text
+    assert missing.status_code == 404
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_measured():
+    """Test that blocking the event loop shows up as lag."""
+    histogram = Histogram("lag_seconds", "Lag", buckets=(0.01, 1.0))
+    monitor = asyncio.create_task(monitor_event_loop_lag(histogram, interval=0.01))
+    await asyncio.sleep(0)
+    # Block the loop past the monitor's wake-up time
+    time.sleep(0.05)
+    await asyncio.sleep(0.02)
+    monitor.cancel()
+
+    within_10ms, within_1s = (int(line.split()[-1]) for line in histogram.expose()[2:4])
+    assert within_1s > within_10ms
@@ -1,7 +1,9 @@
 """Tests for pagination and filtering functionality."""
 
+import httpx
 import pytest
 from unittest.mock import patch, MagicMock
+from prometheus_mcp_server import server
 from prometheus_mcp_server.server import (
     apply_pagination, 
     filter_metrics, 
@@ -218,4 +220,127 @@ class TestEnhancedTools:
         result = await get_targets(active_only=True)
         
         assert "droppedTargets" not in result
-        assert len(result["activeTargets"]) == 1
\ No newline at end of file
+        assert len(result["activeTargets"]) == 1
+
+
+class TestLimitPushdown:
+    """Test pushing execute_query limits down to Prometheus."""
+
+    @staticmethod
+    def vector(count):
+        return {
+            "resultType": "vector",
+            "result": [{"metric": {"__name__": f"metric_{i}"}, "value": [123, str(i)]} for i in range(count)]
+        }
+
+    @pytest.mark.asyncio
+    @patch("prometheus_mcp_server.server.make_prometheus_request")
+    async def test_limitk_pushdown_with_exact_total(self, mock_request):
+        """Test that the query is wrapped in limitk and the total comes from count()."""
+        def respond(endpoint, params):
+            if params["query"].startswith("count("):
+                return {"resultType": "vector", "result": [{"metric": {}, "value": [123, "200000"]}]}
+            return self.vector(16)
+        mock_request.side_effect = respond
+
+        result = await execute_query("up", limit=10, offset=5, pushdown="limitk", exact_total=True)
+
+        queries = sorted(call.kwargs["params"]["query"] for call in mock_request.call_args_list)
+        assert queries == ["count((up))", "limitk(16, (up))"]
+        assert len(result["result"]) == 10
+        assert result["pagination"]["total"] == 200000
+        assert result["pagination"]["totalExact"] is True
+        assert result["pagination"]["hasMore"] is True
+        assert result["pagination"]["pushdown"] == "limitk"
+
+    @pytest.mark.asyncio
+    @patch("prometheus_mcp_server.server.make_prometheus_request")
+    async def test_pushdown_total_estimated_when_count_fails(self, mock_request):
+        """Test that the total is reported as estimated if count() fails."""
+        def respond(endpoint, params):
+            if params["query"].startswith("count("):
+                raise ConnectionError("boom")
+            return self.vector(6)
+        mock_request.side_effect = respond
+
+        result = await execute_query("up", limit=5, pushdown="topk", exact_total=True)
+
+        assert result["pagination"]["totalExact"] is False
+        assert result["pagination"]["hasMore"] is True
+        assert result["pagination"]["total"] == 6
+
+    @pytest.mark.asyncio
+    @patch("prometheus_mcp_server.server.make_prometheus_request")
+    async def test_native_pushdown_uses_limit_param(self, mock_request):
+        """Test that native mode sends Prometheus's limit parameter and reports a lower bound of the total."""
+        mock_request.return_value = self.vector(3)
+
+        result = await execute_query("up", limit=2, pushdown="native")
+
+        mock_request.assert_called_once_with("query", params={"query": "up", "limit": "3"})
+        assert result["pagination"]["total"] == 3
+        assert result["pagination"]["totalExact"] is False
+        assert result["pagination"]["hasMore"] is True
+
+    @pytest.mark.asyncio
+    @patch("prometheus_mcp_server.server.make_prometheus_request")
+    async def test_pushdown_total_exact_when_fewer_series_returned(self, mock_request):
+        """Test that a short pushed-down result is known to be complete without a count()."""
+        mock_request.return_value = self.vector(4)
+
+        result = await execute_query("up", limit=5, offset=2, pushdown="limitk")
+
+        mock_request.assert_called_once_with("query", params={"query": "limitk(8, (up))"})
+        assert len(result["result"]) == 2
+        assert result["pagination"]["total"] == 4
+        assert result["pagination"]["totalExact"] is True
+        assert result["pagination"]["hasMore"] is False
+
+    @pytest.mark.asyncio
+    @patch("prometheus_mcp_server.server.make_prometheus_request")
+    async def test_pushdown_falls_back_when_rejected(self, mock_request):
+        """Test fallback to client-side pagination when Prometheus rejects the rewrite."""
+        def respond(endpoint, params):
+            if params["query"].startswith("limitk("):
+                raise ValueError("Prometheus API error: unknown function with name limitk")
+            return self.vector(20)
+        mock_request.side_effect = respond
+
+        result = await execute_query("up", limit=5, pushdown="limitk")
+
+        assert len(result["result"]) == 5
+        assert result["pagination"]["total"] == 20
+        assert result["pagination"]["totalExact"] is True
+        assert result["pagination"]["pushdown"] is None
+
+    @pytest.mark.asyncio
+    async def test_pushdown_falls_back_on_bad_data_response(self):
+        """Test fallback when Prometheus answers the rewritten query with HTTP 400 bad_data."""
+        config.url = "http://test:9090"
+        queries = []
+
+        def handler(request):
+            query = request.url.params["query"]
+            queries.append(query)
+            if query.startswith("limitk("):
+                return httpx.Response(400, json={"status": "error", "errorType": "bad_data",
+                                                 "error": "unknown function with name \"limitk\""})
+            return httpx.Response(200, json={"status": "success", "data": self.vector(20)})
+
+        server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            result = await execute_query("up", limit=5, pushdown="limitk")
+        finally:
+            server._http_client = None
+
+        assert "limitk(6, (up))" in queries
+        assert len(result["result"]) == 5
+        assert result["pagination"]["total"] == 20
+        assert result["pagination"]["pushdown"] is None
+
+    @pytest.mark.asyncio
+    async def test_unknown_pushdown_mode(self):
+        """Test that an unknown pushdown mode is rejected."""
+        config.url = "http://test:9090"
+        with pytest.raises(ValueError, match="Unknown pushdown mode"):
+            await execute_query("up", limit=5, pushdown="sample")
@@ -0,0 +1,293 @@
+"""Tests for request retries and the circuit breaker."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from prometheus_mcp_server.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    is_backend_failure,
+    is_retryable,
+    parse_retry_after,
+)
+
+def status_error(status, headers=None, json=None):
+    """Build the error raise_for_status raises for a response with the given status."""
+    request = httpx.Request("GET", "http://test:9090/api/v1/query")
+    response = httpx.Response(status, headers=headers, json=json, request=request)
+    return httpx.HTTPStatusError(f"Status {status}", request=request, response=response)
+
+class FailingCall:
+    """Coroutine function failing with the given errors before succeeding."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+def make_policy(**kwargs):
+    """Build a retry policy that records its delays instead of sleeping."""
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    return RetryPolicy(sleep=sleep, rng=lambda: 1.0, **kwargs), delays
+
+def test_parse_retry_after():
+    """Test that Retry-After is read as seconds or an HTTP date."""
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=40.0) == 60.0
+    assert parse_retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=500.0) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+def test_is_retryable():
+    """Test which failures are retried."""
+    request = httpx.Request("GET", "http://test:9090")
+    assert is_retryable(status_error(429))
+    assert is_retryable(status_error(503))
+    assert not is_retryable(status_error(400))
+    assert not is_retryable(status_error(500))
+    assert is_retryable(httpx.ConnectError("refused", request=request))
+    assert is_retryable(httpx.ConnectError("refused", request=request), method="POST")
+    assert not is_retryable(status_error(503), method="POST")
+    assert not is_retryable(httpx.ReadTimeout("slow", request=request))
+    assert not is_retryable(ValueError("Prometheus API error"))
+
+def test_query_timeouts_not_retried():
+    """Test that the 503 Prometheus sends for a timed out or canceled query is not retried."""
+    for error_type in ("timeout", "canceled"):
+        error = status_error(503, json={"status": "error", "errorType": error_type,
+                                        "error": "query timed out in expression evaluation"})
+        assert not is_retryable(error)
+    assert is_retryable(status_error(503, json={"status": "error", "errorType": "unavailable"}))
+    assert is_retryable(status_error(503, headers={"content-type": "text/html"}))
+
+@pytest.mark.asyncio
+async def test_retries_with_exponential_backoff():
+    """Test that retries wait for exponentially growing delays."""
+    policy, delays = make_policy(max_attempts=4, base_delay=0.5, max_delay=1.5)
+    call = FailingCall(status_error(503), status_error(502), status_error(429))
+
+    assert await policy.call(call) == "ok"
+
+    assert call.calls == 4
+    assert delays == [0.5, 1.0, 1.5]
+    assert policy.stats()["retries"] == 3
+    assert policy.stats()["amplification"] == 4.0
+
+@pytest.mark.asyncio
+async def test_backoff_is_jittered():
+    """Test that the backoff delay is scaled by a random factor."""
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0, rng=lambda: 0.25)
+
+    assert policy.backoff(0) == 0.25
+    assert policy.backoff(3) == 2.0
+
+@pytest.mark.asyncio
+async def test_retry_after_takes_precedence():
+    """Test that a Retry-After header sets the delay."""
+    policy, delays = make_policy(base_delay=0.1)
+    call = FailingCall(status_error(429, headers={"Retry-After": "3"}))
+
+    assert await policy.call(call) == "ok"
+
+    assert delays == [3.0]
+    assert policy.stats()["retryAfter"] == 1
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts():
+    """Test that the last error is raised once every attempt has failed."""
+    policy, delays = make_policy(max_attempts=2)
+    call = FailingCall(status_error(503), status_error(503, headers={"X": "last"}))
+
+    with pytest.raises(httpx.HTTPStatusError) as raised:
+        await policy.call(call)
+
+    assert raised.value.response.headers["X"] == "last"
+    assert call.calls == 2
+    assert policy.stats()["exhausted"] == 1
+
+@pytest.mark.asyncio
+async def test_gives_up_when_budget_is_spent():
+    """Test that a delay beyond the remaining budget is not waited for."""
+    policy, delays = make_policy(max_attempts=5, budget=10.0)
+    call = FailingCall(status_error(503, headers={"Retry-After": "4"}),
+                       status_error(503, headers={"Retry-After": "7"}))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await policy.call(call)
+
+    assert delays == [4.0]
+    assert call.calls == 2
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_raised_immediately():
+    """Test that errors such as bad queries are not retried."""
+    policy, delays = make_policy()
+    call = FailingCall(status_error(400))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await policy.call(call)
+
+    assert call.calls == 1
+    assert delays == []
+    assert policy.stats() == {"calls": 1, "attempts": 1, "retries": 0, "retryAfter": 0, "exhausted": 0,
+                              "amplification": 1.0}
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_is_backend_failure():
+    """Test that only errors pointing at an unhealthy backend trip the breaker."""
+    request = httpx.Request("GET", "http://test:9090")
+    assert is_backend_failure(status_error(503))
+    assert is_backend_failure(status_error(429))
+    assert is_backend_failure(httpx.ReadTimeout("slow", request=request))
+    assert not is_backend_failure(status_error(400))
+    assert not is_backend_failure(ValueError("Prometheus API error: parse error"))
+    for error_type in ("timeout", "canceled", "execution"):
+        assert not is_backend_failure(status_error(503, json={"status": "error", "errorType": error_type}))
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_consecutive_failures():
+    """Test that the breaker opens at the threshold and then fails fast."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=FakeClock())
+    call = FailingCall(status_error(503), status_error(503))
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await breaker.call(call)
+    with pytest.raises(CircuitOpenError, match="retry in 30s"):
+        await breaker.call(call)
+
+    assert call.calls == 2
+    assert breaker.stats()["state"] == "open"
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["lastError"].startswith("HTTPStatusError")
+
+@pytest.mark.asyncio
+async def test_concurrent_failures_open_circuit_once():
+    """Test that failures of requests in flight when the breaker opens neither count nor delay the reset."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        clock.now += 1
+        raise status_error(503)
+
+    calls = [asyncio.create_task(breaker.call(failing)) for _ in range(6)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+    assert breaker.stats()["opened"] == 1
+    assert breaker.stats()["consecutiveFailures"] == 2
+    assert breaker.retry_in() == 30 - (clock.now - 2)
+
+@pytest.mark.asyncio
+async def test_success_resets_failure_count():
+    """Test that failures must be consecutive to open the breaker."""
+    breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+    call = FailingCall(status_error(503))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await breaker.call(call)
+    await breaker.call(call)
+    call.errors = [status_error(503)]
+    with pytest.raises(httpx.HTTPStatusError):
+        await breaker.call(call)
+
+    assert breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_query_errors_do_not_open_circuit():
+    """Test that bad queries do not count as backend failures."""
+    breaker = CircuitBreaker(failure_threshold=1, clock=FakeClock())
+
+    with pytest.raises(ValueError):
+        await breaker.call(FailingCall(ValueError("Prometheus API error")))
+
+    assert breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_circuit():
+    """Test that a successful probe after the reset timeout closes the breaker."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    with pytest.raises(httpx.HTTPStatusError):
+        await breaker.call(FailingCall(status_error(503)))
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+    assert await breaker.call(FailingCall()) == "ok"
+
+    assert breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_circuit():
+    """Test that a failed probe opens the breaker for another reset timeout."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    with pytest.raises(httpx.HTTPStatusError):
+        await breaker.call(FailingCall(status_error(503)))
+
+    clock.now = 10
+    with pytest.raises(httpx.HTTPStatusError):
+        await breaker.call(FailingCall(status_error(503)))
+
+    assert breaker.state == "open"
+    assert breaker.retry_in() == 10
+    assert breaker.stats()["opened"] == 2
+
+@pytest.mark.asyncio
+async def test_half_open_lets_one_probe_through():
+    """Test that calls arriving while the probe runs fail fast."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    with pytest.raises(httpx.HTTPStatusError):
+        await breaker.call(FailingCall(status_error(503)))
+    clock.now = 10
+    release = asyncio.Event()
+
+    async def slow_probe():
+        await release.wait()
+        return "ok"
+
+    probe = asyncio.create_task(breaker.call(slow_probe))
+    await asyncio.sleep(0)
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(FailingCall())
+    release.set()
+
+    assert await probe == "ok"
+    assert breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_zero_threshold_disables_breaker():
+    """Test that a threshold of 0 never opens the breaker."""
+    breaker = CircuitBreaker(failure_threshold=0, clock=FakeClock())
+
+    for _ in range(3):
+        with pytest.raises(httpx.HTTPStatusError):
+            await breaker.call(FailingCall(status_error(503)))
+
+    assert breaker.state == "closed"
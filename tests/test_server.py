@@ -1,84 +1,721 @@
 """Tests for the Prometheus MCP server functionality."""
 
+import asyncio
+import json
+import socket
+import sys
+import time
+from unittest.mock import patch
+
+import httpx
 import pytest
-from unittest.mock import patch, MagicMock
-from prometheus_mcp_server.server import make_prometheus_request, get_prometheus_auth, config
+from prometheus_mcp_server import server
+from prometheus_mcp_server.resilience import CircuitOpenError
+from prometheus_mcp_server.server import (
+    make_prometheus_request,
+    get_prometheus_auth,
+    create_http_client,
+    get_http_client,
+    close_http_client,
+    PrometheusConfig,
+    config
+)
 
-@pytest.fixture
-def mock_response():
-    """Create a mock response object for requests."""
-    mock = MagicMock()
-    mock.raise_for_status = MagicMock()
-    mock.json.return_value = {
-        "status": "success", 
-        "data": {
-            "resultType": "vector",
-            "result": []
-        }
+SUCCESS_BODY = {
+    "status": "success",
+    "data": {
+        "resultType": "vector",
+        "result": []
     }
-    return mock
+}
+
+@pytest.fixture
+def mock_transport():
+    """Install a mock transport on the shared HTTP client and record requests."""
+    requests_seen = []
+    state = {"body": SUCCESS_BODY, "delay": 0}
+
+    async def handler(request):
+        requests_seen.append(request)
+        if state["delay"]:
+            await asyncio.sleep(state["delay"])
+        return httpx.Response(200, json=state["body"])
+
+    server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    yield requests_seen, state
+    server._http_client = None
 
-@patch("prometheus_mcp_server.server.requests.get")
-def test_make_prometheus_request_no_auth(mock_get, mock_response):
+@pytest.mark.asyncio
+async def test_make_prometheus_request_no_auth(mock_transport):
     """Test making a request to Prometheus with no authentication."""
     # Setup
-    mock_get.return_value = mock_response
+    requests_seen, _ = mock_transport
     config.url = "http://test:9090"
     config.username = ""
     config.password = ""
     config.token = ""
 
     # Execute
-    result = make_prometheus_request("query", {"query": "up"})
+    result = await make_prometheus_request("query", {"query": "up"})
 
     # Verify
-    mock_get.assert_called_once()
+    assert len(requests_seen) == 1
+    assert requests_seen[0].url == "http://test:9090/api/v1/query?query=up"
+    assert "Authorization" not in requests_seen[0].headers
     assert result == {"resultType": "vector", "result": []}
 
-@patch("prometheus_mcp_server.server.requests.get")
-def test_make_prometheus_request_with_basic_auth(mock_get, mock_response):
+@pytest.mark.asyncio
+async def test_make_prometheus_request_with_basic_auth(mock_transport):
     """Test making a request to Prometheus with basic authentication."""
     # Setup
-    mock_get.return_value = mock_response
+    requests_seen, _ = mock_transport
     config.url = "http://test:9090"
     config.username = "user"
     config.password = "pass"
     config.token = ""
 
     # Execute
-    result = make_prometheus_request("query", {"query": "up"})
+    result = await make_prometheus_request("query", {"query": "up"})
 
     # Verify
-    mock_get.assert_called_once()
+    assert len(requests_seen) == 1
+    assert requests_seen[0].headers["Authorization"].startswith("Basic ")
     assert result == {"resultType": "vector", "result": []}
 
-@patch("prometheus_mcp_server.server.requests.get")
-def test_make_prometheus_request_with_token_auth(mock_get, mock_response):
+@pytest.mark.asyncio
+async def test_make_prometheus_request_with_token_auth(mock_transport):
     """Test making a request to Prometheus with token authentication."""
     # Setup
-    mock_get.return_value = mock_response
+    requests_seen, _ = mock_transport
     config.url = "http://test:9090"
     config.username = ""
     config.password = ""
     config.token = "token123"
 
     # Execute
-    result = make_prometheus_request("query", {"query": "up"})
+    result = await make_prometheus_request("query", {"query": "up"})
 
     # Verify
-    mock_get.assert_called_once()
+    assert len(requests_seen) == 1
+    assert requests_seen[0].headers["Authorization"] == "Bearer token123"
     assert result == {"resultType": "vector", "result": []}
 
-@patch("prometheus_mcp_server.server.requests.get")
-def test_make_prometheus_request_error(mock_get):
+@pytest.mark.asyncio
+async def test_make_prometheus_request_error(mock_transport):
     """Test handling of an error response from Prometheus."""
     # Setup
-    mock_response = MagicMock()
-    mock_response.raise_for_status = MagicMock()
-    mock_response.json.return_value = {"status": "error", "error": "Test error"}
-    mock_get.return_value = mock_response
+    _, state = mock_transport
+    state["body"] = {"status": "error", "error": "Test error"}
     config.url = "http://test:9090"
 
     # Execute and verify
     with pytest.raises(ValueError, match="Prometheus API error: Test error"):
-        make_prometheus_request("query", {"query": "up"})
+        await make_prometheus_request("query", {"query": "up"})
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_overlap(mock_transport):
+    """Test that slow requests run concurrently instead of queueing."""
+    # Setup
+    requests_seen, state = mock_transport
+    state["delay"] = 0.2
+    config.url = "http://test:9090"
+    config.token = ""
+
+    # Execute
+    started = time.perf_counter()
+    await asyncio.gather(
+        make_prometheus_request("query_range", {"query": "up", "start": "1", "end": "2", "step": "1"}),
+        make_prometheus_request("query_range", {"query": "rate(x[5m])", "start": "1", "end": "2", "step": "1"}),
+    )
+    elapsed = time.perf_counter() - started
+
+    # Verify
+    assert len(requests_seen) == 2
+    assert elapsed < 0.35
+
+@pytest.mark.asyncio
+async def test_create_http_client_uses_pool_settings():
+    """Test that the HTTP client is built from the connection pool settings."""
+    # Setup
+    pool_config = PrometheusConfig(
+        url="http://test:9090",
+        max_connections=7,
+        max_keepalive_connections=3,
+        keepalive_expiry=12.5
+    )
+
+    # Execute
+    client = create_http_client(pool_config)
+
+    # Verify
+    pool = client._transport._pool
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+    assert pool._keepalive_expiry == 12.5
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_create_http_client_http2_without_h2():
+    """Test that HTTP/2 falls back to HTTP/1.1 when h2 is not installed."""
+    pool_config = PrometheusConfig(url="http://test:9090", http2=True)
+
+    with patch.dict(sys.modules, {"h2": None}):
+        client = create_http_client(pool_config)
+
+    assert client._transport._pool._http2 is False
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_http_client_reused_and_closed():
+    """Test that the shared client is reused across calls and closed on shutdown."""
+    # Execute
+    client = get_http_client()
+
+    # Verify
+    assert get_http_client() is client
+    await close_http_client()
+    assert client.is_closed
+    assert server._http_client is None
+
+@pytest.mark.asyncio
+async def test_repeated_query_served_from_cache(mock_transport):
+    """Test that an identical query within the TTL does not hit Prometheus again."""
+    # Setup
+    requests_seen, _ = mock_transport
+    config.url = "http://test:9090"
+
+    # Execute
+    first = await make_prometheus_request("query", {"query": "up"})
+    second = await make_prometheus_request("query", {"query": " up "})
+    await make_prometheus_request("query", {"query": "up", "time": "1700000000"})
+
+    # Verify
+    assert first == second
+    assert len(requests_seen) == 2
+    assert server.result_cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_metadata_requests_not_cached(mock_transport):
+    """Test that only query endpoints are cached."""
+    requests_seen, _ = mock_transport
+    config.url = "http://test:9090"
+
+    await make_prometheus_request("targets")
+    await make_prometheus_request("targets")
+
+    assert len(requests_seen) == 2
+
+def test_result_cache_ttl_for_historical_ranges():
+    """Test that ranges ending in the past get the longer historical TTL."""
+    # Setup
+    past_end = str(time.time() - 3600)
+    now_end = str(time.time())
+
+    # Verify
+    assert server.get_result_cache_ttl("query_range", {"end": past_end}) == config.cache_historical_ttl
+    assert server.get_result_cache_ttl("query_range", {"end": now_end}) == config.cache_ttl
+    assert server.get_result_cache_ttl("query", {"query": "up"}) == config.cache_ttl
+    assert server.get_result_cache_ttl("query", {"query": "up", "time": past_end}) == config.cache_historical_ttl
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_are_coalesced(mock_transport):
+    """Test that identical in-flight requests share one upstream call and result."""
+    # Setup
+    requests_seen, state = mock_transport
+    state["delay"] = 0.05
+    config.url = "http://test:9090"
+
+    # Execute
+    results = await asyncio.gather(
+        make_prometheus_request("label/__name__/values"),
+        make_prometheus_request("label/__name__/values"),
+        make_prometheus_request("label/__name__/values"),
+        make_prometheus_request("targets"),
+    )
+
+    # Verify
+    assert len(requests_seen) == 2
+    assert results[0] is results[1] is results[2]
+    assert server.request_coalescer.stats()["coalesced"] == 2
+    assert server.request_coalescer.stats()["inFlight"] == 0
+
+@pytest.mark.asyncio
+async def test_coalesced_requests_share_errors(mock_transport):
+    """Test that a failing shared call raises in every waiting caller."""
+    _, state = mock_transport
+    state["delay"] = 0.05
+    state["body"] = {"status": "error", "error": "Test error"}
+    config.url = "http://test:9090"
+
+    results = await asyncio.gather(
+        make_prometheus_request("targets"),
+        make_prometheus_request("targets"),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+@pytest.mark.asyncio
+async def test_create_http_client_uses_timeout_settings():
+    """Test that the HTTP client is built with the connect and read timeouts."""
+    client = create_http_client(PrometheusConfig(url="http://test:9090", connect_timeout=2.5, read_timeout=45.0))
+
+    assert client.timeout.connect == 2.5
+    assert client.timeout.read == 45.0
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_per_call_timeout_forwarded_without_splitting_cache(mock_transport):
+    """Test that a per-call timeout reaches Prometheus but shares the cached result."""
+    # Setup
+    requests_seen, _ = mock_transport
+    config.url = "http://test:9090"
+
+    # Execute
+    await make_prometheus_request("query", {"query": "up", "timeout": "30s"})
+    await make_prometheus_request("query", {"query": "up"})
+
+    # Verify
+    assert len(requests_seen) == 1
+    assert requests_seen[0].url.params["timeout"] == "30s"
+
+@pytest.mark.asyncio
+async def test_per_call_timeout_raises_when_exceeded(mock_transport):
+    """Test that a slow response fails once the per-call timeout has passed."""
+    # Setup
+    _, state = mock_transport
+    state["delay"] = 1
+    config.url = "http://test:9090"
+
+    # Execute
+    started = time.perf_counter()
+    with patch.object(server, "TIMEOUT_GRACE", 0.05):
+        with pytest.raises(TimeoutError, match="timed out after 0.1"):
+            await make_prometheus_request("query", {"query": "up", "timeout": "0.1"})
+
+    # Verify
+    assert time.perf_counter() - started < 0.5
+    assert server.request_coalescer.stats()["cancelled"] == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_call_cancels_upstream_request(mock_transport):
+    """Test that cancelling the only caller stops the request to Prometheus."""
+    # Setup
+    upstream_cancelled = asyncio.Event()
+    config.url = "http://test:9090"
+
+    async def handler(request):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+        return httpx.Response(200, json=SUCCESS_BODY)
+
+    server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    # Execute
+    call = asyncio.create_task(make_prometheus_request("query", {"query": "up"}))
+    await asyncio.sleep(0.05)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    # Verify
+    await asyncio.wait_for(upstream_cancelled.wait(), 1)
+    assert server.request_coalescer.stats()["inFlight"] == 0
+
+@pytest.mark.asyncio
+async def test_overloaded_backend_is_retried(mock_transport):
+    """Test that a 503 with Retry-After is retried once for all coalesced callers."""
+    # Setup
+    requests_seen = []
+    config.url = "http://test:9090"
+
+    async def handler(request):
+        requests_seen.append(request)
+        await asyncio.sleep(0.02)
+        if len(requests_seen) == 1:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        return httpx.Response(200, json=SUCCESS_BODY)
+
+    server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    # Execute
+    results = await asyncio.gather(
+        make_prometheus_request("query", {"query": "up"}),
+        make_prometheus_request("query", {"query": "up"}),
+    )
+
+    # Verify
+    assert results[0] == SUCCESS_BODY["data"]
+    assert len(requests_seen) == 2
+    assert server.retry_policy.stats()["retries"] == 1
+    assert server.retry_policy.stats()["retryAfter"] == 1
+
+@pytest.mark.asyncio
+async def test_query_timeout_is_not_retried(mock_transport):
+    """Test that a query Prometheus timed out is sent once, not again at full cost."""
+    requests_seen = []
+    config.url = "http://test:9090"
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(503, json={"status": "error", "errorType": "timeout",
+                                         "error": "query timed out in expression evaluation"})
+
+    server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await make_prometheus_request("query", {"query": "expensive", "timeout": "5s"})
+
+    assert len(requests_seen) == 1
+    assert server.retry_policy.stats()["retries"] == 0
+
+@pytest.mark.asyncio
+async def test_query_timeouts_do_not_open_circuit(mock_transport):
+    """Test that slow queries timing out leave the breaker closed for other queries."""
+    config.url = "http://test:9090"
+
+    def handler(request):
+        if request.url.params["query"] == "expensive":
+            return httpx.Response(503, json={"status": "error", "errorType": "timeout",
+                                             "error": "query timed out in expression evaluation"})
+        return httpx.Response(200, json=SUCCESS_BODY)
+
+    server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    with patch.object(server.circuit_breaker, "failure_threshold", 2):
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await make_prometheus_request("query", {"query": "expensive"})
+        result = await make_prometheus_request("query", {"query": "up"})
+
+    assert result == SUCCESS_BODY["data"]
+    assert server.circuit_breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_when_backend_is_down(mock_transport):
+    """Test that repeated failures open the breaker so later calls skip Prometheus."""
+    # Setup
+    requests_seen = []
+    config.url = "http://test:9090"
+
+    async def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(503, headers={"Retry-After": "0"})
+
+    server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    # Execute
+    with patch.object(server.circuit_breaker, "failure_threshold", 3):
+        with pytest.raises(httpx.HTTPStatusError):
+            await make_prometheus_request("query", {"query": "up"})
+        with pytest.raises(CircuitOpenError, match="circuit breaker open"):
+            await make_prometheus_request("query", {"query": "rate(x[5m])"})
+
+    # Verify
+    assert len(requests_seen) == 3
+    assert server.circuit_breaker.stats()["state"] == "open"
+
+def test_load_backends():
+    """Test that backends inherit pool settings but not credentials from the default backend."""
+    base = PrometheusConfig(url="http://default:9090", token="secret", org_id="tenant", max_connections=50)
+
+    loaded = server.load_backends(
+        '[{"name": "eu", "url": "http://eu:9090", "org_id": "eu-tenant", "replicas": ["http://eu-b:9090"]},'
+        ' {"name": "us", "url": "http://us:9090", "max_connections": 5}]',
+        base
+    )
+
+    assert list(loaded) == ["eu", "us"]
+    assert loaded["eu"].name == "eu"
+    assert loaded["eu"].token is None
+    assert loaded["eu"].org_id == "eu-tenant"
+    assert loaded["eu"].max_connections == 50
+    assert loaded["us"].max_connections == 5
+    assert loaded["eu"].replicas == ("http://eu-b:9090",)
+    assert loaded["us"].replicas == ()
+    assert server.load_backends('{"eu": {"url": "http://eu:9090"}}', base)["eu"].url == "http://eu:9090"
+    assert server.load_backends("", base) == {}
+
+@pytest.mark.parametrize("text", [
+    '{"all": {"url": "http://x:9090"}}',
+    '{"eu": {}}',
+    '{"eu": {"url": "http://x:9090", "colour": "red"}}',
+    '{"eu": {"url": "http://x:9090", "retry_max_attempts": 1}}',
+    '{"eu": {"url": "http://x:9090", "load_balancing": "random"}}',
+    '{"eu": {"url": "http://x:9090", "cache_ttl": 0}}',
+])
+def test_load_backends_rejects_invalid_settings(text):
+    """Test that reserved names, missing URLs, unknown and shared settings and unknown strategies are rejected."""
+    with pytest.raises(ValueError):
+        server.load_backends(text, PrometheusConfig(url=""))
+
+@pytest.fixture
+def regional_backends():
+    """Configure two extra backends, each answering with its own name after a delay."""
+    requests_seen = {"eu": [], "us": []}
+    state = {"delay": 0, "failing": set()}
+
+    def make_client(name):
+        async def handler(request):
+            requests_seen[name].append(request)
+            await asyncio.sleep(state["delay"])
+            if name in state["failing"]:
+                return httpx.Response(500)
+            return httpx.Response(200, json={"status": "success", "data": {
+                "resultType": "vector", "result": [{"metric": {"__name__": "up"}, "value": [1, name]}]
+            }})
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    backends = {name: PrometheusConfig(url=f"http://{name}:9090", name=name) for name in requests_seen}
+    with patch.dict(server.backends, backends), patch.object(config, "url", "http://test:9090"):
+        for name in requests_seen:
+            server._backend_clients[name] = make_client(name)
+        yield requests_seen, state
+    server._backend_clients.clear()
+    server._backend_breakers.clear()
+
+def test_resolve_backends(regional_backends):
+    """Test backend selectors."""
+    assert server.resolve_backends(None) == ("default",)
+    assert server.resolve_backends("all") == ("default", "eu", "us")
+    assert server.resolve_backends("us, eu,us") == ("us", "eu")
+    with pytest.raises(ValueError, match="Unknown Prometheus backend: asia. Available backends: default, eu, us"):
+        server.resolve_backends("eu,asia")
+
+@pytest.mark.asyncio
+async def test_fan_out_queries_backends_concurrently(regional_backends):
+    """Test that a query against several backends runs concurrently and tags each series."""
+    # Setup
+    requests_seen, state = regional_backends
+    state["delay"] = 0.2
+
+    # Execute
+    started = time.perf_counter()
+    result = await server.execute_query("up", backend="eu,us")
+    elapsed = time.perf_counter() - started
+
+    # Verify
+    assert elapsed < 0.35
+    assert len(requests_seen["eu"]) == len(requests_seen["us"]) == 1
+    assert result["result"] == [
+        {"metric": {"__name__": "up", "backend": "eu"}, "value": [1, "eu"]},
+        {"metric": {"__name__": "up", "backend": "us"}, "value": [1, "us"]},
+    ]
+    assert "backendErrors" not in result
+
+@pytest.mark.asyncio
+async def test_fan_out_reports_failed_backends(regional_backends):
+    """Test that a failing backend is reported while the others still answer."""
+    # Setup
+    _, state = regional_backends
+    state["failing"] = {"us"}
+
+    # Execute
+    result = await server.execute_query("up", backend="eu,us")
+
+    # Verify
+    assert [series["metric"]["backend"] for series in result["result"]] == ["eu"]
+    assert list(result["backendErrors"]) == ["us"]
+    assert "500" in result["backendErrors"]["us"]
+
+@pytest.mark.asyncio
+async def test_fan_out_raises_when_every_backend_fails(regional_backends):
+    """Test that the error is raised when no backend answers."""
+    _, state = regional_backends
+    state["failing"] = {"eu", "us"}
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await server.execute_query("up", backend="eu,us")
+
+@pytest.mark.asyncio
+async def test_fan_out_deduplicates_ha_replicas(regional_backends):
+    """Test that backends holding HA replicas merge into one series when the backend label is the replica label."""
+    with patch.object(config, "backend_label", "replica"), patch.object(config, "replica_label", "replica"):
+        result = await server.execute_query("up", backend="eu,us")
+
+    assert result["result"] == [{"metric": {"__name__": "up"}, "value": [1, "eu"]}]
+
+@pytest.mark.asyncio
+async def test_replica_series_deduplicated_before_caching(mock_transport):
+    """Test that series from a single backend differing by the replica label are deduplicated."""
+    _, state = mock_transport
+    config.url = "http://test:9090"
+    state["body"] = {"status": "success", "data": {"resultType": "matrix", "result": [
+        {"metric": {"job": "node", "prometheus_replica": "a"}, "values": [[0, "1"], [15, "1"]]},
+        {"metric": {"job": "node", "prometheus_replica": "b"}, "values": [[t, "2"] for t in range(0, 100, 15)]},
+    ]}}
+
+    with patch.object(config, "replica_label", "prometheus_replica"):
+        data = await make_prometheus_request("query_range", {"query": "up", "start": "0", "end": "90", "step": "15"})
+
+    assert data["result"] == [{"metric": {"job": "node"}, "values": [[0, "1"], [15, "1"], [60, "2"], [75, "2"], [90, "2"]]}]
+
+@pytest.mark.asyncio
+async def test_backends_have_separate_caches_and_breakers(regional_backends):
+    """Test that the same query against two backends is cached separately."""
+    requests_seen, _ = regional_backends
+
+    eu = await server.execute_query("up", backend="eu")
+    us = await server.execute_query("up", backend="us")
+    await server.execute_query("up", backend="eu")
+
+    assert eu["result"][0]["value"] == [1, "eu"]
+    assert us["result"][0]["value"] == [1, "us"]
+    assert len(requests_seen["eu"]) == len(requests_seen["us"]) == 1
+    assert requests_seen["eu"][0].url.host == "eu"
+    assert set(server._backend_breakers) == {"eu", "us"}
+
+@pytest.mark.asyncio
+async def test_requests_balanced_over_replicas(mock_transport):
+    """Test that requests alternate between the replicas of the backend."""
+    # Setup
+    requests_seen, _ = mock_transport
+    config.url = "http://test:9090"
+
+    # Execute
+    with patch.object(config, "replicas", ("http://replica:9090",)):
+        await make_prometheus_request("query", {"query": "up"})
+        await make_prometheus_request("query", {"query": "up"})
+        await make_prometheus_request("query", {"query": "down"})
+        stats = server.get_replica_set().stats()
+
+    # Verify
+    assert [request.url.host for request in requests_seen] == ["test", "replica"]
+    assert [replica["requests"] for replica in stats["replicas"]] == [1, 1]
+
+@pytest.mark.asyncio
+async def test_paginated_query_streams_large_response():
+    """Test that a paginated query of unknown length keeps only the requested page."""
+    # Setup
+    body = json.dumps({
+        "status": "success",
+        "data": {
+            "resultType": "vector",
+            "result": [{"metric": {"__name__": f"m{i}"}, "value": [1, str(i)]} for i in range(50)]
+        }
+    }).encode()
+
+    async def chunks():
+        for i in range(0, len(body), 100):
+            yield body[i:i + 100]
+
+    def handler(request):
+        # A streamed body has no Content-Length, like a chunked Prometheus response
+        return httpx.Response(200, content=chunks())
+
+    server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    config.url = "http://test:9090"
+
+    # Execute
+    result = await server.execute_query("up", limit=5, offset=40)
+
+    # Verify
+    assert [item["metric"]["__name__"] for item in result["result"]] == [f"m{i}" for i in range(40, 45)]
+    assert result["pagination"]["total"] == 50
+    assert result["pagination"]["hasMore"] is True
+    assert len(server.result_cache) == 0
+    server._http_client = None
+
+@pytest.mark.asyncio
+async def test_upstream_requests_measured(mock_transport):
+    """Test that upstream requests record their latency, decode time and size by endpoint."""
+    config.url = "http://test:9090"
+
+    await make_prometheus_request("query", {"query": "up"})
+
+    labels = {"backend": "default", "endpoint": "query"}
+    assert server.upstream_duration.count(code="200", **labels) == 1
+    assert server.upstream_decode_duration.count(**labels) == 1
+    assert server.upstream_response_bytes.count(**labels) == 1
+
+@pytest.mark.asyncio
+async def test_failed_upstream_request_measured_with_status(mock_transport):
+    """Test that failed requests are labelled with the HTTP status."""
+    _, state = mock_transport
+    config.url = "http://test:9090"
+    server._http_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(400)))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await make_prometheus_request("query", {"query": "up"})
+
+    assert server.upstream_duration.count(backend="default", endpoint="query", code="400") == 1
+
+@pytest.mark.asyncio
+async def test_component_counters_exposed(mock_transport):
+    """Test that cache, coalescing and retry counters are read into the exposition."""
+    config.url = "http://test:9090"
+    await asyncio.gather(*(make_prometheus_request("query", {"query": "up"}) for _ in range(2)))
+    await make_prometheus_request("query", {"query": "up"})
+
+    exposition = server.metrics_registry.expose()
+
+    assert 'prometheus_mcp_cache_hits_total{cache="result"} 1\n' in exposition
+    assert 'prometheus_mcp_cache_hit_ratio{cache="result"} ' in exposition
+    assert "prometheus_mcp_coalesced_requests_total 1\n" in exposition
+    assert "prometheus_mcp_upstream_retries_total 0\n" in exposition
+
+@pytest.mark.asyncio
+async def test_lifespan_serves_metrics_on_configured_port():
+    """Test that the metrics port is opened for the server's lifetime."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    with patch.object(config, "metrics_port", port), patch.object(config, "metric_catalog_refresh_interval", 0):
+        async with server.server_lifespan(server.mcp):
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"http://127.0.0.1:{port}/metrics")
+
+    assert response.status_code == 200
+    assert "# TYPE prometheus_mcp_tool_calls_total counter" in response.text
+
+@pytest.mark.asyncio
+async def test_debug_timing_reports_phases_and_query_stats(mock_transport):
+    """Test that debug_timing asks Prometheus for stats=all and reports phases, bytes and query statistics."""
+    requests_seen, state = mock_transport
+    config.url = "http://test:9090"
+    state["body"] = {"status": "success", "data": {
+        "resultType": "vector",
+        "result": [{"metric": {"job": "node"}, "value": [1, "1"]}],
+        "stats": {"timings": {"evalTotalTime": 0.004, "execQueueTime": 0.0001},
+                  "samples": {"totalQueryableSamples": 120, "peakSamples": 12}},
+    }}
+
+    contents = await server.mcp.call_tool("execute_query", {"query": "up", "debug_timing": True})
+    cached = await server.mcp.call_tool("execute_query", {"query": "up", "debug_timing": True})
+    await server.mcp.call_tool("execute_query", {"query": "up", "compact": True})
+
+    result = json.loads(contents[0].text)
+    timing = result.pop("debugTiming")
+    assert result == {"resultType": "vector", "result": [{"metric": {"job": "node"}, "value": [1, "1"]}]}
+    assert requests_seen[0].url.params["stats"] == "all"
+    assert set(timing["phasesMs"]) == {"network", "decode", "encode"}
+    assert timing["upstreamRequests"] == 1
+    assert timing["upstreamBytes"] > timing["resultBytes"] > 0
+    assert timing["prometheus"] == {"queries": 1, "evalTotalTimeMs": 4.0, "execQueueTimeMs": 0.1,
+                                    "totalQueryableSamples": 120, "peakSamples": 12}
+    cached_timing = json.loads(cached[0].text)["debugTiming"]
+    assert cached_timing["cacheHits"] == 1
+    assert "upstreamRequests" not in cached_timing
+    assert len(requests_seen) == 1
+
+@pytest.mark.asyncio
+async def test_stored_result_counts_response_size(mock_transport):
+    """Test that a stored result is sized by its Prometheus response and stored once per request."""
+    _, state = mock_transport
+    config.url = "http://test:9090"
+    state["body"] = {"status": "success", "data": {
+        "resultType": "vector",
+        "result": [{"metric": {"instance": f"host-{i}"}, "value": [1, "1"]} for i in range(150)],
+    }}
+    response_bytes = len(httpx.Response(200, json=state["body"]).content)
+
+    first = await server.execute_query("up", limit=10)
+    cached = await server.execute_query("up", limit=10, offset=10)
+
+    assert cached["handle"] == first["handle"]
+    assert server.result_store.stats()["bytes"] == response_bytes
+    assert len(server.result_store) == 1
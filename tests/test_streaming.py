@@ -0,0 +1,98 @@
+"""Tests for incremental parsing of large Prometheus responses."""
+
+import json
+
+import pytest
+from prometheus_mcp_server.streaming import ResultWindow, parse_windowed_response
+
+async def chunked(body, size=7):
+    """Yield a body in small chunks to exercise items split across reads."""
+    data = body.encode()
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def matrix_body(series=20, samples=5):
+    return json.dumps({
+        "status": "success",
+        "data": {
+            "resultType": "matrix",
+            "result": [
+                {"metric": {"__name__": "up", "instance": f"höst-{i}"},
+                 "values": [[1700000000 + n * 15, str(n)] for n in range(samples)]}
+                for i in range(series)
+            ]
+        },
+        "warnings": ["partial"]
+    }, indent=1)
+
+class TestParseWindowedResponse:
+    """Test windowed streaming parse."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    async def test_keeps_only_window(self, chunk_size):
+        """Test that only items inside the window are kept, with the total counted."""
+        body = matrix_body()
+
+        parsed = await parse_windowed_response(chunked(body, chunk_size), ResultWindow(offset=5, limit=3))
+
+        expected = json.loads(body)["data"]["result"][5:8]
+        assert parsed["status"] == "success"
+        assert parsed["data"]["resultType"] == "matrix"
+        assert parsed["data"]["result"] == expected
+        assert parsed["data"]["window"] == {"offset": 5, "limit": 3, "total": 20}
+
+    @pytest.mark.asyncio
+    async def test_window_without_limit(self):
+        """Test an offset-only window keeps everything after the offset."""
+        parsed = await parse_windowed_response(chunked(matrix_body(series=4)), ResultWindow(offset=3))
+
+        assert len(parsed["data"]["result"]) == 1
+        assert parsed["data"]["window"]["total"] == 4
+
+    @pytest.mark.asyncio
+    async def test_empty_result(self):
+        """Test an empty result array."""
+        body = '{"status":"success","data":{"resultType":"vector","result":[]}}'
+
+        parsed = await parse_windowed_response(chunked(body), ResultWindow(limit=10))
+
+        assert parsed["data"]["result"] == []
+        assert parsed["data"]["window"]["total"] == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("body", [
+        '{"status":"success","data":{"resultType":"scalar","result":[1700000000,"1"]}}',
+        '{"status":"error","errorType":"bad_data","error":"parse error"}',
+    ])
+    async def test_non_list_results_parsed_in_full(self, body):
+        """Test that scalar and error responses are returned unchanged."""
+        parsed = await parse_windowed_response(chunked(body), ResultWindow(limit=1))
+
+        assert parsed == json.loads(body)
+
+    @pytest.mark.asyncio
+    async def test_truncated_body(self):
+        """Test that a truncated body raises a JSON decode error."""
+        body = matrix_body()[:-200]
+
+        with pytest.raises(json.JSONDecodeError):
+            await parse_windowed_response(chunked(body), ResultWindow(limit=1))
+
+    @pytest.mark.asyncio
+    async def test_large_item_not_reparsed_per_chunk(self, monkeypatch):
+        """Test that an item spread over many chunks is decoded a logarithmic number of times."""
+        attempts = []
+        raw_decode = json.JSONDecoder.raw_decode
+
+        def counting_raw_decode(self, text, index=0):
+            attempts.append(index)
+            return raw_decode(self, text, index)
+
+        monkeypatch.setattr(json.JSONDecoder, "raw_decode", counting_raw_decode)
+        body = matrix_body(series=1, samples=2000)
+
+        parsed = await parse_windowed_response(chunked(body, 64), ResultWindow(limit=1))
+
+        assert len(parsed["data"]["result"][0]["values"]) == 2000
+        assert len(attempts) < 20
@@ -0,0 +1,73 @@
+"""Tests for per-series range query summaries."""
+
+import numpy as np
+import pytest
+from prometheus_mcp_server.summary import nan_percentiles, summarize_matrix_result
+
+def series(instance, values, start=1700000000, step=60):
+    return {"metric": {"__name__": "load", "job": "node", "instance": instance},
+            "values": [[start + i * step, value] for i, value in enumerate(values)]}
+
+def test_nan_percentiles_match_numpy():
+    """Test that vectorized percentiles agree with numpy.nanpercentile."""
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=(40, 25))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[4] = np.nan
+
+    p50, p95 = nan_percentiles(values, [50, 95])
+
+    with pytest.warns(RuntimeWarning):
+        expected = np.nanpercentile(values, [50, 95], axis=1)
+    np.testing.assert_allclose(p50, expected[0])
+    np.testing.assert_allclose(p95, expected[1])
+
+class TestSummarizeMatrixResult:
+    """Test summary statistics of matrix results."""
+
+    def test_statistics_match_numpy_per_series(self):
+        """Test that batched statistics agree with computing each series alone."""
+        rng = np.random.default_rng(7)
+        data = [rng.normal(10, 3, size=n) for n in (50, 120, 7)]
+        result = [series(f"host-{i}", [str(v) for v in values]) for i, values in enumerate(data)]
+
+        summary = summarize_matrix_result(result)
+
+        assert summary["resultType"] == "summary"
+        assert summary["commonLabels"] == {"__name__": "load", "job": "node"}
+        for row, values in zip(summary["result"], data):
+            assert row["count"] == len(values)
+            assert row["min"] == pytest.approx(values.min())
+            assert row["max"] == pytest.approx(values.max())
+            assert row["avg"] == pytest.approx(values.mean())
+            assert row["p50"] == pytest.approx(np.percentile(values, 50))
+            assert row["p95"] == pytest.approx(np.percentile(values, 95))
+            assert row["last"] == pytest.approx(values[-1])
+        assert [row["labels"] for row in summary["result"]] == [{"instance": f"host-{i}"} for i in range(3)]
+
+    def test_slope_is_rate_per_second(self):
+        """Test that a linear series reports its rate of change per second."""
+        result = [series("a", [str(2 * i) for i in range(10)], step=30)]
+
+        row = summarize_matrix_result(result)["result"][0]
+
+        assert row["slope"] == pytest.approx(2 / 30)
+        assert row["last"] == 18
+
+    def test_non_finite_values(self):
+        """Test that NaN samples are skipped and non-finite results are encoded as strings."""
+        result = [
+            series("a", ["1", "NaN", "3"]),
+            series("b", ["NaN"]),
+            series("c", ["1", "+Inf"]),
+        ]
+
+        rows = summarize_matrix_result(result)["result"]
+
+        assert rows[0]["avg"] == 2 and rows[0]["last"] == 3
+        assert rows[1]["min"] == "NaN" and rows[1]["slope"] == "NaN"
+        assert rows[2]["max"] == "+Inf" and rows[2]["slope"] == "NaN"
+
+    def test_empty_result(self):
+        """Test that an empty matrix gives an empty summary."""
+        assert summarize_matrix_result([]) == {"resultType": "summary", "commonLabels": {}, "result": []}
@@ -0,0 +1,75 @@
+"""Tests for timestamp and duration parsing."""
+
+import time
+
+import pytest
+from prometheus_mcp_server.timeutils import parse_timestamp, parse_duration, is_historical, nice_step
+
+class TestParseTimestamp:
+    """Test Prometheus timestamp parsing."""
+
+    def test_unix_timestamps(self):
+        """Test numeric and numeric-string timestamps."""
+        assert parse_timestamp("1617898448.214") == 1617898448.214
+        assert parse_timestamp(1617898448) == 1617898448.0
+
+    def test_rfc3339_timestamps(self):
+        """Test RFC3339 timestamps with and without offsets."""
+        assert parse_timestamp("2023-01-01T00:00:00Z") == 1672531200.0
+        assert parse_timestamp("2023-01-01T01:00:00+01:00") == 1672531200.0
+        assert parse_timestamp("2023-01-01T00:00:00.123456789Z") == pytest.approx(1672531200.123456)
+
+    def test_invalid_timestamp(self):
+        """Test that invalid timestamps raise ValueError."""
+        with pytest.raises(ValueError, match="Invalid timestamp"):
+            parse_timestamp("yesterday")
+
+class TestParseDuration:
+    """Test Prometheus duration parsing."""
+
+    @pytest.mark.parametrize("value,expected", [
+        ("15s", 15),
+        ("1m", 60),
+        ("1h30m", 5400),
+        ("500ms", 0.5),
+        ("1d", 86400),
+        ("30", 30),
+        (2.5, 2.5),
+    ])
+    def test_valid_durations(self, value, expected):
+        """Test supported duration formats."""
+        assert parse_duration(value) == expected
+
+    @pytest.mark.parametrize("value", ["", "1x", "m5", "5m garbage"])
+    def test_invalid_durations(self, value):
+        """Test that invalid durations raise ValueError."""
+        with pytest.raises(ValueError, match="Invalid duration"):
+            parse_duration(value)
+
+def test_is_historical():
+    """Test detection of timestamps outside the recent window."""
+    assert is_historical(None, 300) is False
+    assert is_historical(str(time.time()), 300) is False
+    assert is_historical(str(time.time() - 3600), 300) is True
+    assert is_historical("not-a-time", 300) is False
+
+class TestNiceStep:
+    """Test automatic step selection."""
+
+    @pytest.mark.parametrize("start,end,max_points,expected", [
+        (0, 3600, 1000, 5),
+        (0, 86400, 100, 900),
+        (0, 86400, 289, 300),
+        (0, 30 * 86400, 11000, 300),
+        (0, 60, 1000, 1),
+    ])
+    def test_smallest_nice_step_within_budget(self, start, end, max_points, expected):
+        """Test that the chosen step is nice and keeps the grid within max_points."""
+        step = nice_step(start, end, max_points)
+
+        assert step == expected
+        assert (end - start) // step + 1 <= max_points
+
+    def test_very_long_ranges_use_whole_weeks(self):
+        """Test that steps beyond the table are rounded up to weeks."""
+        assert nice_step(0, 10 * 365 * 86400, 10) == 58 * 604800
@@ -0,0 +1,68 @@
+"""Tests for per-call timing breakdowns."""
+
+from prometheus_mcp_server.timing import CallTiming, current_timing, start_timing, stop_timing, timed, timed_phase
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_phases_accumulate_and_nested_phase_counted_once():
+    """Test that repeated phases add up and a phase nested in itself is not counted twice."""
+    clock = FakeClock()
+    timing = CallTiming(clock=clock)
+
+    with timing.phase("pagination"):
+        clock.now += 0.002
+        with timing.phase("pagination"):
+            clock.now += 0.001
+    with timing.phase("pagination"):
+        clock.now += 0.004
+    timing.add("network", 0.01)
+    timing.count("upstreamBytes", 100)
+    timing.count("upstreamBytes", 50)
+
+    assert timing.report() == {
+        "totalMs": 7.0,
+        "phasesMs": {"pagination": 7.0, "network": 10.0},
+        "upstreamBytes": 150,
+    }
+
+def test_query_stats_summed_over_queries():
+    """Test that Prometheus query statistics add up, keeping the largest peak."""
+    timing = CallTiming()
+    timing.add_query_stats({"timings": {"evalTotalTime": 0.002, "execQueueTime": 0.001},
+                            "samples": {"totalQueryableSamples": 100, "peakSamples": 40,
+                                        "totalQueryableSamplesPerStep": [[1, 100]]}})
+    timing.add_query_stats({"timings": {"evalTotalTime": 0.003}, "samples": {"totalQueryableSamples": 5, "peakSamples": 5}})
+
+    assert timing.report()["prometheus"] == {
+        "queries": 2,
+        "evalTotalTimeMs": 5.0,
+        "execQueueTimeMs": 1.0,
+        "totalQueryableSamples": 105,
+        "peakSamples": 40,
+    }
+
+def test_phases_ignored_unless_timing():
+    """Test that timed blocks and functions do nothing outside a timed call."""
+    @timed_phase("compaction")
+    def compact(value):
+        return value * 2
+
+    assert current_timing() is None
+    with timed("pagination"):
+        pass
+    assert compact(2) == 4
+
+    token = start_timing()
+    try:
+        compact(2)
+        assert list(current_timing().phases) == ["compaction"]
+    finally:
+        stop_timing(token)
+    assert current_timing() is None
@@ -1,8 +1,12 @@
 """Tests for the MCP tools functionality."""
 
+import asyncio
+import json
+
 import pytest
 from unittest.mock import patch, MagicMock
-from prometheus_mcp_server.server import execute_query, execute_range_query, list_metrics, get_metric_metadata, get_targets
+from prometheus_mcp_server import server
+from prometheus_mcp_server.server import execute_query, execute_range_query, list_metrics, get_metric_metadata, get_targets, get_result_page, execute_queries, get_health, config
 
 @pytest.fixture
 def mock_make_request():
@@ -43,6 +47,15 @@ async def test_execute_query_with_time(mock_make_request):
     mock_make_request.assert_called_once_with("query", params={"query": "up", "time": "2023-01-01T00:00:00Z"})
     assert result["resultType"] == "vector"
 
+@pytest.mark.asyncio
+async def test_execute_query_with_timeout(mock_make_request):
+    """Test that a per-call timeout is passed on to Prometheus."""
+    mock_make_request.return_value = {"resultType": "vector", "result": []}
+
+    await execute_query("up", timeout="30s")
+
+    mock_make_request.assert_called_once_with("query", params={"query": "up", "timeout": "30s"})
+
 @pytest.mark.asyncio
 async def test_execute_range_query(mock_make_request):
     """Test the execute_range_query tool."""
@@ -88,7 +101,34 @@ async def test_list_metrics(mock_make_request):
 
     # Verify
     mock_make_request.assert_called_once_with("label/__name__/values")
-    assert result == ["up", "go_goroutines", "http_requests_total"]
+    assert result == {"metrics": ["go_goroutines", "http_requests_total", "up"], "total": 3}
+
+@pytest.mark.asyncio
+async def test_list_metrics_pages_served_from_catalog(mock_make_request):
+    """Test that paging through metrics reuses the catalog instead of refetching."""
+    # Setup
+    mock_make_request.return_value = [f"metric_{i:03d}" for i in range(100)]
+
+    # Execute
+    first = await list_metrics(limit=10, offset=0)
+    second = await list_metrics(limit=10, offset=10, prefix="metric_0")
+
+    # Verify
+    mock_make_request.assert_called_once_with("label/__name__/values")
+    assert first["metrics"][0] == "metric_000"
+    assert second["metrics"] == [f"metric_{i:03d}" for i in range(10, 20)]
+    assert second["pagination"]["total"] == 100
+
+@pytest.mark.asyncio
+async def test_list_metrics_refreshes_stale_catalog(mock_make_request):
+    """Test that the catalog is refetched once the refresh interval has passed."""
+    mock_make_request.return_value = ["up"]
+
+    with patch.object(config, "metric_catalog_refresh_interval", 0):
+        await list_metrics()
+        await list_metrics()
+
+    assert mock_make_request.call_count == 2
 
 @pytest.mark.asyncio
 async def test_get_metric_metadata(mock_make_request):
@@ -126,3 +166,536 @@ async def test_get_targets(mock_make_request):
     assert len(result["activeTargets"]) == 1
     assert result["activeTargets"][0]["health"] == "up"
     assert len(result["droppedTargets"]) == 0
+
+def fake_range_response(endpoint, params):
+    """Build a matrix response covering the requested grid."""
+    start, end, step = float(params["start"]), float(params["end"]), float(params["step"])
+    count = int((end - start) // step) + 1
+    return {
+        "resultType": "matrix",
+        "result": [{
+            "metric": {"__name__": "up", "job": "prometheus"},
+            "values": [[start + i * step, "1"] for i in range(count)]
+        }]
+    }
+
+@pytest.mark.asyncio
+async def test_execute_range_query_fetches_only_missing_extent(mock_make_request):
+    """Test that sliding a historical window only fetches the new sub-range."""
+    # Setup
+    mock_make_request.side_effect = fake_range_response
+    start = 1672531200  # 2023-01-01T00:00:00Z
+
+    # Execute
+    await execute_range_query("up", start=str(start), end=str(start + 3600), step="60")
+    result = await execute_range_query("up", start=str(start + 120), end=str(start + 3720), step="60")
+
+    # Verify
+    assert mock_make_request.call_count == 2
+    second_params = mock_make_request.call_args_list[1].kwargs["params"]
+    assert second_params["start"] == str(start + 3660)
+    assert second_params["end"] == str(start + 3720)
+    timestamps = [sample[0] for sample in result["result"][0]["values"]]
+    assert timestamps == [start + 120 + i * 60 for i in range(61)]
+
+@pytest.mark.asyncio
+async def test_execute_range_query_splits_long_ranges(mock_make_request):
+    """Test that a long range is split into day shards and stitched without gaps or duplicates."""
+    # Setup
+    mock_make_request.side_effect = fake_range_response
+    start = 1672531200  # 2023-01-01T00:00:00Z, a day boundary
+    end = start + 3 * 86400
+
+    # Execute
+    result = await execute_range_query("up", start=str(start), end=str(end), step="3600")
+
+    # Verify
+    assert mock_make_request.call_count == 4
+    timestamps = [sample[0] for sample in result["result"][0]["values"]]
+    assert timestamps == [start + i * 3600 for i in range(3 * 24 + 1)]
+
+@pytest.mark.asyncio
+async def test_execute_range_query_shard_fan_out_is_bounded(mock_make_request):
+    """Test that no more than range_max_parallel shards are in flight at once."""
+    # Setup
+    in_flight = {"current": 0, "max": 0}
+
+    async def slow_response(endpoint, params):
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+        return fake_range_response(endpoint, params)
+
+    mock_make_request.side_effect = slow_response
+    start = 1672531200
+
+    # Execute
+    with patch.object(config, "range_max_parallel", 2):
+        await execute_range_query("up", start=str(start), end=str(start + 10 * 86400), step="3600")
+
+    # Verify
+    assert mock_make_request.call_count == 11
+    assert in_flight["max"] == 2
+
+@pytest.mark.asyncio
+async def test_timeout_bounds_whole_split_range_query(mock_make_request):
+    """Test that the shards of a split range query share one deadline instead of one each."""
+    # Setup
+    async def slow_response(endpoint, params):
+        await asyncio.sleep(0.15)
+        return fake_range_response(endpoint, params)
+
+    mock_make_request.side_effect = slow_response
+    start = 1672531200
+
+    # Execute
+    started = asyncio.get_running_loop().time()
+    with patch.object(config, "range_max_parallel", 1), patch.object(server, "TIMEOUT_GRACE", 0.05):
+        with pytest.raises(TimeoutError, match="timed out after 0.2"):
+            await execute_range_query("up", start=str(start), end=str(start + 4 * 86400), step="3600",
+                                      timeout="0.2")
+
+    # Verify
+    assert asyncio.get_running_loop().time() - started < 0.4
+    assert mock_make_request.call_count < 5
+
+@pytest.mark.asyncio
+async def test_execute_range_query_compact(mock_make_request):
+    """Test that compact range results are smaller and carry the same samples."""
+    # Setup
+    start = 1672531200
+    response = {
+        "resultType": "matrix",
+        "result": [{
+            "metric": {"__name__": "node_load1", "job": "node", "instance": f"host-{i}:9100"},
+            "values": [[start + n * 60, str(n % 7 + 0.25)] for n in range(60)]
+        } for i in range(5)]
+    }
+    mock_make_request.return_value = response
+
+    # Execute
+    result = await execute_range_query("node_load1", start=str(start), end=str(start + 3540), step="1m",
+                                       compact=True)
+
+    # Verify
+    assert result["resultType"] == "compact_matrix"
+    assert result["start"] == start
+    assert result["step"] == 60
+    assert result["commonLabels"] == {"__name__": "node_load1", "job": "node"}
+    assert result["result"][3]["labels"] == {"instance": "host-3:9100"}
+    assert result["result"][3]["values"][:3] == [0.25, 1.25, 2.25]
+    assert len(json.dumps(result)) * 2 < len(json.dumps(response))
+
+@pytest.mark.asyncio
+async def test_execute_range_query_compact_paginated(mock_make_request):
+    """Test that compact mode is applied to the page and keeps pagination metadata."""
+    # Setup
+    mock_make_request.return_value = fake_range_response("query_range", {"start": "0", "end": "120", "step": "60"})
+
+    # Execute
+    result = await execute_range_query("up", start="0", end="120", step="60", limit=1, compact=True)
+
+    # Verify
+    assert result["resultType"] == "compact_matrix"
+    assert result["pagination"]["returned"] == 1
+    assert result["result"] == [{"labels": {}, "offset": 0, "values": [1, 1, 1]}]
+
+@pytest.mark.asyncio
+async def test_execute_range_query_max_points(mock_make_request):
+    """Test that long series are downsampled and the reduction is reported."""
+    # Setup
+    mock_make_request.side_effect = fake_range_response
+
+    # Execute
+    result = await execute_range_query("up", start="0", end="86400", step="15", max_points=100, compact=True)
+
+    # Verify
+    assert result["resultType"] == "compact_matrix"
+    assert len(result["result"][0]["values"]) <= 100
+    assert result["downsampling"]["originalPoints"] == 5761
+    assert result["downsampling"]["reducedSeries"] == 1
+
+@pytest.mark.asyncio
+async def test_execute_range_query_rejects_invalid_max_points(mock_make_request):
+    """Test that an unusable point budget fails before querying Prometheus."""
+    with pytest.raises(ValueError, match="max_points"):
+        await execute_range_query("up", start="0", end="60", step="15", max_points=1)
+
+    mock_make_request.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_execute_range_query_chooses_step_from_max_points(mock_make_request):
+    """Test that omitting step picks a nice step that caps the evaluated points."""
+    # Setup
+    mock_make_request.side_effect = fake_range_response
+    start = 1672531200
+
+    # Execute
+    result = await execute_range_query("up", start=str(start), end=str(start + 86400), max_points=100)
+
+    # Verify
+    mock_make_request.assert_called_once()
+    assert mock_make_request.call_args.kwargs["params"]["step"] == "900"
+    assert result["autoStep"] == "900"
+    assert len(result["result"][0]["values"]) == 97
+    assert result["downsampling"]["reducedSeries"] == 0
+
+@pytest.mark.asyncio
+async def test_execute_range_query_requires_step_or_max_points(mock_make_request):
+    """Test that a range query without step or max_points is rejected."""
+    with pytest.raises(ValueError, match="step or max_points"):
+        await execute_range_query("up", start="0", end="60")
+
+@pytest.mark.asyncio
+async def test_execute_range_query_summary(mock_make_request):
+    """Test that summary mode returns one small row per series."""
+    # Setup
+    start = 1672531200
+    response = {
+        "resultType": "matrix",
+        "result": [{
+            "metric": {"__name__": "node_load1", "instance": f"host-{i}:9100"},
+            "values": [[start + n * 60, str((n + i) % 11)] for n in range(120)]
+        } for i in range(5000)]
+    }
+    mock_make_request.return_value = response
+
+    # Execute
+    result = await execute_range_query("node_load1", start=str(start), end=str(start + 7140), step="60",
+                                       summary=True, compact=True)
+
+    # Verify
+    assert result["resultType"] == "summary"
+    assert len(result["result"]) == 5000
+    assert result["result"][0] == {"labels": {"instance": "host-0:9100"}, "count": 120, "min": 0, "max": 10,
+                                   "avg": pytest.approx(4.958, abs=0.001), "p50": 5, "p95": 10, "last": 9,
+                                   "slope": pytest.approx(0, abs=1e-3)}
+    assert len(json.dumps(result)) * 10 < len(json.dumps(response))
+
+def vector_response(count):
+    """Build a vector response with one series per instance."""
+    return {
+        "resultType": "vector",
+        "result": [
+            {"metric": {"__name__": "up", "instance": f"host-{i:03d}"}, "value": [1700000000, str((i * 7) % 13)]}
+            for i in range(count)
+        ]
+    }
+
+@pytest.mark.asyncio
+async def test_get_result_page_serves_stored_pages(mock_make_request):
+    """Test that further pages of a large result come from the store without new requests."""
+    # Setup
+    mock_make_request.return_value = vector_response(150)
+
+    # Execute
+    first = await execute_query("up", limit=10)
+    second = await get_result_page(first["handle"], limit=10, offset=10)
+
+    # Verify
+    mock_make_request.assert_called_once()
+    assert [item["metric"]["instance"] for item in second["result"]] == [f"host-{i:03d}" for i in range(10, 20)]
+    assert second["source"] == "execute_query"
+    assert second["resultType"] == "vector"
+    assert second["pagination"]["total"] == 150
+    assert second["pagination"]["hasMore"] is True
+
+@pytest.mark.asyncio
+async def test_get_result_page_sorts_and_projects(mock_make_request):
+    """Test that stored results can be sorted by value and projected to selected fields."""
+    # Setup
+    mock_make_request.return_value = vector_response(150)
+    handle = (await execute_query("up", limit=1))["handle"]
+
+    # Execute
+    top = await get_result_page(handle, limit=3, sort_by="value", descending=True,
+                                fields=["metric.instance", "value.1"])
+    by_instance = await get_result_page(handle, limit=2, sort_by="metric.instance", descending=True, compact=True)
+
+    # Verify
+    assert [row["value.1"] for row in top["result"]] == ["12", "12", "12"]
+    assert set(top["result"][0]) == {"metric.instance", "value.1"}
+    assert by_instance["resultType"] == "compact_vector"
+    assert [item["labels"]["instance"] for item in by_instance["result"]] == ["host-149", "host-148"]
+    mock_make_request.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_small_results_get_no_handle(mock_make_request):
+    """Test that results below the store threshold are not stored."""
+    mock_make_request.return_value = vector_response(5)
+
+    result = await execute_query("up", limit=2)
+
+    assert "handle" not in result
+
+@pytest.mark.asyncio
+async def test_repeated_request_reuses_handle(mock_make_request):
+    """Test that paging through a request again keeps one stored copy under one handle."""
+    # Setup
+    mock_make_request.return_value = vector_response(150)
+
+    # Execute
+    first = await execute_query("up", limit=10)
+    second = await execute_query("up", limit=10, offset=10)
+    mock_make_request.return_value = vector_response(120)
+    refreshed = await execute_query("up", limit=10, offset=20)
+
+    # Verify
+    assert second["handle"] == first["handle"] == refreshed["handle"]
+    assert len(server.result_store) == 1
+    assert (await get_result_page(first["handle"]))["pagination"]["total"] == 120
+
+@pytest.mark.asyncio
+async def test_list_metrics_and_targets_return_handles(mock_make_request):
+    """Test that paginated metric and target lists can be paged through their handles."""
+    # Setup
+    mock_make_request.side_effect = lambda endpoint, params=None: (
+        [f"metric_{i:03d}" for i in range(120)] if endpoint == "label/__name__/values" else
+        {"activeTargets": [{"health": "up" if i % 3 else "down", "labels": {"job": f"j{i}"}} for i in range(120)],
+         "droppedTargets": []}
+    )
+
+    # Execute
+    metrics = await list_metrics(limit=5)
+    targets = await get_targets(limit=5)
+    metrics_page = await get_result_page(metrics["handle"], offset=115)
+    down = await get_result_page(targets["handle"], sort_by="health", limit=40, fields=["labels.job", "health"])
+
+    # Verify
+    assert metrics_page["result"] == [f"metric_{i:03d}" for i in range(115, 120)]
+    assert "resultType" not in metrics_page
+    assert all(row["health"] == "down" for row in down["result"])
+
+@pytest.mark.asyncio
+async def test_range_query_cursor_returns_handle(mock_make_request):
+    """Test that a cursor-paginated range result can be paged through its handle."""
+    # Setup
+    def respond(endpoint, params=None):
+        response = fake_range_response(endpoint, params)
+        response["result"] = [dict(response["result"][0], metric={"job": f"j{i:03d}"}) for i in range(120)]
+        return response
+
+    mock_make_request.side_effect = respond
+
+    # Execute
+    first = await execute_range_query("up", start="0", end="60", step="60", limit=10, cursor="")
+    page = await get_result_page(first["handle"], offset=115)
+
+    # Verify
+    assert page["source"] == "execute_range_query"
+    assert page["resultType"] == "matrix"
+    assert [item["metric"]["job"] for item in page["result"]] == [f"j{i:03d}" for i in range(115, 120)]
+    mock_make_request.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_get_result_page_unknown_handle(mock_make_request):
+    """Test that an expired or unknown handle asks for the query to be re-run."""
+    with pytest.raises(ValueError, match="Unknown or expired result handle"):
+        await get_result_page("missing")
+
+@pytest.mark.asyncio
+async def test_execute_query_cursor_pages_cover_result_once(mock_make_request):
+    """Test that cursor pages are in label set order and cover every series exactly once."""
+    # Setup
+    response = vector_response(150)
+    response["result"].reverse()
+    mock_make_request.return_value = response
+
+    # Execute
+    pages = [await execute_query("up", limit=40, cursor="")]
+    while pages[-1]["pagination"]["nextCursor"]:
+        pages.append(await execute_query("up", cursor=pages[-1]["pagination"]["nextCursor"]))
+
+    # Verify
+    instances = [item["metric"]["instance"] for page in pages for item in page["result"]]
+    assert instances == [f"host-{i:03d}" for i in range(150)]
+    assert [page["pagination"]["returned"] for page in pages] == [40, 40, 40, 30]
+    assert pages[-1]["pagination"]["hasMore"] is False
+    mock_make_request.assert_called_once_with("query", params={"query": "up"})
+
+@pytest.mark.asyncio
+async def test_cursor_resumes_after_handle_expires(mock_make_request):
+    """Test that an expired handle is refetched and the next page resumes by key."""
+    # Setup
+    mock_make_request.return_value = vector_response(150)
+    first = await execute_query("up", limit=100, cursor="")
+    server.result_store.clear()
+    # Series before the cursor disappear in the new snapshot
+    mock_make_request.return_value = {"resultType": "vector", "result": vector_response(150)["result"][50:]}
+
+    # Execute
+    second = await execute_query("up", cursor=first["pagination"]["nextCursor"])
+
+    # Verify
+    assert mock_make_request.call_count == 2
+    assert [item["metric"]["instance"] for item in second["result"]] == [f"host-{i:03d}" for i in range(100, 150)]
+
+@pytest.mark.asyncio
+async def test_limit_without_cursor_pages_like_offset(mock_make_request):
+    """Test that limit alone keeps the Prometheus order, so legacy offset pages follow on without gaps."""
+    names = ["zeta", "alpha", "mid", "beta"]
+    mock_make_request.return_value = {"resultType": "vector", "result": [
+        {"metric": {"__name__": name}, "value": [1, "1"]} for name in names
+    ]}
+
+    first = await execute_query("up", limit=2)
+    second = await execute_query("up", limit=2, offset=2)
+
+    assert [item["metric"]["__name__"] for item in first["result"] + second["result"]] == names
+    assert "nextCursor" not in first["pagination"]
+
+@pytest.mark.asyncio
+async def test_cursor_rejected_for_different_query(mock_make_request):
+    """Test that a cursor cannot be reused for another query."""
+    mock_make_request.return_value = vector_response(10)
+    first = await execute_query("up", limit=3, cursor="")
+
+    with pytest.raises(ValueError, match="different query"):
+        await execute_query("down", cursor=first["pagination"]["nextCursor"])
+
+@pytest.mark.asyncio
+async def test_list_metrics_and_range_query_cursors(mock_make_request):
+    """Test cursor pagination of metric names and range series."""
+    # Setup
+    def respond(endpoint, params=None):
+        if endpoint == "label/__name__/values":
+            return [f"metric_{i}" for i in range(5)]
+        response = fake_range_response(endpoint, params)
+        response["result"] = [dict(response["result"][0], metric={"job": job}) for job in ("c", "a", "b")]
+        return response
+
+    mock_make_request.side_effect = respond
+
+    # Execute
+    names = await list_metrics(limit=3, cursor="")
+    more_names = await list_metrics(cursor=names["pagination"]["nextCursor"])
+    series = await execute_range_query("up", start="0", end="60", step="60", limit=2, compact=True, cursor="")
+    more_series = await execute_range_query("up", start="0", end="60", step="60",
+                                            cursor=series["pagination"]["nextCursor"])
+
+    # Verify
+    assert names["metrics"] + more_names["metrics"] == [f"metric_{i}" for i in range(5)]
+    assert [item["labels"] for item in series["result"]] == [{"job": "a"}, {"job": "b"}]
+    assert series["pagination"]["hasMore"] is True
+    assert [item["metric"] for item in more_series["result"]] == [{"job": "c"}]
+
+@pytest.mark.asyncio
+async def test_execute_queries_runs_batch_concurrently(mock_make_request):
+    """Test that a batch fans out with bounded concurrency and reports each query."""
+    # Setup
+    in_flight = {"current": 0, "max": 0}
+
+    async def respond(endpoint, params=None):
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+        if params["query"] == "bad(":
+            raise ValueError("Prometheus API error: parse error")
+        if endpoint == "query_range":
+            return fake_range_response(endpoint, params)
+        return vector_response(1)
+
+    mock_make_request.side_effect = respond
+    queries = [{"query": f"up{{job='{i}'}}"} for i in range(6)]
+    queries.append({"query": "up", "start": "0", "end": "120", "step": "60", "compact": True})
+    queries.append({"query": "bad("})
+    queries.append({"query": "up", "step": "60"})
+
+    # Execute
+    with patch.object(config, "batch_max_parallel", 3):
+        batch = await execute_queries(queries)
+
+    # Verify
+    results = batch["results"]
+    assert [outcome["index"] for outcome in results] == list(range(9))
+    assert all(outcome["status"] == "success" for outcome in results[:7])
+    assert results[6]["type"] == "range"
+    assert results[6]["result"]["resultType"] == "compact_matrix"
+    assert results[7] == {"index": 7, "type": "instant", "query": "bad(", "status": "error",
+                          "error": "Prometheus API error: parse error", "durationMs": results[7]["durationMs"]}
+    assert "Unknown parameters for instant query: step" in results[8]["error"]
+    assert batch["errors"] == 2
+    assert in_flight["max"] == 3
+    assert all(outcome["durationMs"] >= 0 for outcome in results)
+
+@pytest.mark.asyncio
+async def test_get_health_reports_healthy_backend(mock_make_request):
+    """Test that a responding backend with a closed breaker is healthy."""
+    mock_make_request.return_value = {"version": "2.53.0"}
+
+    result = await get_health()
+
+    mock_make_request.assert_called_once_with("status/buildinfo")
+    assert result["status"] == "healthy"
+    assert result["prometheus"]["reachable"] is True
+    assert result["prometheus"]["version"] == "2.53.0"
+    assert result["circuitBreaker"]["state"] == "closed"
+    assert "amplification" in result["retries"]
+
+@pytest.mark.asyncio
+async def test_get_health_reports_open_breaker(mock_make_request):
+    """Test that an open breaker makes the backend unhealthy without probing."""
+    server.circuit_breaker.failure_threshold = 1
+    server.circuit_breaker.record_failure(ConnectionError("refused"))
+    try:
+        result = await get_health(probe=False)
+    finally:
+        server.circuit_breaker.failure_threshold = config.circuit_failure_threshold
+
+    mock_make_request.assert_not_called()
+    assert result["status"] == "unhealthy"
+    assert result["circuitBreaker"]["state"] == "open"
+    assert result["circuitBreaker"]["lastError"] == "ConnectionError: refused"
+
+@pytest.mark.asyncio
+async def test_get_health_reports_failed_probe(mock_make_request):
+    """Test that a failing probe makes the backend unhealthy."""
+    mock_make_request.side_effect = ConnectionError("refused")
+
+    result = await get_health()
+
+    assert result["status"] == "unhealthy"
+    assert result["prometheus"] == {"url": config.url, "reachable": False, "error": "refused",
+                                    "latencyMs": result["prometheus"]["latencyMs"]}
+
+@pytest.mark.asyncio
+async def test_tool_calls_measured():
+    """Test that tool calls through MCP are counted and timed by outcome."""
+    with patch("prometheus_mcp_server.server.make_prometheus_request") as mock_request:
+        mock_request.return_value = {"resultType": "vector", "result": []}
+        await server.mcp.call_tool("execute_query", {"query": "up"})
+        mock_request.side_effect = ValueError("bad query")
+        with pytest.raises(Exception):
+            await server.mcp.call_tool("execute_query", {"query": "up{"})
+
+    assert server.tool_calls.value(tool="execute_query", status="success") == 1
+    assert server.tool_calls.value(tool="execute_query", status="error") == 1
+    assert server.tool_duration.count(tool="execute_query") == 2
+    assert server.tool_response_bytes.count(tool="execute_query") == 1
+
+@pytest.mark.asyncio
+async def test_debug_timing_wraps_list_results():
+    """Test that results that are not objects are returned under "result" with their timing."""
+    metadata = [{"type": "gauge", "help": "Up", "unit": ""}]
+    with patch("prometheus_mcp_server.server.make_prometheus_request") as mock_request:
+        mock_request.return_value = {"metadata": metadata}
+        contents = await server.mcp.call_tool("get_metric_metadata", {"metric": "up", "debug_timing": True})
+
+    result = json.loads(contents[0].text)
+    assert result["result"] == metadata
+    assert "encode" in result["debugTiming"]["phasesMs"]
+
+@pytest.mark.asyncio
+async def test_debug_timing_times_pagination_and_compaction():
+    """Test that pagination and compaction show up as phases."""
+    with patch("prometheus_mcp_server.server.make_prometheus_request") as mock_request:
+        mock_request.return_value = {"resultType": "vector", "result": [
+            {"metric": {"job": str(i)}, "value": [1, "1"]} for i in range(5)
+        ]}
+        contents = await server.mcp.call_tool("execute_query", {"query": "up", "limit": 2, "compact": True,
+                                                                "debug_timing": True})
+
+    phases = json.loads(contents[0].text)["debugTiming"]["phasesMs"]
+    assert {"pagination", "compaction", "encode"} <= set(phases)